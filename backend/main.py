@@ -2,9 +2,14 @@
 Malaysian Tourism App - FastAPI Backend
 """
 import os
-from routers import search, itinerary, recommendations
+from routers import search, itinerary, recommendations, images, admin, places
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.admission import AdmissionMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.tracing import TracingMiddleware
+from middleware.capture import CaptureMiddleware
 from dotenv import load_dotenv
 
 
@@ -21,6 +26,19 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Opt-in per-request profiles (X-Profile header or PROFILE_SAMPLE_RATE), inside
+# admission control so queue wait is not profiled
+app.add_middleware(ProfilingMiddleware)
+
+# Bounded concurrency + per-client rate limits for JamAI-backed routes
+app.add_middleware(AdmissionMiddleware)
+
+# gzip/brotli for JSON responses (streams included, SSE excluded)
+app.add_middleware(CompressionMiddleware)
+
+# Root span + X-Trace-Id per request (spans exported per TRACE_EXPORTER)
+app.add_middleware(TracingMiddleware)
+
 # CORS configuration for Vite.js frontend
 app.add_middleware(
     CORSMiddleware,
@@ -35,10 +53,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Anonymized request log for scripts.replay (CAPTURE_TRAFFIC=true) - outermost,
+# so recorded latency is what clients saw
+app.add_middleware(CaptureMiddleware)
+
 # Include routers
 app.include_router(search.router)
 app.include_router(itinerary.router)
 app.include_router(recommendations.router)
+app.include_router(images.router)
+app.include_router(places.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -51,7 +76,9 @@ async def root():
         "endpoints": {
             "search": "/api/search",
             "itinerary": "/api/itinerary",
-            "recommendations": "/api/recommendations"
+            "recommendations": "/api/recommendations",
+            "images": "/api/images/{place}/{size}",
+            "places": "/api/places/lookup"
         }
     }
 
@@ -0,0 +1,285 @@
+"""
+Admission control for expensive routes - bounded concurrency, a bounded priority
+queue with a max wait, per-client token buckets, and fast 429/503 + Retry-After
+"""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# Lower value = admitted first. Streaming clients are already holding a
+# connection open and watching for progress, so they go ahead of plain calls.
+PRIORITY_STREAM = 0
+PRIORITY_DEFAULT = 1
+
+# Client key header; falls back to the client IP
+CLIENT_KEY_HEADER = "x-api-key"
+MAX_TRACKED_CLIENTS = 10000
+
+
+class Overloaded(Exception):
+    """Request rejected before it started; maps to a 429/503 with Retry-After"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0.0 if a token was taken, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """One TokenBucket per client key (least recently seen keys are dropped)"""
+
+    def __init__(self, per_minute: float, burst: float, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client_key: str) -> None:
+        bucket = self._buckets.get(client_key)
+        if bucket is None:
+            bucket = self._buckets[client_key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_key)
+        wait = bucket.take()
+        if wait:
+            raise Overloaded(429, "Rate limit exceeded for this client", max(1, math.ceil(wait)))
+
+
+class AdmissionController:
+    """
+    At most `max_concurrent` requests run; up to `max_queue` more wait (by
+    priority, then arrival) for at most `max_wait` seconds. Everything else
+    is rejected immediately, so admitted requests keep finishing on time.
+
+    Usage:
+        await controller.acquire(PRIORITY_DEFAULT)
+        try:
+            ...
+        finally:
+            controller.release(elapsed_seconds)
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # EWMA of service time, used for Retry-After
+        self.service_seconds = 5.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0, "rate_limited": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        backlog = self.active + self.queued
+        return max(1, math.ceil(self.service_seconds * backlog / self.max_concurrent))
+
+    async def acquire(self, priority: int = PRIORITY_DEFAULT) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected_full"] += 1
+            raise Overloaded(503, f"{self.name} is at capacity, try again later", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self.stats["queued"] += 1
+        try:
+            # release() hands its slot straight to us, so `active` is already counted
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self.stats["rejected_timeout"] += 1
+            raise Overloaded(503, f"{self.name} queue wait exceeded {self.max_wait:g}s", self.retry_after())
+        except asyncio.CancelledError:
+            self._remove(entry)
+            if future.done() and not future.cancelled():
+                self.release()  # Slot was handed over just as we were cancelled
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        if elapsed is not None:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * elapsed
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _remove(self, entry) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def snapshot(self) -> Dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "service_seconds": round(self.service_seconds, 3),
+            **self.stats,
+        }
+
+
+class AdmissionRule:
+    """Admission settings for every path under `prefix` (except `exempt` prefixes)"""
+
+    def __init__(
+        self,
+        prefix: str,
+        max_concurrent: int,
+        max_queue: int,
+        max_wait: float,
+        rate_per_minute: Optional[float] = None,
+        rate_burst: float = 1,
+        exempt: Tuple[str, ...] = ()
+    ):
+        self.prefix = prefix
+        self.exempt = exempt
+        self.controller = AdmissionController(prefix, max_concurrent, max_queue, max_wait)
+        self.limiter = ClientRateLimiter(rate_per_minute, rate_burst) if rate_per_minute else None
+
+    def matches(self, path: str) -> bool:
+        return path.startswith(self.prefix) and not path.startswith(self.exempt)
+
+    async def admit(self, client: str, priority: int = PRIORITY_DEFAULT) -> None:
+        """Rate limit `client`, then take a slot (release it with controller.release)"""
+        if self.limiter:
+            try:
+                self.limiter.check(client)
+            except Overloaded:
+                self.controller.stats["rate_limited"] += 1
+                raise
+        await self.controller.acquire(priority)
+
+
+# Rules of every AdmissionMiddleware instance (for /api/admin/admission)
+_REGISTERED_RULES: List[AdmissionRule] = []
+
+def admission_snapshot() -> Dict[str, Dict]:
+    return {rule.prefix: rule.controller.snapshot() for rule in _REGISTERED_RULES}
+
+
+def default_rules() -> List[AdmissionRule]:
+    """Per-route limits (env-configurable). Only JamAI-backed routes are gated."""
+    return [
+        AdmissionRule(
+            "/api/itinerary",
+            max_concurrent=int(os.getenv("ITINERARY_MAX_CONCURRENT", "8")),
+            max_queue=int(os.getenv("ITINERARY_MAX_QUEUE", "32")),
+            max_wait=float(os.getenv("ITINERARY_MAX_WAIT_SECONDS", "15")),
+            rate_per_minute=float(os.getenv("ITINERARY_RATE_PER_MINUTE", "6")),
+            rate_burst=float(os.getenv("ITINERARY_RATE_BURST", "3")),
+            # Job polling / progress streams are cheap and long-lived; submission is gated
+            exempt=("/api/itinerary/health", "/api/itinerary/jobs/"),
+        ),
+    ]
+
+
+def request_priority(scope) -> int:
+    path = scope["path"]
+    accept = Headers(scope=scope).get("accept", "")
+    if path.endswith("/stream") or path.endswith("/multi-day") or "text/event-stream" in accept:
+        return PRIORITY_STREAM
+    return PRIORITY_DEFAULT
+
+
+def client_key(scope) -> str:
+    key = Headers(scope=scope).get(CLIENT_KEY_HEADER)
+    if key:
+        return f"key:{key}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying AdmissionRules. Streaming responses hold their
+    slot until the last byte is sent. The matching rule is put in
+    scope["admission_rule"] so endpoints can take more slots for extra work
+    (multi-day runs several days at once). WebSockets are not gated per
+    connection (a session stays open for minutes); the endpoint admits each
+    expensive message.
+
+    Usage:
+        app.add_middleware(AdmissionMiddleware)
+    """
+
+    def __init__(self, app, rules: Optional[List[AdmissionRule]] = None):
+        self.app = app
+        self.rules = rules if rules is not None else default_rules()
+        _REGISTERED_RULES.extend(self.rules)
+
+    async def __call__(self, scope, receive, send):
+        rule = None
+        if scope["type"] == "websocket":
+            scope["admission_rule"] = next((r for r in self.rules if r.matches(scope["path"])), None)
+        elif scope["type"] == "http" and scope["method"] != "OPTIONS":
+            rule = next((r for r in self.rules if r.matches(scope["path"])), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        scope["admission_rule"] = rule
+        controller = rule.controller
+        try:
+            await rule.admit(client_key(scope), request_priority(scope))
+        except Overloaded as e:
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.monotonic() - started)
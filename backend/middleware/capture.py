@@ -0,0 +1,177 @@
+"""
+Opt-in traffic capture - anonymized request shapes and timings, one JSON line per request
+Enable with CAPTURE_TRAFFIC=true; replay with python -m scripts.replay
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers
+
+CAPTURE_TRAFFIC = os.getenv("CAPTURE_TRAFFIC", "false").lower() == "true"
+CAPTURE_PATH = os.getenv(
+    "CAPTURE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "data", "captures", "traffic.jsonl")
+)
+# Per-deployment salt so client buckets can't be reversed to IPs / API keys
+CAPTURE_SALT = os.getenv("CAPTURE_SALT", "")
+# JSON bodies larger than this are recorded without their content
+MAX_BODY_BYTES = 64 * 1024
+FLUSH_EVERY = 100
+# ...or when this long has passed since the last flush, whichever comes first
+FLUSH_SECONDS = float(os.getenv("CAPTURE_FLUSH_SECONDS", "1"))
+
+# Free text typed by users - recorded as {"$text": <token count>} only
+FREE_TEXT_FIELDS = {"search_query", "q", "prefix", "query", "names"}
+# Generated per run - the replayer substitutes its own
+RUNTIME_PATH_PARAMS = {"job_id"}
+# Other strings longer than this are treated as free text too
+MAX_PLAIN_STRING = 32
+
+
+def anonymize(value: Any, key: str = "") -> Any:
+    """Keep the request's shape and enum-like values, drop anything a user typed"""
+    if isinstance(value, dict):
+        return {k: anonymize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize(v, key) for v in value]
+    if isinstance(value, str) and (key in FREE_TEXT_FIELDS or len(value) > MAX_PLAIN_STRING):
+        return {"$text": len(value.split())}
+    return value
+
+
+def client_bucket(scope) -> str:
+    """Salted hash of the API key / IP - keeps per-client rate limits meaningful on replay"""
+    headers = Headers(scope=scope)
+    client = scope.get("client")
+    raw = headers.get("x-api-key") or (client[0] if client else "")
+    return hashlib.sha256(f"{CAPTURE_SALT}:{raw}".encode()).hexdigest()[:10]
+
+
+class TrafficLog:
+    """
+    Append-only JSONL writer shared by every request. Buffered: flushed every
+    FLUSH_EVERY lines or FLUSH_SECONDS, and on close() (app shutdown).
+    """
+
+    def __init__(self, path: str = CAPTURE_PATH):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._flushed = time.monotonic()
+        self.started = time.time()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return  # Request finishing after shutdown
+            self._file.write(line)
+            self._pending += 1
+            now = time.monotonic()
+            if self._pending >= FLUSH_EVERY or now - self._flushed >= FLUSH_SECONDS:
+                self._file.flush()
+                self._pending = 0
+                self._flushed = now
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._file.close()
+
+
+class CaptureMiddleware:
+    """
+    ASGI middleware recording every HTTP request when capture is enabled.
+    The log is flushed and closed when the app shuts down (lifespan).
+
+    Record keys: ts (epoch seconds), m (method), r (route template),
+    pp (path params), q (query params), b (JSON body), c (client bucket),
+    s (status), ms (latency to last byte), n (response bytes).
+
+    Usage:
+        app.add_middleware(CaptureMiddleware)
+    """
+
+    def __init__(self, app, enabled: bool = CAPTURE_TRAFFIC, path: str = CAPTURE_PATH):
+        self.app = app
+        self.log: Optional[TrafficLog] = TrafficLog(path) if enabled else None
+
+    async def __call__(self, scope, receive, send):
+        if self.log is not None and scope["type"] == "lifespan":
+            await self.app(scope, receive, self._closing_send(send))
+            return
+        if self.log is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        body = bytearray()
+        oversized = False
+        response = {"status": 500, "bytes": 0}
+
+        async def capture_receive():
+            nonlocal oversized
+            message = await receive()
+            if message["type"] == "http.request" and not oversized:
+                body.extend(message.get("body", b""))
+                if len(body) > MAX_BODY_BYTES:
+                    oversized = True
+                    body.clear()
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self.log.write(self._record(scope, body, oversized, response, started))
+
+    def _closing_send(self, send):
+        async def lifespan_send(message):
+            if message["type"] in ("lifespan.shutdown.complete", "lifespan.shutdown.failed"):
+                self.log.close()
+            await send(message)
+        return lifespan_send
+
+    @staticmethod
+    def _record(scope, body: bytearray, oversized: bool, response: Dict, started: float) -> Dict[str, Any]:
+        route = scope.get("route")
+        path_params = dict(scope.get("path_params") or {})
+        for name in RUNTIME_PATH_PARAMS & path_params.keys():
+            path_params[name] = None
+        record: Dict[str, Any] = {
+            "ts": round(time.time(), 3),
+            "m": scope["method"],
+            "r": getattr(route, "path_format", None) or scope["path"],
+            "c": client_bucket(scope),
+            "s": response["status"],
+            "ms": round(1000 * (time.perf_counter() - started), 2),
+            "n": response["bytes"],
+        }
+        if path_params:
+            record["pp"] = anonymize(path_params)
+        query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        if query:
+            record["q"] = anonymize(dict(query))
+        if oversized:
+            record["b"] = {"$oversized": True}
+        elif body:
+            try:
+                record["b"] = anonymize(json.loads(body))
+            except ValueError:
+                record["b"] = {"$opaque": len(body)}
+        return record
@@ -0,0 +1,198 @@
+"""
+Response compression middleware - gzip or brotli, negotiated per request
+Streams compress chunk by chunk; repeated cacheable bodies reuse compressed bytes
+"""
+
+import os
+import zlib
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is (headers would eat the saving)
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Upper bound on compressed bytes kept for reuse
+CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Live event streams must reach the client token by token
+SKIP_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding from an Accept-Encoding header ("br" > "gzip")"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    co = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return co.compress(body) + co.flush()
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._co = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._co = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush per chunk so every chunk the app yields reaches the client
+        if self.encoding == "br":
+            return self._co.process(data) + self._co.flush()
+        return self._co.compress(data) + self._co.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._co.finish()
+        return self._co.flush()
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (body digest, encoding), bounded in bytes"""
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        cached = self._items.get(key)
+        if cached is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        compressed = compress(body, encoding)
+        if len(compressed) <= self.max_bytes:
+            self._items[key] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+        return compressed
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON/text responses.
+
+    Usage:
+        app.add_middleware(CompressionMiddleware)
+    """
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE, cache_bytes: int = CACHE_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = CompressedBodyCache(cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSend(self, send, encoding, scope["method"] == "GET")
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    def __init__(self, middleware: CompressionMiddleware, send, encoding: str, cacheable_method: bool):
+        self.middleware = middleware
+        self.send = send
+        self.encoding = encoding
+        self.cacheable_method = cacheable_method
+        self.start = None
+        self.passthrough = False
+        self.stream: Optional[_StreamCompressor] = None
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        if "content-encoding" in headers or self.start["status"] in (204, 304):
+            return False
+        if content_type.startswith(SKIP_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible(MutableHeaders(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is None and not more_body:
+            # Whole body in one message
+            headers = MutableHeaders(raw=self.start["headers"])
+            if len(body) < self.middleware.minimum_size:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            cache_control = headers.get("cache-control", "")
+            if self.cacheable_method and "no-store" not in cache_control and "private" not in cache_control:
+                compressed = self.middleware.cache.get_or_compress(body, self.encoding)
+            else:
+                compressed = compress(body, self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.stream is None:
+            # Streaming body - length unknown, compress incrementally
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "content-length" in headers:
+                del headers["content-length"]
+            self.stream = _StreamCompressor(self.encoding)
+            await self.send(self.start)
+
+        data = self.stream.chunk(body) if body else b""
+        if not more_body:
+            data += self.stream.finish()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
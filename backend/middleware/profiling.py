@@ -0,0 +1,87 @@
+"""
+Opt-in request profiling - X-Profile header (with a valid X-Admin-Token) or random sampling
+Finished profiles are listed and downloaded under /api/admin/profiles
+"""
+
+import os
+import hmac
+import random
+import threading
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from services.profiler import (
+    ProfileSession, current_profile, profile_store,
+    PROFILE_SAMPLE_RATE, MODE_SAMPLE, MODE_CPROFILE
+)
+
+PROFILED_PREFIX = "/api/"
+EXCLUDED_PREFIXES = ("/api/admin",)
+
+# cProfile takes over the event loop thread, so only one such request at a time;
+# a second one falls back to sampling
+_cprofile_lock = threading.Lock()
+
+
+def requested_mode(headers: Headers) -> str:
+    """Mode asked for via X-Profile, or "" if the request did not ask (or isn't allowed to)"""
+    value = headers.get("x-profile", "").strip().lower()
+    if not value or value in ("0", "false", "off"):
+        return ""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected or not hmac.compare_digest(headers.get("x-admin-token", ""), expected):
+        return ""
+    return MODE_CPROFILE if value == MODE_CPROFILE else MODE_SAMPLE
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests. Profiled responses carry
+    an X-Profile-Id header.
+
+    Usage:
+        app.add_middleware(ProfilingMiddleware)
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(PROFILED_PREFIX) \
+                or scope["path"].startswith(EXCLUDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        mode = requested_mode(Headers(scope=scope))
+        if not mode and self.sample_rate and random.random() < self.sample_rate:
+            mode = MODE_SAMPLE
+        if not mode:
+            await self.app(scope, receive, send)
+            return
+
+        owns_cprofile = mode == MODE_CPROFILE and _cprofile_lock.acquire(blocking=False)
+        if mode == MODE_CPROFILE and not owns_cprofile:
+            mode = MODE_SAMPLE
+
+        session = ProfileSession(
+            mode, scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1")
+        )
+        status = {"code": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = session.id
+            await send(message)
+
+        token = current_profile.set(session)
+        session.attach()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            current_profile.reset(token)
+            session.finish(status["code"])
+            if owns_cprofile:
+                _cprofile_lock.release()
+            profile_store.add(session)
@@ -0,0 +1,69 @@
+"""
+Request tracing middleware - one root span per HTTP request
+Honours an incoming W3C traceparent; returns X-Trace-Id and traceparent headers
+"""
+
+import re
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from services.tracing import root_span, log
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+UNTRACED_PATHS = ("/health", "/docs", "/redoc", "/openapi.json")
+
+
+def parse_traceparent(value: str):
+    """(trace_id, parent_span_id) from a traceparent header, or (None, None)"""
+    match = TRACEPARENT.match(value.strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware wrapping each request in a root span and writing one
+    access-log line with its trace ID.
+
+    Usage:
+        app.add_middleware(TracingMiddleware)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNTRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = parse_traceparent(Headers(scope=scope).get("traceparent", ""))
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        with root_span(
+            f"{scope['method']} {scope['path']}", trace_id, parent_id,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        ) as root:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    status["code"] = message["status"]
+                    root.set("http.status_code", message["status"])
+                    # Handler + model building + serialization, before any body streaming
+                    root.set("time_to_headers_ms", round(1000 * (time.perf_counter() - started), 3))
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Trace-Id"] = root.trace_id
+                    headers["traceparent"] = f"00-{root.trace_id}-{root.span_id}-01"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                if status["code"] >= 500:
+                    root.status = "error"
+                log(
+                    f"{scope['method']} {scope['path']} {status['code']}",
+                    f"{1000 * (time.perf_counter() - started):.1f}ms"
+                )
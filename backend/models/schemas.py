@@ -3,7 +3,7 @@ Pydantic schemas for request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Dict, Any
 from enum import Enum
 
 
@@ -38,6 +38,12 @@ class AccessibilityPreference(str, Enum):
     NO_PREFERENCE = "No preference"
 
 
+class SearchMode(str, Enum):
+    KEYWORD = "keyword"
+    SEMANTIC = "semantic"
+    HYBRID = "hybrid"
+
+
 # ========== REQUEST MODELS ==========
 
 class SearchRequest(BaseModel):
@@ -48,6 +54,11 @@ class SearchRequest(BaseModel):
     accessibility: AccessibilityPreference = AccessibilityPreference.NO_PREFERENCE
     search_query: str = ""
     filter_open_now: bool = False
+    region: Optional[str] = None  # Regional shard, e.g. "klang-valley" (None = all)
+    mode: SearchMode = SearchMode.KEYWORD
+    limit: Optional[int] = Field(None, ge=1, le=500)  # Ranked modes default to 20
+    include_facets: bool = False  # Add per-filter result counts to the response
+    stream: bool = False  # Chunked, incrementally encoded response
 
     class Config:
         use_enum_values = True
@@ -64,6 +75,12 @@ class ItineraryRequest(BaseModel):
         use_enum_values = True
 
 
+class MultiDayItineraryRequest(ItineraryRequest):
+    """Request model for multi-day itinerary generation (same start time each day)"""
+    days: int = Field(3, ge=1, le=7)
+    region: Optional[str] = None  # Regional shard to draw places from (default: klang-valley)
+
+
 class UserProfile(BaseModel):
     """User profile for recommendations"""
     dietary: DietaryPreference = DietaryPreference.NO_PREFERENCE
@@ -79,6 +96,7 @@ class RecommendationsRequest(BaseModel):
     user_profile: UserProfile
     current_time: Optional[str] = Field(None, pattern=r"^\d{2}:\d{2}$")
     top_n: int = Field(5, ge=1, le=20)
+    region: Optional[str] = None
 
 
 # ========== RESPONSE MODELS ==========
@@ -88,6 +106,7 @@ class PlaceResponse(BaseModel):
     name: str
     type: str
     image_url: Optional[str] = None  # GitHub raw URL
+    thumbnail_urls: Optional[Dict[str, str]] = None  # size (sm/md/lg) -> /api/images URL
     category: Optional[str] = None
     cuisine: Optional[str] = None
     price_range: Optional[str] = None
@@ -103,6 +122,8 @@ class PlaceResponse(BaseModel):
     famous_for: Optional[str] = None
     ticket_price: Optional[str] = None
     reasoning: Optional[str] = None  # For recommendations
+    region: Optional[str] = None  # Regional shard the place was served from
+    relevance: Optional[float] = None  # Semantic / hybrid search score
 
 
 class ItineraryActivity(BaseModel):
@@ -113,6 +134,7 @@ class ItineraryActivity(BaseModel):
     reasoning: Optional[str] = None
     # Enriched fields (looked up from CSV after RAG)
     image_url: Optional[str] = None
+    thumbnail_urls: Optional[Dict[str, str]] = None
     address: Optional[str] = None
     opening_hours: Optional[str] = None
     price_range: Optional[str] = None
@@ -120,6 +142,7 @@ class ItineraryActivity(BaseModel):
     description: Optional[str] = None
     accessibility_info: Optional[str] = None
     how_to_get_there: Optional[str] = None
+    travel_minutes: Optional[int] = None  # From previous stop (local travel-time matrix)
 
 
 class ReasoningChain(BaseModel):
@@ -141,12 +164,22 @@ class ReasoningChain(BaseModel):
     step8_final: Optional[str] = None
 
 
+class ItineraryRepair(BaseModel):
+    """One activity the local validator replaced (or could not fix)"""
+    time: Optional[str] = None
+    original_place: Optional[str] = None
+    replacement_place: Optional[str] = None  # None = no valid substitute, kept as is
+    reasons: List[str] = []
+
+
 class ItineraryResponse(BaseModel):
     """Response model for generated itinerary"""
     itinerary: List[ItineraryActivity]
     summary: Optional[str] = None  # Made Optional because router doesn't return it
     transport_notes: Optional[str] = None
     reasoning_chain: ReasoningChain
+    route_issues: List[str] = []  # Infeasible legs / closed places found by the local optimizer
+    repairs: List[ItineraryRepair] = []  # Activities swapped by the local validator
 
 
 class SearchResponse(BaseModel):
@@ -154,9 +187,116 @@ class SearchResponse(BaseModel):
     results: List[PlaceResponse]
     total_count: int
     filters_applied: dict
+    facets: Optional[Dict[str, Dict[str, int]]] = None  # dimension -> option -> count
+
+
+class SearchBatchRequest(BaseModel):
+    """Several searches evaluated together (e.g. one per category tab)"""
+    queries: List[SearchRequest] = Field(..., min_length=1, max_length=20)
+
+
+class SearchBatchResponse(BaseModel):
+    """One SearchResponse per query, in request order"""
+    responses: List[SearchResponse]
+
+
+class PlaceLookupRequest(BaseModel):
+    """Resolve many place names (exact, then substring match) in one call"""
+    names: List[str] = Field(..., min_length=1, max_length=200)
+    region: Optional[str] = None
+    current_time: Optional[str] = Field(None, pattern=r"^\d{2}:\d{2}$")
+
+
+class PlaceLookupResult(BaseModel):
+    query: str
+    place: Optional[PlaceResponse] = None  # None when nothing matched
+
+
+class PlaceLookupResponse(BaseModel):
+    """Lookup results in request order"""
+    results: List[PlaceLookupResult]
+    found_count: int
+
+
+class PlaceEvent(BaseModel):
+    """Client-side interaction with a place (feeds popularity ranking)"""
+    name: str = Field(..., min_length=1)
+    kind: Literal["view", "click"] = "click"  # click = chosen from search results
+
+
+class PlaceEventsRequest(BaseModel):
+    events: List[PlaceEvent] = Field(..., min_length=1, max_length=100)
+    region: Optional[str] = None
+
+
+class PlaceEventsResponse(BaseModel):
+    recorded: int  # Events whose place name was found
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobProgress(BaseModel):
+    """TripPlanner step the job is currently generating"""
+    current_step: Optional[str] = None
+    steps_done: int = 0
+    steps_total: int = 8
+
+
+class ItineraryJobResponse(BaseModel):
+    """Background itinerary job (result is the /stream 'complete' payload)"""
+    job_id: str
+    status: JobStatus
+    created_at: float
+    updated_at: float
+    progress: JobProgress
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attached: bool = False  # True when an identical in-flight job was reused
+
+    class Config:
+        use_enum_values = True
+
+
+class Suggestion(BaseModel):
+    """Single typeahead completion"""
+    text: str
+    type: Literal["name", "cuisine", "category", "dish"]
+    count: int  # Number of places behind this suggestion
+
+
+class SuggestResponse(BaseModel):
+    """Response model for typeahead suggestions"""
+    query: str
+    suggestions: List[Suggestion]
 
 
 class RecommendationsResponse(BaseModel):
     """Response model for recommendations"""
     recommendations: List[PlaceResponse]
-    generated_at: str
\ No newline at end of file
+    generated_at: str
+
+class PlaceIngestRequest(BaseModel):
+    """
+    Admin batch of catalog changes. Upsert rows use the CSV column names
+    (Name, Type, Opening_Hours, ...); only the columns given are changed and
+    null clears one. Deletes are place names.
+    """
+    upserts: List[Dict[str, Optional[str]]] = Field(default_factory=list, max_length=1000)
+    deletes: List[str] = Field(default_factory=list, max_length=1000)
+    region: Optional[str] = None
+
+
+class PlaceIngestResponse(BaseModel):
+    """What the batch changed and how much of the log is still uncompacted"""
+    region: str
+    inserted: int
+    updated: int
+    deleted: int
+    missing: List[str]  # Delete names that matched no place
+    rows: int
+    log_ops: int
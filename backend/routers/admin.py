@@ -0,0 +1,124 @@
+"""
+Operator endpoints - runtime metrics, guarded by the X-Admin-Token header
+Disabled (404) unless ADMIN_TOKEN is set
+"""
+
+import os
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from models.schemas import PlaceIngestRequest, PlaceIngestResponse
+from services.executor import cpu_executor
+from services.ingest import compact, ingest_places, ingest_status
+from services.itinerary_cache import itinerary_cache, prefetcher
+from services.jamai_client import jamai_client
+from services.memory import memory_report
+from services.popularity import popularity
+from services.profiler import profile_store
+from middleware.admission import admission_snapshot
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/executor")
+async def executor_metrics():
+    """Queue depth, wait and run times of the CPU executor pools"""
+    return cpu_executor.snapshot()
+
+
+@router.get("/admission")
+async def admission_metrics():
+    """Active / queued / rejected counts per admission-controlled route"""
+    return admission_snapshot()
+
+
+@router.post("/places", response_model=PlaceIngestResponse)
+async def ingest_place_changes(request: PlaceIngestRequest):
+    """Upsert / delete places; visible to the next request, no reload needed"""
+    try:
+        return await cpu_executor.run(
+            ingest_places, request.upserts, request.deletes, request.region, process_ok=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/places/compact")
+async def compact_place_log(region: Optional[str] = Query(None)):
+    """Write the live catalog as the region's snapshot and truncate its ingest log"""
+    try:
+        return await cpu_executor.run(compact, region, process_ok=False)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/ingest")
+async def ingest_metrics():
+    """Ingest log sequence, uncompacted operations and last compaction per region"""
+    return ingest_status()
+
+
+@router.get("/jamai")
+async def jamai_metrics():
+    """Hedging counters and current hedge delay per Action Table"""
+    return jamai_client.hedger.snapshot()
+
+
+@router.get("/prefetch")
+async def prefetch_metrics():
+    """Itinerary cache hit rates and what the speculative prefetcher did"""
+    return {"cache": itinerary_cache.snapshot(), "prefetch": prefetcher.snapshot()}
+
+
+@router.get("/popularity")
+async def popularity_metrics(limit: int = Query(20, ge=1, le=256)):
+    """Event totals and the currently most popular places (decayed weights)"""
+    return popularity.stats(limit)
+
+
+@router.get("/memory")
+async def memory_metrics():
+    """Approximate bytes per place snapshot structure (records, indexes, DataFrame) and per cache"""
+    # Walks this process's objects - a thread, never the process pool
+    return await cpu_executor.run(memory_report, process_ok=False)
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Recently captured request profiles, newest first"""
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("collapsed", description="collapsed (flamegraph.pl / speedscope) or pstats")
+):
+    """One captured profile as collapsed stacks or a marshalled pstats file"""
+    session = profile_store.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found (expired from the buffer?)")
+    if format not in session.formats():
+        raise HTTPException(
+            status_code=400,
+            detail=f"{session.mode} profiles are available as: {', '.join(session.formats())}"
+        )
+    if format == "pstats":
+        return Response(
+            session.pstats_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'}
+        )
+    return PlainTextResponse(session.collapsed())
@@ -0,0 +1,49 @@
+"""
+Thumbnail image endpoint router
+Serves prebuilt resized variants of place images with long-lived cache headers
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import FileResponse
+
+from services.images import resolve_thumbnail, THUMB_WIDTHS
+
+router = APIRouter(prefix="/api/images", tags=["Images"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Unversioned URLs may change on the next thumbnail build
+REVALIDATE = "public, max-age=3600"
+
+
+@router.get("/{place}/{size}")
+async def get_thumbnail(
+    place: str,
+    size: str,
+    v: Optional[str] = Query(None, description="Content version from thumbnail_urls"),
+    accept: str = Header("")
+):
+    """
+    Resized place image. `size` is one of sm/md/lg (160/320/640 px wide).
+    WebP when the client sends Accept: image/webp, otherwise JPEG.
+    Use the URLs in `thumbnail_urls` - they carry ?v= and are cached forever.
+    """
+    if size not in THUMB_WIDTHS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown size '{size}'. Use: {', '.join(THUMB_WIDTHS)}"
+        )
+    found = resolve_thumbnail(place, size, accept)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No thumbnail for '{place}'")
+
+    path, media_type, version = found
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={
+            "Cache-Control": IMMUTABLE if v == version else REVALIDATE,
+            "Vary": "Accept",
+        }
+    )
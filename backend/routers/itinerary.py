@@ -4,19 +4,32 @@ Uses JamAI Base Action Table for RAG + multi-step reasoning
 ENRICHES results with full place data (including images) from local CSV
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 import json
+import time
+import asyncio
 from typing import AsyncGenerator
 
+from middleware.admission import Overloaded, client_key
 from models.schemas import (
     ItineraryRequest, 
+    MultiDayItineraryRequest,
     ItineraryResponse, 
     ItineraryActivity, 
-    ReasoningChain
+    ReasoningChain,
+    ItineraryJobResponse
 )
 from services.jamai_client import jamai_client
-from services.utils import enrich_itinerary_activity
+from services.itinerary_cache import itinerary_cache, itinerary_key, prefetcher
+from services.tracing import start_span
+from services.itinerary_validator import finalize_itinerary
+from services.itinerary_session import ItinerarySession
+from services.multi_day import generate_days
+from services.jobs import job_store, JobQueueFull, SUCCEEDED, FAILED
+
+# Seconds between job state checks on the progress stream
+JOB_EVENT_POLL_SECONDS = 0.25
 
 router = APIRouter(prefix="/api/itinerary", tags=["TripPlanner"])
 
@@ -37,19 +50,36 @@ async def generate_itinerary(request: ItineraryRequest):
     **Knowledge Table:** PlacesKB (33 Malaysian places)
     """
     try:
-        # Step 1: Call JamAI Action Table (returns place names + reasoning)
-        result = jamai_client.generate_itinerary(
+        # Step 1: Call JamAI Action Table (returns place names + reasoning), unless
+        # the same request - or a prefetch of it - is cached (ITINERARY_CACHE_TTL_SECONDS)
+        # Blocking client - run off the event loop so search stays responsive
+        params = dict(
             start_time=request.start_time,
             dietary=request.dietary,
             transport=request.transport,
             accessibility=request.accessibility,
-            stream=False
+        )
+        prefetcher.record_request(**params)
+        result = await asyncio.to_thread(
+            itinerary_cache.get_or_generate,
+            itinerary_key(**params),
+            lambda: jamai_client.generate_itinerary(**params, stream=False)
+        )
+        
+        # Step 2: Repair invalid picks locally (closed / non-halal / inaccessible /
+        # unknown places), ENRICH with full data from CSV (including images!),
+        # then reorder / validate legs against the travel-time matrix
+        routed_activities, route_issues, repairs = finalize_itinerary(
+            result.get("itinerary", []),
+            request.dietary,
+            request.transport,
+            request.accessibility
         )
         
-        # Step 2: ENRICH each activity with full data from CSV (including images!)
+        # Pydantic model building (serialization is in the root span's time_to_headers_ms)
+        build_span = start_span("itinerary.build_response", activities=len(routed_activities))
         itinerary_activities = []
-        for activity in result.get("itinerary", []):
-            enriched = enrich_itinerary_activity(activity)
+        for enriched in routed_activities:
             itinerary_activities.append(ItineraryActivity(
                 time=enriched.get("time", ""),
                 place=enriched.get("place", ""),
@@ -57,6 +87,7 @@ async def generate_itinerary(request: ItineraryRequest):
                 reasoning=enriched.get("reasoning", ""),
                 # Enriched fields from CSV lookup
                 image_url=enriched.get("image_url"),
+                thumbnail_urls=enriched.get("thumbnail_urls"),
                 address=enriched.get("address"),
                 opening_hours=enriched.get("opening_hours"),
                 price_range=enriched.get("price_range"),
@@ -64,6 +95,7 @@ async def generate_itinerary(request: ItineraryRequest):
                 description=enriched.get("description"),
                 accessibility_info=enriched.get("accessibility_info"),
                 how_to_get_there=enriched.get("how_to_get_there"),
+                travel_minutes=enriched.get("travel_minutes"),
             ))
         
         # Format reasoning chain (for judges to see)
@@ -78,11 +110,15 @@ async def generate_itinerary(request: ItineraryRequest):
             step8_final=result["reasoning_chain"].get("step8_final", "")
         )
         
-        return ItineraryResponse(
+        response = ItineraryResponse(
             itinerary=itinerary_activities,
             transport_notes=result.get("transport_notes", ""),
-            reasoning_chain=reasoning
+            reasoning_chain=reasoning,
+            route_issues=route_issues,
+            repairs=repairs
         )
+        build_span.end()
+        return response
         
     except RuntimeError as e:
         # JamAI client not configured
@@ -112,7 +148,8 @@ async def generate_itinerary_stream(request: ItineraryRequest):
             accumulated[col_name] = accumulated.get(col_name, "") + text
         
         try:
-            result = jamai_client.generate_itinerary_streaming(
+            result = await asyncio.to_thread(
+                jamai_client.generate_itinerary_streaming,
                 start_time=request.start_time,
                 dietary=request.dietary,
                 transport=request.transport,
@@ -120,12 +157,13 @@ async def generate_itinerary_stream(request: ItineraryRequest):
                 on_chunk=on_chunk
             )
             
-            # Enrich before sending
-            enriched_itinerary = [
-                enrich_itinerary_activity(act) 
-                for act in result.get("itinerary", [])
-            ]
-            result["itinerary"] = enriched_itinerary
+            # Repair + enrich before sending
+            result["itinerary"], result["route_issues"], result["repairs"] = finalize_itinerary(
+                result.get("itinerary", []),
+                request.dietary,
+                request.transport,
+                request.accessibility
+            )
             
             # Send final result
             yield f"data: {json.dumps({'type': 'complete', 'data': result})}\n\n"
@@ -139,6 +177,180 @@ async def generate_itinerary_stream(request: ItineraryRequest):
     )
 
 
+@router.post("/multi-day")
+async def generate_multi_day_itinerary(request: MultiDayItineraryRequest, http_request: Request):
+    """
+    Generate a multi-day trip: one TripPlanner run per day, run concurrently.
+    
+    Each day gets a disjoint slice of the candidate places, so nothing repeats.
+    Returns Server-Sent Events as each day finishes (not necessarily in order):
+    {"type": "day", "day": 2, "data": {...}} / {"type": "error", "day": 2, ...},
+    then {"type": "complete", "days": N}.
+    """
+    try:
+        day_results = generate_days(
+            days=request.days,
+            start_time=request.start_time,
+            dietary=request.dietary,
+            transport=request.transport,
+            accessibility=request.accessibility,
+            region=request.region,
+            # Days beyond the first take their own admission slots
+            admission=getattr(http_request.scope.get("admission_rule"), "controller", None)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"JamAI service unavailable: {str(e)}"
+        )
+    
+    async def event_generator() -> AsyncGenerator[str, None]:
+        async for day, result, error in day_results:
+            if error:
+                yield f"data: {json.dumps({'type': 'error', 'day': day, 'message': error})}\n\n"
+            else:
+                yield f"data: {json.dumps({'type': 'day', 'day': day, 'data': result})}\n\n"
+        yield f"data: {json.dumps({'type': 'complete', 'days': request.days})}\n\n"
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream"
+    )
+
+
+@router.post("/jobs", response_model=ItineraryJobResponse, status_code=202)
+async def submit_itinerary_job(request: ItineraryRequest, response: Response):
+    """
+    Start itinerary generation in the background and return a job ID at once.
+    
+    Poll GET /api/itinerary/jobs/{job_id} or subscribe to .../events (SSE).
+    Submitting the same request while it is still running (or recently
+    finished) returns the existing job instead of starting a new one.
+    """
+    try:
+        job, attached = job_store.submit(request.model_dump())
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"JamAI service unavailable: {str(e)}"
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    
+    response.headers["Location"] = f"/api/itinerary/jobs/{job.id}"
+    return ItineraryJobResponse(**job.to_dict(), attached=attached)
+
+
+@router.get("/jobs/{job_id}", response_model=ItineraryJobResponse)
+async def get_itinerary_job(job_id: str):
+    """Job status, progress and (once succeeded) the itinerary"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return ItineraryJobResponse(**job.to_dict())
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_itinerary_job(job_id: str):
+    """
+    Server-Sent Events for a job:
+    {"type": "progress", ...} on every step change, then
+    {"type": "complete", "data": {...}} or {"type": "error", "message": "..."}.
+    Reconnecting is safe - the current state is sent first.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    async def event_generator() -> AsyncGenerator[str, None]:
+        seen = -1
+        while True:
+            if job.version != seen:
+                seen = job.version
+                if job.status == SUCCEEDED:
+                    yield f"data: {json.dumps({'type': 'complete', 'data': job.result})}\n\n"
+                    return
+                if job.status == FAILED:
+                    yield f"data: {json.dumps({'type': 'error', 'message': job.error})}\n\n"
+                    return
+                yield f"data: {json.dumps({'type': 'progress', 'status': job.status, **job.progress()})}\n\n"
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream"
+    )
+
+
+@router.websocket("/session")
+async def itinerary_session(websocket: WebSocket):
+    """
+    Interactive editing of one itinerary over a WebSocket.
+
+    Client sends {"type": "start", "itinerary": [...], "start_time", "dietary",
+    "transport", "accessibility"} and gets {"type": "state", ...} back; then
+    {"type": "edit", "id": 1, "op": "replace_slot" | "shift_start" | "set_constraint", ...}
+    and gets {"type": "delta", "id": 1, "changes": [{"slot", "activity"}], ...}
+    with only the slots that changed. Bad messages get {"type": "error", "id", "detail"}
+    and leave the itinerary as it was. Edits with "ai": true call JamAI, so each
+    one is admitted like an /api/itinerary request (429/503 come back as errors
+    with "retry_after").
+    """
+    await websocket.accept()
+    rule = websocket.scope.get("admission_rule")
+    session = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            msg_id = None
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+                msg_id = message.get("id")
+                if message.get("type") == "start":
+                    session = ItinerarySession(
+                        message.get("itinerary") or [],
+                        message.get("start_time", "09:00"),
+                        message.get("dietary", "No preference"),
+                        message.get("transport", "Public transport"),
+                        message.get("accessibility", "No preference"),
+                        region=message.get("region"),
+                        jamai=jamai_client
+                    )
+                    await websocket.send_json({"type": "state", "id": msg_id, **session.state()})
+                elif message.get("type") == "edit":
+                    if session is None:
+                        raise ValueError("Send a start message first")
+                    # Local recomputation is milliseconds; an "ai" slot pick blocks on JamAI
+                    if message.get("ai") and rule is not None:
+                        await rule.admit(client_key(websocket.scope))
+                        started = time.monotonic()
+                        try:
+                            delta = await asyncio.to_thread(session.apply, message)
+                        finally:
+                            rule.controller.release(time.monotonic() - started)
+                    else:
+                        delta = await asyncio.to_thread(session.apply, message)
+                    await websocket.send_json({"type": "delta", "id": msg_id, **delta})
+                else:
+                    raise ValueError("type must be 'start' or 'edit'")
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "id": msg_id, "detail": str(e)})
+            except Overloaded as e:
+                await websocket.send_json({
+                    "type": "error", "id": msg_id, "detail": e.detail,
+                    "status": e.status_code, "retry_after": e.retry_after
+                })
+            except Exception as e:
+                # One bad message must not end the session; apply() has rolled back
+                await websocket.send_json({"type": "error", "id": msg_id, "detail": f"Failed to apply message: {str(e)}"})
+    except WebSocketDisconnect:
+        pass
+
+
 @router.get("/health")
 async def health_check():
     """Check if JamAI connection is working"""
@@ -0,0 +1,69 @@
+"""
+Place lookup endpoint router
+"""
+
+from fastapi import APIRouter, HTTPException
+
+from models.schemas import PlaceLookupRequest, PlaceLookupResponse, PlaceLookupResult, PlaceResponse
+from models.schemas import PlaceEventsRequest, PlaceEventsResponse
+from services.place_store import find_places
+from services.popularity import popularity
+from services.executor import cpu_executor, DeadlineExceeded
+
+router = APIRouter(prefix="/api/places", tags=["Places"])
+
+
+def _lookup(request: PlaceLookupRequest) -> PlaceLookupResponse:
+    results = []
+    for name, match in zip(request.names, find_places(request.names, request.region)):
+        place = None
+        if match is not None:
+            store, row_id = match
+            place = PlaceResponse(**store.to_response(row_id, request.current_time))
+        results.append(PlaceLookupResult(query=name, place=place))
+    return PlaceLookupResponse(
+        results=results,
+        found_count=sum(1 for r in results if r.place is not None)
+    )
+
+
+@router.post("/lookup", response_model=PlaceLookupResponse)
+async def lookup_places(request: PlaceLookupRequest):
+    """
+    Resolve up to 200 place names to full records in one pass.
+    Same matching as itinerary enrichment: exact (case-insensitive) name first,
+    then first substring match. Results are in request order.
+    """
+    try:
+        response = await cpu_executor.run(_lookup, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    # Recorded here, not in _lookup - that may run in a worker process
+    for result in response.results:
+        if result.place is not None:
+            popularity.record(result.place.region, result.place.name.lower().strip(), "view")
+    return response
+
+
+@router.post("/events", response_model=PlaceEventsResponse)
+async def record_place_events(request: PlaceEventsRequest):
+    """
+    Report views / search-result clicks so recommendations can rank what is
+    popular right now. Unknown names are ignored.
+    """
+    try:
+        matches = await cpu_executor.run(
+            find_places, [event.name for event in request.events], request.region, process_ok=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    recorded = 0
+    for event, match in zip(request.events, matches):
+        recorded += popularity.record_matches([match], event.kind)
+    return PlaceEventsResponse(recorded=recorded)
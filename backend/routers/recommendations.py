@@ -2,11 +2,15 @@
 Recommendations endpoint router
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from typing import Optional
 from datetime import datetime
 from models.schemas import SearchRequest, SearchResponse, PlaceResponse
 from models.schemas import RecommendationsRequest, RecommendationsResponse
 from services.recommendations import get_recommendations
+from services.popularity import popularity
+from services.itinerary_cache import prefetcher
+from services.executor import cpu_executor, DeadlineExceeded
 
 router = APIRouter(prefix="/api/recommendations", tags=["Recommendations"])
 
@@ -19,11 +23,23 @@ async def recommendations(request: RecommendationsRequest):
     Uses logic-based filtering and scoring (NOT AI) for fast response.
     Returns places matching user preferences with reasoning.
     """
-    results = get_recommendations(
-        user_profile=request.user_profile.model_dump(),
-        current_time=request.current_time,
-        top_n=request.top_n
-    )
+    try:
+        results = await cpu_executor.run(
+            get_recommendations,
+            user_profile=request.user_profile.model_dump(),
+            current_time=request.current_time,
+            top_n=request.top_n,
+            region=request.region,
+            trending=popularity.snapshot()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    
+    # Same profile usually asks for an itinerary next - warm the cache (ITINERARY_PREFETCH)
+    profile = request.user_profile
+    prefetcher.observe((profile.dietary, profile.transport, profile.accessibility))
     
     return RecommendationsResponse(
         recommendations=[PlaceResponse(**r) for r in results],
@@ -35,20 +51,31 @@ async def recommendations(request: RecommendationsRequest):
 async def quick_recommendations(
     dietary: str = "No preference",
     accessibility: str = "No preference",
-    top_n: int = 5
+    top_n: int = 5,
+    region: Optional[str] = None
 ):
     """
     Quick recommendations with minimal params.
     Useful for initial home page load.
     """
-    results = get_recommendations(
-        user_profile={
-            "dietary": dietary,
-            "accessibility": accessibility,
-            "transport": "Public transport"
-        },
-        top_n=top_n
-    )
+    try:
+        results = await cpu_executor.run(
+            get_recommendations,
+            user_profile={
+                "dietary": dietary,
+                "accessibility": accessibility,
+                "transport": "Public transport"
+            },
+            top_n=top_n,
+            region=region,
+            trending=popularity.snapshot()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    
+    prefetcher.observe((dietary, "Public transport", accessibility))
     
     return {
         "recommendations": results,
@@ -2,13 +2,79 @@
 Search endpoint router
 """
 
-from fastapi import APIRouter, Query
-from typing import Optional
-from models.schemas import SearchRequest, SearchResponse, PlaceResponse
-from services.search_feature import search_places
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional, Dict, Any
+from models.schemas import (
+    SearchRequest, SearchResponse, PlaceResponse, SearchMode, SuggestResponse,
+    SearchBatchRequest, SearchBatchResponse
+)
+from services.search_feature import search_places, facet_counts, iter_search_results, search_batch
+from services.suggest import suggest as suggest_completions
+from services.json_stream import iter_json_object
+from services.executor import cpu_executor, DeadlineExceeded
+from services.tracing import log
 
 router = APIRouter(prefix="/api/search", tags=["Search"])
 
+# Optional PlaceResponse fields the store dicts leave out (reasoning, relevance, ...)
+PLACE_DEFAULTS = {
+    name: field.default
+    for name, field in PlaceResponse.model_fields.items()
+    if not field.is_required()
+}
+
+
+def _facets(filters: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    # Ranked modes don't substring-filter on the query, so neither do their counts
+    return facet_counts(
+        place_type=filters["place_type"],
+        price_range=filters["price_range"],
+        halal_status=filters["halal_status"],
+        accessibility=filters["accessibility"],
+        search_query=filters["search_query"] if filters["mode"] == SearchMode.KEYWORD.value else "",
+        filter_open_now=filters["filter_open_now"],
+        region=filters["region"]
+    )
+
+
+def _search_response(filters: Dict[str, Any], filters_applied: Dict, include_facets: bool) -> SearchResponse:
+    """Whole search + response build - CPU-bound, run on the executor"""
+    results = search_places(**filters)
+    return SearchResponse(
+        results=[PlaceResponse(**r) for r in results],
+        total_count=len(results),
+        filters_applied=filters_applied,
+        facets=_facets(filters) if include_facets else None
+    )
+
+
+async def _run_search(filters: Dict[str, Any], filters_applied: Dict, include_facets: bool, stream: bool):
+    try:
+        if not stream:
+            return await cpu_executor.run(_search_response, filters, filters_applied, include_facets)
+        
+        # SearchResponse written incrementally - results are encoded a chunk at a
+        # time (in Starlette's threadpool), so memory stays flat however many match
+        total, chunks = await cpu_executor.run(iter_search_results, process_ok=False, **filters)
+        facets = await cpu_executor.run(_facets, filters) if include_facets else None
+        return StreamingResponse(
+            iter_json_object(
+                "results",
+                chunks,
+                {"total_count": total, "filters_applied": filters_applied, "facets": facets},
+                row_defaults=PLACE_DEFAULTS
+            ),
+            media_type="application/json"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        log("Error in search endpoint:", e)
+        raise e
+
 
 @router.get("", response_model=SearchResponse)
 async def search(
@@ -17,33 +83,35 @@ async def search(
     halal_status: str = Query("No preference"),
     accessibility: str = Query("No preference"),
     search_query: str = Query(""),
-    filter_open_now: bool = Query(False)
+    filter_open_now: bool = Query(False),
+    region: Optional[str] = Query(None),
+    mode: SearchMode = Query(SearchMode.KEYWORD),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    include_facets: bool = Query(False),
+    stream: bool = Query(False, description="Encode results incrementally (chunked)")
 ):
-    try:
-        results = search_places(
-            place_type=place_type,
-            price_range=price_range,
-            halal_status=halal_status,
-            accessibility=accessibility,
-            search_query=search_query,
-            filter_open_now=filter_open_now
-        )
-        return SearchResponse(
-            results=[PlaceResponse(**r) for r in results],
-            total_count=len(results),
-            filters_applied={
-                "place_type": place_type,
-                "price_range": price_range,
-                "halal_status": halal_status,
-                "accessibility": accessibility,
-                "search_query": search_query,
-                "filter_open_now": filter_open_now
-            }
-        )
-    except Exception as e:
-        print("Error in search endpoint:", e)
-        raise e
-
+    filters = dict(
+        place_type=place_type,
+        price_range=price_range,
+        halal_status=halal_status,
+        accessibility=accessibility,
+        search_query=search_query,
+        filter_open_now=filter_open_now,
+        region=region,
+        mode=mode.value,
+        limit=limit
+    )
+    filters_applied = {
+        "place_type": place_type,
+        "price_range": price_range,
+        "halal_status": halal_status,
+        "accessibility": accessibility,
+        "search_query": search_query,
+        "filter_open_now": filter_open_now,
+        "region": region,
+        "mode": mode.value
+    }
+    return await _run_search(filters, filters_applied, include_facets, stream)
 
 
 @router.post("", response_model=SearchResponse)
@@ -52,17 +120,62 @@ async def search_post(request: SearchRequest):
     Search with POST body (alternative to query params).
     Useful for complex filter combinations.
     """
-    results = search_places(
+    filters = dict(
         place_type=request.place_type,
         price_range=request.price_range,
         halal_status=request.halal_status,
         accessibility=request.accessibility,
         search_query=request.search_query,
-        filter_open_now=request.filter_open_now
+        filter_open_now=request.filter_open_now,
+        region=request.region,
+        mode=request.mode,
+        limit=request.limit
     )
+    return await _run_search(filters, request.model_dump(), request.include_facets, request.stream)
+
+
+def _batch_response(request: SearchBatchRequest) -> SearchBatchResponse:
+    queries = [query.model_dump(exclude={"stream"}) for query in request.queries]
+    responses = []
+    for query, (results, facets) in zip(request.queries, search_batch(queries)):
+        responses.append(SearchResponse(
+            results=[PlaceResponse(**r) for r in results],
+            total_count=len(results),
+            filters_applied=query.model_dump(),
+            facets=facets
+        ))
+    return SearchBatchResponse(responses=responses)
+
+
+@router.post("/batch", response_model=SearchBatchResponse)
+async def search_batch_post(request: SearchBatchRequest):
+    """
+    Run up to 20 searches in one request against the same data snapshot.
+    Responses come back in request order; identical queries are computed once.
+    """
+    try:
+        return await cpu_executor.run(_batch_response, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query("", max_length=100),
+    limit: int = Query(8, ge=1, le=50),
+    types: Optional[str] = Query(None, description="Comma-separated: name,cuisine,category,dish"),
+    region: Optional[str] = Query(None)
+):
+    """
+    Typeahead completions for the search box.
+    Backed by a per-snapshot prefix index - cheap enough to call on every keystroke.
+    """
+    kinds = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    try:
+        results = suggest_completions(q, limit=limit, kinds=kinds, region=region)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return SearchResponse(
-        results=[PlaceResponse(**r) for r in results],
-        total_count=len(results),
-        filters_applied=request.model_dump()
-    )
\ No newline at end of file
+    return SuggestResponse(query=q, suggestions=results)
@@ -0,0 +1,22 @@
+"""
+Prebuild semantic search vectors for every configured region
+
+Run from backend/: python -m scripts.build_semantic_index
+Writes data/index/<region>-<fingerprint>.{vectors.npy,model.npz}; the API
+memory-maps these on first semantic/hybrid search instead of building them.
+"""
+
+import time
+
+from services.place_store import get_place_store
+from services.semantic_index import get_semantic_index
+from services.utils import list_regions
+
+
+if __name__ == "__main__":
+    for region in list_regions():
+        started = time.perf_counter()
+        store = get_place_store(region)
+        index = get_semantic_index(store)
+        ann = f"IVF {len(index.centroids)} lists" if index.centroids is not None else "exact scan"
+        print(f"✅ {region}: {len(store):,} places, {ann}, {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,40 @@
+"""
+Render thumbnails for every place image
+
+Run from backend/: python -m scripts.build_thumbnails
+Writes data/thumbnails/<key>-<size>-<hash>.{webp,jpg} plus manifest.json,
+which /api/images and the thumbnail_urls response field read.
+"""
+
+import os
+import time
+
+from services.images import IMAGES_DIR, THUMB_DIR, build_thumbnails, image_key
+from services.place_store import get_place_store
+from services.utils import list_regions
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    # Originals on disk, keyed the same way as the image_url filenames
+    originals = {
+        image_key(f): os.path.join(IMAGES_DIR, f)
+        for f in sorted(os.listdir(IMAGES_DIR))
+    }
+
+    sources, missing = [], set()
+    for region in list_regions():
+        for record in get_place_store(region).records:
+            key = image_key(record.image_url)
+            if key in originals:
+                sources.append(originals[key])
+            elif key:
+                missing.add(key)
+
+    manifest = build_thumbnails(dict.fromkeys(sources))
+    original_bytes = sum(os.path.getsize(os.path.join(IMAGES_DIR, e["source"])) for e in manifest.values())
+    md_bytes = sum(os.path.getsize(os.path.join(THUMB_DIR, e["variants"]["md"]["webp"])) for e in manifest.values())
+    print(f"✅ {len(manifest)} images -> {THUMB_DIR} in {time.perf_counter() - started:.1f}s")
+    print(f"   originals {original_bytes / 1024:,.0f} KB, md webp {md_bytes / 1024:,.0f} KB")
+    for key in sorted(missing):
+        print(f"   ⚠️ no local original for {key}")
@@ -0,0 +1,16 @@
+"""
+Precompute the place-to-place travel-time matrix
+
+Run from backend/: python -m scripts.build_travel_matrix
+Reads data/place_coordinates.csv, writes data/travel_times.npz
+"""
+
+import pandas as pd
+
+from services.routing import COORDS_PATH, MATRIX_PATH, TRANSPORT_MODES, build_travel_matrix
+
+
+if __name__ == "__main__":
+    matrix = build_travel_matrix(pd.read_csv(COORDS_PATH))
+    matrix.save(MATRIX_PATH)
+    print(f"✅ {len(matrix)} places x {len(TRANSPORT_MODES)} modes -> {MATRIX_PATH}")
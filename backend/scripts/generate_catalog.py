@@ -0,0 +1,232 @@
+"""
+Synthetic nationwide catalog generator
+
+Produces realistic places in the combine_new.csv schema, one shard per region:
+    data/shards/<region>.csv
+
+Run from backend/:
+    python -m scripts.generate_catalog --places 100000
+    python -m scripts.generate_catalog --places 5000 --regions penang,johor --seed 7
+
+The klang-valley shard starts with the real rows from combine_new.csv.
+Serve a subset with DATA_REGIONS=klang-valley,penang.
+"""
+
+import os
+import random
+import argparse
+from typing import List, Dict
+
+import pandas as pd
+
+from services.utils import DATA_DIR, SHARD_DIR, DEFAULT_REGION
+
+
+# region -> (state label, [(town, postcode prefix)], transit hints)
+REGIONS = {
+    "klang-valley": ("Kuala Lumpur", [("Kuala Lumpur", "50"), ("Petaling Jaya", "46"), ("Shah Alam", "40"),
+                                      ("Subang Jaya", "47"), ("Kajang", "43"), ("Putrajaya", "62")],
+                     ["LRT Kelana Jaya Line", "MRT Kajang Line", "KTM Komuter", "Monorail"]),
+    "penang": ("Pulau Pinang", [("George Town", "10"), ("Bayan Lepas", "11"), ("Butterworth", "12"),
+                                ("Tanjung Bungah", "11")], ["Rapid Penang bus", "Penang Ferry"]),
+    "johor": ("Johor", [("Johor Bahru", "80"), ("Iskandar Puteri", "79"), ("Muar", "84"),
+                        ("Batu Pahat", "83")], ["Causeway Link bus", "KTM Shuttle Tebrau"]),
+    "perak": ("Perak", [("Ipoh", "30"), ("Taiping", "34"), ("Teluk Intan", "36")],
+              ["Perak Transit bus", "ETS Ipoh Station"]),
+    "melaka": ("Melaka", [("Melaka City", "75"), ("Alor Gajah", "78"), ("Jasin", "77")],
+               ["Panorama Melaka bus"]),
+    "negeri-sembilan": ("Negeri Sembilan", [("Seremban", "70"), ("Port Dickson", "71"), ("Nilai", "71")],
+                        ["KTM Komuter Seremban Line"]),
+    "pahang": ("Pahang", [("Kuantan", "25"), ("Bentong", "28"), ("Cameron Highlands", "39")],
+               ["Rapid Kuantan bus"]),
+    "terengganu": ("Terengganu", [("Kuala Terengganu", "20"), ("Kemaman", "24"), ("Dungun", "23")],
+                   ["Bas Terengganu"]),
+    "kelantan": ("Kelantan", [("Kota Bharu", "15"), ("Pasir Mas", "17"), ("Tumpat", "16")],
+                 ["MyBas Kota Bharu"]),
+    "kedah": ("Kedah", [("Alor Setar", "05"), ("Sungai Petani", "08"), ("Langkawi", "07")],
+              ["KTM Komuter Northern Sector", "Langkawi ferry"]),
+    "perlis": ("Perlis", [("Kangar", "01"), ("Arau", "02")], ["KTM Komuter Arau"]),
+    "sabah": ("Sabah", [("Kota Kinabalu", "88"), ("Sandakan", "90"), ("Tawau", "91")],
+              ["Kota Kinabalu city bus"]),
+    "sarawak": ("Sarawak", [("Kuching", "93"), ("Miri", "98"), ("Sibu", "96")],
+                ["Kuching city bus", "ART Kuching"]),
+}
+
+STREETS = ["Jalan Sultan", "Jalan Merdeka", "Jalan Bunga Raya", "Jalan Tun Razak", "Jalan Hang Tuah",
+           "Lorong Kenanga", "Jalan Masjid", "Jalan Pasar", "Jalan Stesen", "Jalan Besar", "Persiaran Raja"]
+
+CUISINES = [
+    # (cuisine, halal statuses, dishes, price band)
+    ("Malay", ["Halal"], ["Nasi Lemak", "Nasi Kerabu", "Laksa Kedah", "Ikan Bakar", "Satay"], (5, 25)),
+    ("Indian-Muslim (Mamak)", ["Halal"], ["Roti Canai", "Nasi Kandar", "Mee Goreng Mamak", "Murtabak"], (2, 15)),
+    ("Chinese (Hokkien)", ["Non-Halal"], ["Hokkien Mee", "Bak Kut Teh", "Char Kuey Teow"], (10, 35)),
+    ("Chinese (Cantonese)", ["Non-Halal", "Halal"], ["Dim Sum", "Wantan Mee", "Roast Duck"], (12, 60)),
+    ("Chinese (Hainanese)", ["Non-Halal", "Halal"], ["Chicken Rice", "Kaya Toast", "Hainanese Chop"], (8, 25)),
+    ("Indian (Banana Leaf)", ["Muslim-Friendly (Pork-Free)"], ["Banana Leaf Rice", "Fish Head Curry"], (12, 30)),
+    ("Indian (South Indian)", ["Halal (Vegetarian)", "Muslim-Friendly (Pork-Free)"], ["Thosai", "Idli", "Vadai"], (6, 20)),
+    ("Nyonya (Peranakan)", ["Non-Halal", "Muslim-Friendly (Pork-Free)"], ["Ayam Pongteh", "Asam Laksa", "Kuih"], (15, 45)),
+    ("Western", ["Halal", "Non-Halal"], ["Chicken Chop", "Fish & Chips", "Lamb Shank"], (20, 90)),
+    ("Seafood", ["Halal", "Non-Halal"], ["Chilli Crab", "Butter Prawns", "Steamed Fish"], (40, 150)),
+]
+
+FOOD_PATTERNS = ["Restoran {owner}", "Kedai Kopi {owner}", "{dish} {owner}", "{owner} {dish} House",
+                 "Gerai {owner}", "{town} {dish} Corner"]
+OWNERS = ["Ali", "Ah Seng", "Muthu", "Siti", "Kak Yah", "Wong", "Lim", "Ravi", "Hj Osman", "Mak Cik Ros",
+          "Ah Lek", "Kumar", "Chee Meng", "Pak Din", "Mei Ling", "Salmah", "Raju", "Tan", "Aminah", "Kassim"]
+
+ATTRACTIONS = [
+    # (category, name patterns, description)
+    ("Museum", ["{town} Heritage Museum", "Muzium {town}", "{town} Art Gallery"],
+     "Exhibits tracing the history, crafts and people of {town}."),
+    ("Nature", ["Taman Rekreasi {town}", "{town} Hill Park", "{town} Forest Trail", "{town} Waterfall"],
+     "Green escape with walking trails and viewpoints over {town}."),
+    ("Culture", ["Masjid Jamek {town}", "{town} Chinese Temple", "Sri Maha Mariamman {town}", "{town} Old Street"],
+     "Historic place of worship and local architecture in the heart of {town}."),
+    ("Nature & Wildlife", ["{town} Bird Sanctuary", "{town} Mangrove Park", "{town} Firefly Park"],
+     "Wildlife viewing and guided eco-tours around {town}."),
+    ("Theme Park", ["{town} Water World", "{town} Adventure Park"],
+     "Family rides, slides and shows on the edge of {town}."),
+    ("Landmark", ["{town} Clock Tower", "{town} Waterfront", "{town} Night Market"],
+     "Iconic {town} landmark, popular for photos and evening strolls."),
+]
+
+DAY_PATTERNS = ["Daily", "Daily", "Daily", "Tue-Sun", "Wed-Mon", "Mon-Sat", "Sat-Thu"]
+CLOSED_NOTE = {"Tue-Sun": " (Closed Mon)", "Wed-Mon": " (Closed Tuesdays)", "Mon-Sat": " (Closed Sun)",
+               "Sat-Thu": " (Closed Fridays)", "Daily": ""}
+
+ACCESSIBILITY = [
+    "Ground floor shop. Wheelchair accessible.",
+    "Fully wheelchair accessible; elevators available.",
+    "Open-air stall on flat ground. Accessible.",
+    "Upper floor only, stairs only. Not wheelchair accessible.",
+    "Basic accessibility; narrow entrance.",
+    "Main paved paths are wheelchair accessible; some trails have steps.",
+]
+
+
+def _clock(minutes: int) -> str:
+    """Minutes since midnight -> "7:30 AM" (1440 -> "12:00 AM")"""
+    minutes %= 24 * 60
+    hour, minute = divmod(minutes, 60)
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{minute:02d} {suffix}"
+
+
+def _opening_hours(rng: random.Random, kind: str) -> str:
+    days = rng.choice(DAY_PATTERNS)
+    if kind == "Food":
+        start, length = rng.choice([(6 * 60, 9 * 60), (7 * 60 + 30, 8 * 60), (11 * 60, 11 * 60),
+                                    (16 * 60, 10 * 60), (17 * 60, 9 * 60), (0, 24 * 60)])
+        if length == 24 * 60:
+            return "Daily: 24 hours"
+    else:
+        start, length = rng.choice([(9 * 60, 8 * 60), (8 * 60, 10 * 60), (10 * 60, 8 * 60),
+                                    (7 * 60, 12 * 60), (17 * 60, 7 * 60)])
+    return f"{days}: {_clock(start)} - {_clock(start + length)}{CLOSED_NOTE[days]}"
+
+
+def _food(rng: random.Random, town: str) -> Dict:
+    cuisine, statuses, dishes, (low, high) = rng.choice(CUISINES)
+    dish = rng.choice(dishes)
+    name = rng.choice(FOOD_PATTERNS).format(owner=rng.choice(OWNERS), dish=dish, town=town)
+    price_low = rng.randint(low, max(low, high - 5))
+    if dish == "Satay":
+        price = f"RM{rng.choice(['0.90', '1.20', '1.50'])} - RM3.00 per stick"
+    else:
+        price = f"RM{price_low} - RM{price_low + rng.randint(5, 20)}"
+    return {
+        "Type": "Food",
+        "Name": name,
+        "Category": None,
+        "Cuisine": cuisine,
+        "Halal_Status": rng.choice(statuses),
+        "Famous_Dish": dish,
+        "Price_Range": price,
+        "Description": f"Local favourite in {town} known for its {dish.lower()}.",
+    }
+
+
+def _attraction(rng: random.Random, town: str) -> Dict:
+    category, patterns, description = rng.choice(ATTRACTIONS)
+    roll = rng.random()
+    if roll < 0.35:
+        price = rng.choice(["Free Entry", "Entry: Free | Tours: Paid", "Park: Free | Rides: Paid"])
+    elif roll < 0.8:
+        local = rng.choice([2, 5, 10, 20, 30, 45])
+        price = f"RM{local} (MyKad) / RM{local * 2} (Intl)"
+    else:
+        adult = rng.choice([6, 20, 39, 60])
+        price = f"RM{adult} Adult / RM{adult // 2} Child"
+    return {
+        "Type": "Attraction",
+        "Name": rng.choice(patterns).format(town=town),
+        "Category": category,
+        "Cuisine": None,
+        "Halal_Status": None,
+        "Famous_Dish": None,
+        "Price_Range": price,
+        "Description": description.format(town=town),
+    }
+
+
+def generate_region(region: str, count: int, rng: random.Random, images: List[str]) -> pd.DataFrame:
+    """Synthetic places for one region in the combine_new.csv column layout"""
+    state, towns, transit = REGIONS[region]
+    rows = []
+    seen = set()
+    for i in range(count):
+        town, postcode = rng.choice(towns)
+        kind = "Food" if rng.random() < 0.6 else "Attraction"
+        place = _food(rng, town) if kind == "Food" else _attraction(rng, town)
+
+        # Keep names unique within the shard so name lookups stay unambiguous
+        if place["Name"] in seen:
+            place["Name"] = f"{place['Name']} ({rng.choice(STREETS).replace('Jalan ', '')} {i})"
+        seen.add(place["Name"])
+
+        place.update({
+            "Image_URL": rng.choice(images) if images else None,
+            "Ticket_Price_Breakdown": None,
+            "Opening_Hours": _opening_hours(rng, kind),
+            "Address": f"{rng.randint(1, 250)}, {rng.choice(STREETS)}, "
+                       f"{postcode}{rng.randint(100, 999)} {town}, {state}",
+            "Accessibility_Info": rng.choice(ACCESSIBILITY),
+            "Public_Transport": f"{rng.choice(transit)} ({rng.randint(3, 20)} min walk) or Grab.",
+            "Contact_Website": f"https://www.{place['Name'].lower().replace(' ', '')[:20]}.my"
+                               if kind == "Attraction" else None,
+        })
+        rows.append(place)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic regional place shards")
+    parser.add_argument("--places", type=int, default=100_000, help="Total places across all regions")
+    parser.add_argument("--regions", default="all", help="Comma-separated region names, or 'all'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=SHARD_DIR)
+    args = parser.parse_args()
+
+    regions = list(REGIONS) if args.regions == "all" else [r.strip() for r in args.regions.split(",")]
+    unknown = [r for r in regions if r not in REGIONS]
+    if unknown:
+        parser.error(f"Unknown region(s): {', '.join(unknown)}")
+
+    base = pd.read_csv(os.path.join(DATA_DIR, "combine_new.csv"))
+    images = base["Image_URL"].dropna().tolist()
+    rng = random.Random(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+
+    per_region = max(1, args.places // len(regions))
+    for region in regions:
+        df = generate_region(region, per_region, rng, images)
+        if region == DEFAULT_REGION:
+            df = pd.concat([base, df], ignore_index=True)
+        df = df[base.columns]
+        path = os.path.join(args.out, f"{region}.csv")
+        df.to_csv(path, index=False)
+        print(f"✅ {region}: {len(df):,} places -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Replay captured traffic (CAPTURE_TRAFFIC=true) against the app and report latency per route
+
+Run from backend/:
+    python -m scripts.replay data/captures/traffic.jsonl --speed 1,5,20
+    python -m scripts.replay traffic.jsonl --target http://localhost:8000 --speed 5
+
+Without --target the ASGI app is driven in-process with the JamAI stand-in
+(JAMAI_STANDIN=true) so itinerary routes cost model-like time, not money.
+Requests keep their recorded spacing divided by the speed (open loop: slow
+responses do not slow the schedule down).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+JOB_SUBMIT_ROUTE = "/api/itinerary/jobs"
+
+
+def load_records(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+class Synthesizer:
+    """Fills anonymized fields back in with catalog words / place names"""
+
+    def __init__(self, seed: int = 0):
+        from services.place_store import get_place_stores
+
+        self.rng = random.Random(seed)
+        self.names = [r.name for store in get_place_stores() for r in store.records]
+        self.words = sorted({w for name in self.names for w in name.lower().split() if w.isalpha()})
+
+    def fill(self, value: Any, key: str = "") -> Any:
+        if isinstance(value, dict):
+            if "$text" in value:
+                if key == "names":
+                    return self.rng.choice(self.names)
+                return " ".join(self.rng.choice(self.words) for _ in range(max(1, value["$text"])))
+            return {k: self.fill(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.fill(v, key) for v in value]
+        return value
+
+
+class Replayer:
+    def __init__(self, client: httpx.AsyncClient, synthesizer: Synthesizer, speed: float):
+        self.client = client
+        self.synth = synthesizer
+        self.speed = speed
+        self.job_ids: List[str] = []
+        self.results: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.skipped = 0
+
+    def _build(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        body = record.get("b")
+        if isinstance(body, dict) and ("$oversized" in body or "$opaque" in body):
+            return None
+        params = self.synth.fill(record.get("pp") or {})
+        for name, value in params.items():
+            if value is None:  # Runtime IDs - reuse one this replay created
+                if not self.job_ids:
+                    return None
+                params[name] = self.job_ids[-1]
+        path = record["r"].format(**{k: quote(str(v), safe="") for k, v in params.items()})
+        return {
+            "method": record["m"],
+            "url": path,
+            "params": self.synth.fill(record.get("q") or {}),
+            "json": self.synth.fill(body) if body is not None else None,
+            "headers": {"X-Api-Key": f"replay-{record.get('c', 'anon')}"},
+        }
+
+    async def _one(self, record: Dict[str, Any], due: float, origin: float) -> None:
+        delay = origin + due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        request = self._build(record)
+        if request is None:
+            self.skipped += 1
+            return
+
+        started = time.perf_counter()
+        outcome = {"lag_ms": 1000 * (started - origin - due), "recorded_ms": record.get("ms")}
+        try:
+            async with self.client.stream(**request) as resp:
+                body = await resp.aread()
+            outcome["status"] = resp.status_code
+            if record["r"] == JOB_SUBMIT_ROUTE and resp.status_code in (200, 202):
+                self.job_ids.append(json.loads(body)["job_id"])
+        except Exception as e:
+            outcome["status"] = 0
+            outcome["error"] = type(e).__name__
+        outcome["ms"] = 1000 * (time.perf_counter() - started)
+        self.results[f"{record['m']} {record['r']}"].append(outcome)
+
+    async def run(self, records: List[Dict[str, Any]]) -> float:
+        t0 = records[0]["ts"]
+        origin = time.perf_counter()
+        await asyncio.gather(*(self._one(r, (r["ts"] - t0) / self.speed, origin) for r in records))
+        return time.perf_counter() - origin
+
+
+def summarize(results: Dict[str, List[Dict[str, Any]]], elapsed: float) -> List[Dict[str, Any]]:
+    rows = []
+    everything = [o for outcomes in results.values() for o in outcomes]
+    for route, outcomes in sorted(results.items()) + [("ALL", everything)]:
+        latencies = [o["ms"] for o in outcomes if 200 <= o["status"] < 400]
+        recorded = [o["recorded_ms"] for o in outcomes if o.get("recorded_ms") is not None]
+        rows.append({
+            "route": route,
+            "requests": len(outcomes),
+            "rps": round(len(outcomes) / elapsed, 2) if elapsed else None,
+            "ok": len(latencies),
+            "client_errors": sum(1 for o in outcomes if 400 <= o["status"] < 500 and o["status"] != 429),
+            "shed": sum(1 for o in outcomes if o["status"] in (429, 503)),
+            "errors": sum(1 for o in outcomes if o["status"] == 0 or (o["status"] >= 500 and o["status"] != 503)),
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies) if latencies else None,
+            "recorded_p50_ms": percentile(recorded, 50),
+            "max_lag_ms": max((o["lag_ms"] for o in outcomes), default=None),
+        })
+    return rows
+
+
+def print_table(speed: float, rows: List[Dict[str, Any]], skipped: int) -> None:
+    def fmt(value):
+        return "-" if value is None else (f"{value:.1f}" if isinstance(value, float) else str(value))
+
+    columns = ["route", "requests", "rps", "ok", "client_errors", "shed", "errors",
+               "p50_ms", "p90_ms", "p99_ms", "max_ms", "recorded_p50_ms"]
+    widths = [max(len(c), *(len(fmt(r[c])) for r in rows)) for c in columns]
+    print(f"\n== speed {speed:g}x ({skipped} skipped) ==")
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(fmt(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+async def replay(records, speed: float, target: Optional[str], seed: int):
+    if target:
+        client = httpx.AsyncClient(base_url=target, timeout=120)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=120)
+    async with client:
+        replayer = Replayer(client, Synthesizer(seed), speed)
+        elapsed = await replayer.run(records)
+    return summarize(replayer.results, elapsed), replayer.skipped
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="Capture file (JSONL)")
+    parser.add_argument("--speed", default="1", help="Comma-separated multipliers, e.g. 1,5,20")
+    parser.add_argument("--target", help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_out", help="Also write the report here")
+    args = parser.parse_args(argv)
+
+    if not args.target:
+        # Must be set before the app (and its JamAI client) is imported
+        os.environ.setdefault("JAMAI_STANDIN", "true")
+        os.environ["CAPTURE_TRAFFIC"] = "false"
+
+    records = load_records(args.log, args.limit)
+    if not records:
+        sys.exit(f"No requests in {args.log}")
+
+    report = {}
+    for speed in (float(s) for s in args.speed.split(",")):
+        rows, skipped = asyncio.run(replay(records, speed, args.target, args.seed))
+        print_table(speed, rows, skipped)
+        report[f"{speed:g}x"] = {"skipped": skipped, "routes": rows}
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Sync the local place dataset to the PlacesKB knowledge table (only what changed)
+
+Run from backend/:
+    python -m scripts.sync_placeskb --dry-run     # show added / changed / deleted counts
+    python -m scripts.sync_placeskb               # push them
+    python -m scripts.sync_placeskb --standin     # against the in-memory JamAI stand-in
+
+Compares a hash of every place against data/placeskb_manifest.json (what was
+uploaded last time). Safe to re-run after an interruption: the manifest is
+saved after every batch. With no manifest yet (or --adopt) the table's current
+rows are matched by Title first: matches are kept, anything else is deleted.
+"""
+
+import sys
+import argparse
+
+from services.kb_sync import BATCH_SIZE, KB_TABLE_ID, MANIFEST_PATH, KnowledgeSync
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Plan only, upload nothing")
+    parser.add_argument("--full", action="store_true", help="Re-upload every place (replaces existing rows)")
+    parser.add_argument("--adopt", action="store_true", help="Rebuild the manifest from the table's current rows")
+    parser.add_argument("--standin", action="store_true", help="Use the local JamAI stand-in")
+    parser.add_argument("--table", default=KB_TABLE_ID)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--manifest", help=f"Manifest path (default {MANIFEST_PATH})")
+    args = parser.parse_args(argv)
+
+    if args.standin:
+        from services.jamai_standin import StandInJamAI, types
+
+        client = StandInJamAI()
+        manifest = args.manifest or MANIFEST_PATH.replace(".json", ".standin.json")
+    else:
+        from services import jamai_client
+
+        if not jamai_client.JAMAI_AVAILABLE and not args.dry_run:
+            sys.exit("jamaibase is not installed. Run: pip install jamaibase (or use --standin / --dry-run)")
+        client = jamai_client.jamai_client.client
+        types = getattr(jamai_client, "t", None)
+        manifest = args.manifest or MANIFEST_PATH
+
+    sync = KnowledgeSync(client, types, table_id=args.table, manifest_path=manifest, batch_size=args.batch_size)
+    result = sync.run(dry_run=args.dry_run, full=args.full, adopt=args.adopt or None)
+    verb = "Would push" if args.dry_run else "Pushed"
+    if "adopted" in result:
+        print(f"Matched {result['adopted']} existing rows by Title ({result['orphans']} unmatched or duplicate)")
+    print(
+        f"✅ {verb} {result['added']} added, {result['changed']} changed, {result['deleted']} deleted "
+        f"of {result['rows']:,} places to {result['table_id']} "
+        f"({result['retries']} retries, {result['seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
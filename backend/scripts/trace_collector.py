@@ -0,0 +1,55 @@
+"""
+Minimal OTLP/HTTP JSON collector stand-in for local tracing
+
+Run from backend/: python -m scripts.trace_collector [port]
+Then start the API with TRACE_EXPORTER=otlp TRACE_OTLP_ENDPOINT=http://localhost:4318
+Each received span is appended to data/traces/collected.jsonl and summarised on stdout.
+"""
+
+import os
+import sys
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "traces", "collected.jsonl")
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.send_error(400, "Expected OTLP/JSON")
+            return
+
+        spans = [
+            span
+            for resource in body.get("resourceSpans", [])
+            for scope in resource.get("scopeSpans", [])
+            for span in scope.get("spans", [])
+        ]
+        with open(OUT_PATH, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span) + "\n")
+        for span in spans:
+            if not span.get("parentSpanId"):
+                ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+                print(f"{span['traceId']} {span['name']} {ms:.1f}ms")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 4318
+    os.makedirs(os.path.dirname(OUT_PATH), exist_ok=True)
+    print(f"OTLP collector on http://localhost:{port}/v1/traces -> {os.path.abspath(OUT_PATH)}")
+    ThreadingHTTPServer(("0.0.0.0", port), CollectorHandler).serve_forever()
@@ -0,0 +1,191 @@
+"""
+Execution layer for CPU-bound service calls (search, facets, recommendations)
+Keeps them off the event loop: thread pool by default, optional process pool
+with the snapshot preloaded per process; queue-depth metrics and per-call deadlines
+"""
+
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from .profiler import current_profile, profiled_call
+
+# "thread" (default), "process" (eligible calls go to worker processes) or "inline" (no offload)
+EXECUTOR_MODE = os.getenv("EXECUTOR_MODE", "thread").lower()
+CPU_THREADS = int(os.getenv("CPU_THREADS", str(min(8, (os.cpu_count() or 1) + 2))))
+CPU_PROCESSES = int(os.getenv("CPU_PROCESSES", str(os.cpu_count() or 1)))
+# Default per-call deadline (seconds) - the caller gets DeadlineExceeded, not a stalled request
+CPU_DEADLINE_SECONDS = float(os.getenv("CPU_DEADLINE_SECONDS", "10"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call did not finish within its deadline"""
+
+
+def _init_process() -> None:
+    """Process-pool initializer: compile every shard before the first request lands"""
+    from .place_store import follow_disk_changes, get_place_stores
+    from .facets import get_facet_index
+
+    follow_disk_changes()  # Admin ingests land in the parent; workers catch up from the log
+    for store in get_place_stores():
+        get_facet_index(store)
+
+
+def _timed(fn: Callable, args: tuple, kwargs: Dict) -> tuple:
+    # Wall-clock stamps so queue wait can be measured across processes
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class PoolStats:
+    """Counters for one pool; read via CpuExecutor.snapshot()"""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed - self.timed_out
+
+    def snapshot(self) -> Dict[str, Any]:
+        finished = max(1, self.completed)
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            # Calls waiting for a worker (everything beyond the busy workers)
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(1000 * self.wait_seconds / finished, 2),
+            "max_wait_ms": round(1000 * self.max_wait_seconds, 2),
+            "avg_run_ms": round(1000 * self.run_seconds / finished, 2),
+        }
+
+
+class CpuExecutor:
+    """
+    Usage:
+        results = await cpu_executor.run(search_places, place_type="Food")
+        total, chunks = await cpu_executor.run(iter_search_results, process_ok=False)
+
+    process_ok=False keeps a call on threads (results that can't be pickled,
+    e.g. generators, or that are too large to ship between processes).
+    """
+
+    def __init__(
+        self,
+        mode: str = EXECUTOR_MODE,
+        threads: int = CPU_THREADS,
+        processes: int = CPU_PROCESSES,
+        deadline: float = CPU_DEADLINE_SECONDS
+    ):
+        self.mode = mode
+        self.deadline = deadline
+        self._threads = threads
+        self._processes = processes
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "thread": PoolStats("thread", threads),
+            "process": PoolStats("process", processes),
+        }
+
+    def _pool(self, kind: str):
+        with self._lock:
+            if kind == "process":
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self._processes, initializer=_init_process
+                    )
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self._threads, thread_name_prefix="cpu"
+                )
+            return self._thread_pool
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        deadline: Optional[float] = None,
+        process_ok: bool = True,
+        **kwargs
+    ) -> Any:
+        if self.mode == "inline":
+            return fn(*args, **kwargs)
+
+        session = current_profile.get()
+        if session is not None:
+            # Profiled requests stay on threads so the profiler can see the work
+            fn, process_ok = profiled_call(session, fn), False
+        kind = "process" if self.mode == "process" and process_ok else "thread"
+        stats = self.stats[kind]
+        deadline = self.deadline if deadline is None else deadline
+
+        submitted = time.time()
+        call = partial(_timed, fn, args, kwargs)
+        if kind == "thread":
+            # Carry the request context (trace span) into the worker thread
+            future = self._pool(kind).submit(contextvars.copy_context().run, call)
+        else:
+            future = self._pool(kind).submit(call)
+        stats.submitted += 1
+        try:
+            result, started, finished = await asyncio.wait_for(asyncio.wrap_future(future), deadline)
+        except asyncio.TimeoutError:
+            future.cancel()  # Only helps if it never started; a running call finishes in the background
+            stats.timed_out += 1
+            raise DeadlineExceeded(f"{getattr(fn, '__name__', 'call')} exceeded its {deadline:g}s deadline")
+        except Exception:
+            stats.failed += 1
+            raise
+
+        stats.completed += 1
+        wait = max(0.0, started - submitted)
+        stats.wait_seconds += wait
+        stats.max_wait_seconds = max(stats.max_wait_seconds, wait)
+        stats.run_seconds += finished - started
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "deadline_seconds": self.deadline,
+            "pools": {
+                name: stats.snapshot()
+                for name, stats in self.stats.items()
+                if name == "thread" or self.mode == "process"
+            },
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for pool in (self._thread_pool, self._process_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = self._process_pool = None
+
+
+# ============================================
+# Singleton instance for import
+# ============================================
+cpu_executor = CpuExecutor()
@@ -0,0 +1,314 @@
+"""
+Per-value bitsets over a PlaceStore - filtering and facet counts in one pass
+Bitsets are packed uint8 arrays (bit i = row i); counts are popcounts
+"""
+
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+import numpy as np
+
+PRICE_BUCKETS = {
+    "Budget": (0, 30),
+    "Medium": (30, 80),
+    "Premium": (80, 9999)
+}
+
+QUERY_CACHE_SIZE = 128
+OPEN_CACHE_SIZE = 96
+# Row separator in TextArena (never part of a query)
+ARENA_SEPARATOR = "\x01"
+# Queries hitting more than this share of rows switch to a per-row scan
+DENSE_SHARE = 0.5
+DENSE_MIN_HITS = 64
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask, bitorder="little")
+
+
+def popcount(bits: np.ndarray) -> int:
+    return int(np.bitwise_count(bits).sum())
+
+
+class TextArena:
+    """
+    Many short texts packed into one string, separated by ARENA_SEPARATOR, with
+    row start offsets in a compact int64 array - one object instead of one str
+    per row. Substring queries scan the whole arena in C and map hits to rows.
+    """
+
+    def __init__(self, texts):
+        texts = [t.replace(ARENA_SEPARATOR, " ") for t in texts]
+        self.text = ARENA_SEPARATOR.join(texts) + ARENA_SEPARATOR
+        self.offsets = array("q", [0])
+        for t in texts:
+            self.offsets.append(self.offsets[-1] + len(t) + 1)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.text[self.offsets[row]:self.offsets[row + 1] - 1]
+
+    def contains(self, query: str) -> np.ndarray:
+        """Boolean mask of rows whose text contains `query`"""
+        mask = np.zeros(len(self), dtype=bool)
+        if not query or ARENA_SEPARATOR in query:
+            return mask
+        text, offsets, find = self.text, self.offsets, self.text.find
+        rows = []
+        row = 0
+        pos = find(query)
+        while pos != -1:
+            row = bisect_right(offsets, pos, row) - 1
+            rows.append(row)
+            row += 1
+            if len(rows) >= DENSE_MIN_HITS and len(rows) > DENSE_SHARE * row:
+                # Most rows match - a temporary split and per-row test beats hopping from hit to hit
+                parts = text.split(ARENA_SEPARATOR)
+                return np.fromiter((query in part for part in parts[:-1]), dtype=bool, count=len(self))
+            pos = find(query, offsets[row])  # Next row - one hit per row is enough
+        mask[rows] = True
+        return mask
+
+
+class FacetIndex:
+    """
+    Precomputed bitsets for every filter value of one regional shard.
+
+    Usage:
+        index = get_facet_index(store)
+        ids = index.select(place_type="Food", halal_status="Halal only")
+        counts = index.counts(place_type="Food", halal_status="Halal only")
+    """
+
+    def __init__(self, records):
+        self.size = len(records)
+        self.all = pack(np.ones(self.size, dtype=bool))
+        self.empty = pack(np.zeros(self.size, dtype=bool))
+
+        types = np.array([r.type or "" for r in records], dtype=object)
+        self.type_values = sorted(set(types) - {""})
+        self.type_bits = {value: pack(types == value) for value in self.type_values}
+
+        prices = np.array([r.price_min for r in records], dtype=np.int64)
+        self.price_bits = {
+            bucket: pack((prices >= low) & (prices <= high))
+            for bucket, (low, high) in PRICE_BUCKETS.items()
+        }
+        self.halal_bits = pack(np.array([r.is_halal for r in records], dtype=bool))
+        self.wheelchair_bits = pack(np.array([r.is_wheelchair_accessible for r in records], dtype=bool))
+
+        # Flattened opening intervals for vectorised "open at minute m"
+        rows, starts, ends = [], [], []
+        for i, record in enumerate(records):
+            for start, end in record.hours:
+                rows.append(i)
+                starts.append(start)
+                ends.append(end)
+        self._hour_rows = np.array(rows, dtype=np.int64)
+        self._hour_starts = np.array(starts, dtype=np.int32)
+        self._hour_ends = np.array(ends, dtype=np.int32)
+
+        self.texts = TextArena(r.search_text for r in records)
+        # LRU caches, shared by the cpu_executor threads serving one snapshot
+        self._cache_lock = threading.Lock()
+        self._open_cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    # ---------- incremental update ----------
+
+    def updated(self, store, delta) -> "FacetIndex":
+        """
+        Index for the next snapshot (see PlaceStore.apply): carried-over rows keep
+        their bits, only delta.changed rows are re-derived. Cached open / query
+        bitsets are patched the same way instead of being dropped.
+        """
+        records = store.records
+        changed = delta.changed
+        fresh = [records[i] for i in changed]
+
+        def patch(bits: np.ndarray, values) -> np.ndarray:
+            mask = delta.carry(np.unpackbits(bits, count=self.size, bitorder="little").astype(bool))
+            mask[changed] = np.fromiter(values, dtype=bool, count=len(changed))
+            return pack(mask)
+
+        index = FacetIndex.__new__(FacetIndex)
+        index.size = len(records)
+        index.all = pack(np.ones(index.size, dtype=bool))
+        index.empty = pack(np.zeros(index.size, dtype=bool))
+
+        type_bits = {
+            value: patch(self.type_bits.get(value, self.empty), (r.type == value for r in fresh))
+            for value in set(self.type_values) | {r.type for r in fresh if r.type}
+        }
+        index.type_bits = {value: bits for value, bits in type_bits.items() if bits.any()}
+        index.type_values = sorted(index.type_bits)
+        index.price_bits = {
+            bucket: patch(self.price_bits[bucket], (low <= r.price_min <= high for r in fresh))
+            for bucket, (low, high) in PRICE_BUCKETS.items()
+        }
+        index.halal_bits = patch(self.halal_bits, (r.is_halal for r in fresh))
+        index.wheelchair_bits = patch(self.wheelchair_bits, (r.is_wheelchair_accessible for r in fresh))
+
+        keep, rows = delta.remap_rows(self._hour_rows)
+        new_rows = [i for i in changed for _ in records[i].hours]
+        index._hour_rows = np.concatenate([rows, np.array(new_rows, dtype=np.int64)])
+        index._hour_starts = np.concatenate([
+            self._hour_starts[keep],
+            np.array([start for i in changed for start, _ in records[i].hours], dtype=np.int32)
+        ])
+        index._hour_ends = np.concatenate([
+            self._hour_ends[keep],
+            np.array([end for i in changed for _, end in records[i].hours], dtype=np.int32)
+        ])
+
+        fresh_texts = [r.search_text for r in fresh]
+        texts = [self.texts[i] for i in delta.kept] + [""] * (index.size - len(delta.kept))
+        for i, text in zip(changed, fresh_texts):
+            texts[i] = text
+        index.texts = TextArena(texts)
+
+        with self._cache_lock:
+            open_cached, query_cached = list(self._open_cache.items()), list(self._query_cache.items())
+        index._cache_lock = threading.Lock()
+        index._open_cache = OrderedDict(
+            (minute, patch(bits, (r.is_open(minute) for r in fresh))) for minute, bits in open_cached
+        )
+        index._query_cache = OrderedDict(
+            (query, patch(bits, (query in text for text in fresh_texts))) for query, bits in query_cached
+        )
+        return index
+
+    # ---------- per-request bitsets (cached) ----------
+
+    def _cached(self, cache: OrderedDict, key, limit: int, compute) -> np.ndarray:
+        with self._cache_lock:
+            bits = cache.get(key)
+            if bits is not None:
+                cache.move_to_end(key)
+                return bits
+        bits = compute()  # Outside the lock; two threads may both compute a miss, same result
+        with self._cache_lock:
+            cache[key] = bits
+            if len(cache) > limit:
+                cache.popitem(last=False)
+        return bits
+
+    def open_bits(self, minute_of_day: int) -> np.ndarray:
+        def compute():
+            s, e, m = self._hour_starts, self._hour_ends, minute_of_day
+            crosses = e < s  # Crosses midnight (e.g. 18:00 - 02:00)
+            hit = np.where(crosses, (m >= s) | (m <= e), (s <= m) & (m <= e))
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self._hour_rows[hit]] = True
+            return pack(mask)
+
+        return self._cached(self._open_cache, minute_of_day, OPEN_CACHE_SIZE, compute)
+
+    def query_bits(self, query: str) -> np.ndarray:
+        query = query.lower()
+        return self._cached(self._query_cache, query, QUERY_CACHE_SIZE, lambda: pack(self.texts.contains(query)))
+
+    # ---------- filters ----------
+
+    def active_bits(
+        self,
+        place_type: str = "All",
+        price_range: str = "All",
+        halal_status: str = "No preference",
+        accessibility: str = "No preference",
+        search_query: str = "",
+        minute_of_day: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Bitset per active filter dimension ("search_query" included)"""
+        active = {}
+        if place_type != "All":
+            active["place_type"] = self.type_bits.get(place_type, self.empty)
+        if price_range != "All":
+            active["price_range"] = self.price_bits.get(price_range, self.all)
+        if halal_status == "Halal only":
+            active["halal_status"] = self.halal_bits
+        if accessibility == "Wheelchair-friendly":
+            active["accessibility"] = self.wheelchair_bits
+        if minute_of_day is not None:
+            active["filter_open_now"] = self.open_bits(minute_of_day)
+        if search_query:
+            active["search_query"] = self.query_bits(search_query)
+        return active
+
+    def _combine(self, active: Dict[str, np.ndarray], skip: Optional[str] = None) -> np.ndarray:
+        bits = self.all
+        for dimension, dimension_bits in active.items():
+            if dimension != skip:
+                bits = bits & dimension_bits
+        return bits
+
+    def select(self, **filters) -> List[int]:
+        """Row IDs matching every active filter, in dataset order"""
+        active = self.active_bits(**filters)
+        if not active:
+            return list(range(self.size))
+        mask = np.unpackbits(self._combine(active), count=self.size, bitorder="little")
+        return np.flatnonzero(mask).tolist()
+
+    def counts(self, open_minute: Optional[int] = None, **filters) -> Dict[str, Dict[str, int]]:
+        """
+        For every dimension: how many rows each option would return given the
+        *other* active filters (standard disjunctive facet semantics).
+        `open_minute` is the time used for the "open now" option.
+        """
+        active = self.active_bits(**filters)
+        minute = filters.get("minute_of_day")
+        if minute is None:
+            minute = open_minute
+        facets = {}
+
+        base = self._combine(active, skip="place_type")
+        facets["place_type"] = {"All": popcount(base)}
+        for value in self.type_values:
+            facets["place_type"][value] = popcount(base & self.type_bits[value])
+
+        base = self._combine(active, skip="price_range")
+        facets["price_range"] = {"All": popcount(base)}
+        for bucket, bits in self.price_bits.items():
+            facets["price_range"][bucket] = popcount(base & bits)
+
+        base = self._combine(active, skip="halal_status")
+        facets["halal_status"] = {
+            "No preference": popcount(base),
+            "Halal only": popcount(base & self.halal_bits),
+        }
+
+        base = self._combine(active, skip="accessibility")
+        facets["accessibility"] = {
+            "No preference": popcount(base),
+            "Wheelchair-friendly": popcount(base & self.wheelchair_bits),
+        }
+
+        base = self._combine(active, skip="filter_open_now")
+        facets["filter_open_now"] = {"false": popcount(base)}
+        if minute is not None:
+            facets["filter_open_now"]["true"] = popcount(base & self.open_bits(minute))
+
+        return facets
+
+
+def get_facet_index(store) -> FacetIndex:
+    """Facet bitsets for a PlaceStore, built once per snapshot"""
+    return store.derived("facet_index", lambda: FacetIndex(store.records))
+
+
+def merge_counts(parts: List[Dict[str, Dict[str, int]]]) -> Dict[str, Dict[str, int]]:
+    """Sum facet counts from several shards"""
+    merged: Dict[str, Dict[str, int]] = {}
+    for part in parts:
+        for dimension, values in part.items():
+            target = merged.setdefault(dimension, {})
+            for value, count in values.items():
+                target[value] = target.get(value, 0) + count
+    return merged
@@ -0,0 +1,180 @@
+"""
+Hedged calls - re-issue a slow blocking call once it passes a latency percentile, first success wins
+Hedges are capped at a share of all calls so tail latency drops without doubling upstream load
+"""
+
+import os
+import math
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .tracing import span
+
+HEDGE_ENABLED = os.getenv("JAMAI_HEDGE", "true").lower() == "true"
+# Issue the duplicate once the call is slower than this percentile of recent calls
+HEDGE_PERCENTILE = float(os.getenv("JAMAI_HEDGE_PERCENTILE", "95"))
+# Hedges allowed per call (0.05 = at most 5% extra upstream requests)
+HEDGE_BUDGET = float(os.getenv("JAMAI_HEDGE_BUDGET", "0.05"))
+# Recent latencies kept per key, and how many are needed before hedging starts
+WINDOW_SIZE = int(os.getenv("JAMAI_HEDGE_WINDOW", "200"))
+MIN_SAMPLES = int(os.getenv("JAMAI_HEDGE_MIN_SAMPLES", "20"))
+# Table calls expected in flight at once (admitted itineraries x concurrent slot rows)
+HEDGE_MAX_IN_FLIGHT = int(os.getenv("JAMAI_HEDGE_MAX_IN_FLIGHT", "32"))
+# Pool size override; by default sized from HEDGE_MAX_IN_FLIGHT (see pool_threads)
+HEDGE_THREADS = int(os.getenv("JAMAI_HEDGE_THREADS", "0"))
+
+
+def pool_threads(max_in_flight: int = HEDGE_MAX_IN_FLIGHT, budget: float = HEDGE_BUDGET) -> int:
+    """
+    Threads for the hedging pool: one per primary call in flight, plus room
+    for the budgeted duplicates (an abandoned loser keeps its thread until
+    its request times out).
+    """
+    if HEDGE_THREADS > 0:
+        return HEDGE_THREADS
+    return max_in_flight + max(1, math.ceil(budget * max_in_flight))
+
+
+class LatencyWindow:
+    """Last WINDOW_SIZE successful latencies (seconds) for one kind of call"""
+
+    def __init__(self, size: int = WINDOW_SIZE):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class Hedger:
+    """
+    Runs a blocking call on a small pool; if it has not returned after the
+    key's HEDGE_PERCENTILE latency (and the budget allows), starts one
+    duplicate. The first success is returned. A call that has not started yet
+    is cancelled; one already in flight is abandoned (a blocking HTTP request
+    cannot be interrupted) and its result discarded. When the pool is full
+    (abandoned losers still running), calls run on the caller's thread unhedged.
+
+    Usage:
+        hedger = Hedger()
+        response = hedger.call("TripPlanner", client.table.add_table_rows, table_type, request)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE_ENABLED,
+        percentile: float = HEDGE_PERCENTILE,
+        budget: float = HEDGE_BUDGET,
+        min_samples: int = MIN_SAMPLES,
+        threads: Optional[int] = None
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.windows: Dict[str, LatencyWindow] = {}
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.threads = threads or pool_threads(budget=budget)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="hedge")
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging `key`, or None while there is too little history"""
+        window = self.windows.get(key)
+        if window is None or len(window.samples) < self.min_samples:
+            return None
+        return window.percentile(self.percentile)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            # One hedge of slack so a cold process can still hedge its first tail call
+            if self.hedged + 1 > self.budget * self.calls + 1:
+                self.budget_denied += 1
+                return False
+            self.hedged += 1
+            return True
+
+    def _timed(self, fn: Callable, args: tuple, kwargs: Dict) -> Any:
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, time.perf_counter() - started
+
+    def call(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self.calls += 1
+            window = self.windows.setdefault(key, LatencyWindow())
+        delay = self.delay(key) if self.enabled else None
+        if delay is None:
+            result, seconds = self._timed(fn, args, kwargs)
+            window.add(seconds)
+            return result
+
+        primary_started = threading.Event()
+        began: Dict[str, float] = {}
+
+        def run_primary():
+            # Latency counts from here, not from submit - pool queueing is not upstream time
+            began["at"] = time.perf_counter()
+            primary_started.set()
+            return self._timed(fn, args, kwargs)
+
+        submit = lambda job: self._pool.submit(contextvars.copy_context().run, job)
+        primary = submit(run_primary)
+        if not primary_started.wait(delay) and primary.cancel():
+            # Every pool thread is busy; waiting for one could take as long as a stuck call
+            result, seconds = self._timed(fn, args, kwargs)
+            window.add(seconds)
+            return result
+        primary_started.wait()  # Started just as the cancel was attempted
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            result, seconds = primary.result()
+            window.add(seconds)
+            return result
+
+        with span("hedge.issue", key=key, delay_ms=round(1000 * delay, 1)):
+            hedge = submit(lambda: self._timed(fn, args, kwargs))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                result, _ = future.result()
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                # The primary's own latency is at least this - record what the caller saw
+                window.add(time.perf_counter() - began["at"])
+                return result
+        raise error
+
+    def snapshot(self) -> Dict[str, Any]:
+        delays = {key: self.delay(key) for key in list(self.windows)}
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "threads": self.threads,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "delays_ms": {key: round(1000 * d, 1) for key, d in delays.items() if d is not None},
+        }
@@ -0,0 +1,166 @@
+"""
+Place image thumbnails - resized WebP/JPEG variants with content-hashed filenames
+Built offline (python -m scripts.build_thumbnails), served by /api/images
+"""
+
+import os
+import io
+import re
+import json
+import time
+import hashlib
+from urllib.parse import unquote, urlparse
+from typing import Dict, Optional, Iterable, Tuple
+
+from .utils import DATA_DIR
+
+# Originals shipped with the repo (same files the GitHub raw URLs point at)
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(DATA_DIR)), "images")
+THUMB_DIR = os.path.join(DATA_DIR, "thumbnails")
+MANIFEST_NAME = "manifest.json"
+
+# Size name -> target width in px (never upscaled)
+THUMB_WIDTHS = {
+    "sm": 160,
+    "md": 320,
+    "lg": 640,
+}
+
+# Format -> (Pillow format, file extension, media type, save options)
+THUMB_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 78, "method": 6}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 80, "optimize": True, "progressive": True}),
+}
+
+
+def image_key(image_url: Optional[str]) -> Optional[str]:
+    """URL-safe key for an image, from the original's filename ("nasi-lemak-wanjo")"""
+    if not image_url:
+        return None
+    stem = os.path.splitext(os.path.basename(unquote(urlparse(image_url).path)))[0]
+    key = re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-")
+    return key or None
+
+
+def _render(source, width: int, fmt: str) -> bytes:
+    from PIL import Image, ImageOps
+
+    pil_format, _, _, options = THUMB_FORMATS[fmt]
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            # Cards have a white background - flatten transparency rather than go black
+            img = img.convert("RGBA")
+            canvas = Image.new("RGB", img.size, (255, 255, 255))
+            canvas.paste(img, mask=img.split()[-1])
+            img = canvas
+        else:
+            img = img.convert("RGB")
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, pil_format, **options)
+        return out.getvalue()
+
+
+def build_thumbnails(
+    sources: Iterable[str],
+    out_dir: str = THUMB_DIR
+) -> Dict[str, Dict]:
+    """
+    Render every size/format for each source image into out_dir and write the manifest.
+
+    Manifest: {key: {"source": filename, "variants": {size: {fmt: filename}}}}
+    Filenames carry a hash of their bytes, so unchanged images keep their URL
+    and changed ones get a new one.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest: Dict[str, Dict] = {}
+    for source in sources:
+        key = image_key(source)
+        if not key or key in manifest:
+            continue
+        variants: Dict[str, Dict[str, str]] = {}
+        for size, width in THUMB_WIDTHS.items():
+            variants[size] = {}
+            for fmt, (_, ext, _, _) in THUMB_FORMATS.items():
+                data = _render(source, width, fmt)
+                digest = hashlib.sha1(data).hexdigest()[:12]
+                filename = f"{key}-{size}-{digest}.{ext}"
+                path = os.path.join(out_dir, filename)
+                if not os.path.exists(path):
+                    with open(path, "wb") as f:
+                        f.write(data)
+                variants[size][fmt] = filename
+        manifest[key] = {"source": os.path.basename(source), "variants": variants}
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+# ========== Serving ==========
+
+# Manifest mtime is re-checked at most this often (called once per response row)
+MANIFEST_CHECK_SECONDS = 5.0
+
+# Global cache variables (manifest is reloaded when the file changes)
+_MANIFEST_CACHE: Dict[str, Dict] = {}
+_MANIFEST_MTIME: Optional[float] = None
+_MANIFEST_CHECKED: Tuple[Optional[str], float] = (None, 0.0)
+_URL_CACHE: Dict[Optional[str], Optional[Dict[str, str]]] = {}  # image_url -> URLs
+
+def load_manifest() -> Dict[str, Dict]:
+    """Thumbnail manifest, or {} if thumbnails have not been built"""
+    global _MANIFEST_CACHE, _MANIFEST_MTIME, _MANIFEST_CHECKED
+    now = time.monotonic()
+    checked_dir, checked_at = _MANIFEST_CHECKED
+    if checked_dir == THUMB_DIR and now - checked_at < MANIFEST_CHECK_SECONDS:
+        return _MANIFEST_CACHE
+    _MANIFEST_CHECKED = (THUMB_DIR, now)
+
+    path = os.path.join(THUMB_DIR, MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        _MANIFEST_CACHE, _MANIFEST_MTIME = {}, None
+        _URL_CACHE.clear()
+        return _MANIFEST_CACHE
+    if mtime != _MANIFEST_MTIME:
+        with open(path, encoding="utf-8") as f:
+            _MANIFEST_CACHE = json.load(f)
+        _MANIFEST_MTIME = mtime
+        _URL_CACHE.clear()
+    return _MANIFEST_CACHE
+
+
+def _version(entry: Dict, size: str) -> str:
+    # Hash of the WebP variant doubles as the URL version
+    return entry["variants"][size]["webp"].rsplit("-", 1)[-1].split(".")[0]
+
+
+def thumbnail_urls(image_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """{size: versioned /api/images URL} for a place's image_url, or None if not built"""
+    manifest = load_manifest()
+    if image_url not in _URL_CACHE:
+        key = image_key(image_url)
+        entry = manifest.get(key) if key else None
+        _URL_CACHE[image_url] = None if entry is None else {
+            size: f"/api/images/{key}/{size}?v={_version(entry, size)}"
+            for size in entry["variants"]
+        }
+    urls = _URL_CACHE[image_url]
+    return dict(urls) if urls is not None else None
+
+
+def resolve_thumbnail(key: str, size: str, accept: str = "") -> Optional[Tuple[str, str, str]]:
+    """
+    (file path, media type, version) for a key/size, WebP when the client accepts it.
+    None if unknown.
+    """
+    entry = load_manifest().get(key)
+    if entry is None or size not in entry["variants"]:
+        return None
+    fmt = "webp" if "image/webp" in (accept or "") else "jpeg"
+    filename = entry["variants"][size][fmt]
+    return os.path.join(THUMB_DIR, filename), THUMB_FORMATS[fmt][2], _version(entry, size)
@@ -0,0 +1,341 @@
+"""
+Incremental place ingestion - validated upserts / deletes applied to the live store as deltas
+Every batch is appended to a per-region log first; the log is compacted into a fresh snapshot in the background
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from . import utils
+from .place_store import PlaceRecord, PlaceStore, PlaceDelta, get_place_store, publish_place_store
+from .utils import DATA_DIR, DEFAULT_REGION, PLACE_FIELDS, parse_opening_hours
+
+INGEST_DIR = os.getenv("INGEST_DIR", os.path.join(DATA_DIR, "ingest"))
+# Logged operations per region before a background compaction starts
+COMPACT_AFTER_OPS = int(os.getenv("INGEST_COMPACT_AFTER_OPS", "500"))
+
+PLACE_TYPES = ("Food", "Attraction")
+REQUIRED_COLUMNS = ("Name", "Type")
+
+# Per-region state
+_LOCKS: Dict[str, threading.Lock] = {}
+_SEQ: Dict[str, int] = {}
+_LOG_OPS: Dict[str, int] = {}
+_COMPACTING: Dict[str, bool] = {}
+_LAST_COMPACTION: Dict[str, Dict[str, Any]] = {}
+# Log / shard file stamps this process's snapshot reflects (see follow_disk)
+_LOG_STAMP: Dict[str, Optional[Tuple[int, int, int]]] = {}
+_SHARD_STAMP: Dict[str, Optional[Tuple[int, int, int]]] = {}
+_STATE_LOCK = threading.Lock()
+
+
+def _lock(region: str) -> threading.Lock:
+    with _STATE_LOCK:
+        return _LOCKS.setdefault(region, threading.Lock())
+
+
+def _log_path(region: str) -> str:
+    return os.path.join(INGEST_DIR, f"{region}.log.jsonl")
+
+
+# ============================================
+# Validation
+# ============================================
+
+def clean_place(row: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Strip values; empty strings become None (as NaN does in the CSV)"""
+    cleaned = {}
+    for column, value in row.items():
+        value = value.strip() if isinstance(value, str) else value
+        cleaned[column] = value if value not in ("", None) else None
+    return cleaned
+
+
+def validate_place(row: Dict[str, Any]) -> List[str]:
+    """Problems with one upsert row, checked against the CSV columns"""
+    errors = []
+    unknown = sorted(set(row) - set(PLACE_FIELDS))
+    if unknown:
+        errors.append(f"unknown column(s) {', '.join(unknown)} (expected: {', '.join(PLACE_FIELDS)})")
+    for column, value in row.items():
+        if value is not None and not isinstance(value, str):
+            errors.append(f"{column} must be a string or null")
+    if not isinstance(row.get("Name"), str) or not row["Name"].strip():
+        errors.append("Name is required")
+    place_type = row.get("Type")
+    if isinstance(place_type, str) and place_type.strip() and place_type.strip() not in PLACE_TYPES:
+        errors.append(f"Type must be one of {', '.join(PLACE_TYPES)}")
+    hours = row.get("Opening_Hours")
+    if isinstance(hours, str) and hours.strip() and not parse_opening_hours(hours):
+        errors.append(f"Opening_Hours '{hours}' could not be parsed")
+    return errors
+
+
+# ============================================
+# Planning a batch against a snapshot
+# ============================================
+
+def plan_changes(
+    store: PlaceStore,
+    ops: Sequence[Dict[str, Any]]
+) -> Tuple[List[PlaceRecord], PlaceDelta, Dict[str, Any]]:
+    """
+    Resolve ops in order against `store` (names match case-insensitively).
+    Upserts of an existing place merge the given columns over the current
+    values; unknown names are inserted (and need every REQUIRED_COLUMNS value).
+    Returns (new records, delta, summary).
+    """
+    old_size = len(store.records)
+    rows: List[Optional[PlaceRecord]] = list(store.records)
+    positions = dict(store.name_index)
+    changed = set()
+    summary = {"inserted": 0, "updated": 0, "deleted": 0, "missing": []}
+
+    for op in ops:
+        if op["op"] == "delete":
+            i = positions.pop(op["name"].strip().lower(), None)
+            if i is None or rows[i] is None:
+                summary["missing"].append(op["name"])
+                continue
+            rows[i] = None
+            changed.discard(i)
+            summary["deleted"] += 1
+            continue
+
+        place = op["place"]
+        key = place["Name"].strip().lower()
+        i = positions.get(key)
+        if i is not None and rows[i] is not None:
+            fields = rows[i].to_dict()
+            fields.update({PLACE_FIELDS[column]: value for column, value in place.items()})
+            rows[i] = PlaceRecord(**fields)
+            summary["updated"] += 1
+        else:
+            missing = [column for column in REQUIRED_COLUMNS if not place.get(column)]
+            if missing:
+                raise ValueError(f"New place '{place['Name']}' needs {', '.join(missing)}")
+            rows.append(PlaceRecord(**{PLACE_FIELDS[column]: value for column, value in place.items()}))
+            i = len(rows) - 1
+            positions[key] = i
+            summary["inserted"] += 1
+        changed.add(i)
+
+    kept = [i for i in range(old_size) if rows[i] is not None]
+    appended = [i for i in range(old_size, len(rows)) if rows[i] is not None]
+    new_id = {old: new for new, old in enumerate(kept + appended)}
+    records = [rows[i] for i in kept + appended]
+    delta = PlaceDelta(old_size, kept, [new_id[i] for i in changed], len(records))
+    return records, delta, summary
+
+
+# ============================================
+# Append-only log
+# ============================================
+
+def _read_log(region: str) -> List[Dict[str, Any]]:
+    path = _log_path(region)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break  # Torn final write - everything after it was never acknowledged
+    return entries
+
+
+def _append_log(region: str, ops: List[Dict[str, Any]]) -> None:
+    os.makedirs(INGEST_DIR, exist_ok=True)
+    seq = _SEQ.get(region, 0)
+    lines = []
+    for op in ops:
+        seq += 1
+        lines.append(json.dumps({"seq": seq, "ts": round(time.time(), 3), **op}) + "\n")
+    with open(_log_path(region), "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    _SEQ[region] = seq
+    _LOG_OPS[region] = _LOG_OPS.get(region, 0) + len(ops)
+
+
+def _stamp(path: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def replay_log(store: PlaceStore) -> PlaceStore:
+    """Apply logged (not yet compacted) changes to a freshly compiled snapshot"""
+    # Stamped before reading, so a write racing the read is picked up by follow_disk()
+    _LOG_STAMP[store.region] = _stamp(_log_path(store.region))
+    _SHARD_STAMP[store.region] = _stamp(utils._shard_files().get(store.region))
+    entries = _read_log(store.region)
+    _SEQ[store.region] = entries[-1]["seq"] if entries else _SEQ.get(store.region, 0)
+    _LOG_OPS[store.region] = len(entries)
+    if not entries:
+        return store
+    records, delta, _ = plan_changes(store, entries)
+    return store.apply(records, delta)
+
+
+def follow_disk(store: PlaceStore) -> Optional[PlaceStore]:
+    """
+    For processes that don't ingest themselves (process-pool workers): catch up
+    with batches another process logged since `store` was built. Returns None
+    when a compaction rewrote the shard - the caller recompiles from the file.
+    One stat() per call while nothing changed.
+    """
+    region = store.region
+    log_stamp = _stamp(_log_path(region))
+    if log_stamp == _LOG_STAMP.get(region):
+        return store
+    utils.invalidate_regions()  # A compaction may have written a new shard file
+    shard_stamp = _stamp(utils._shard_files().get(region))
+    if shard_stamp != _SHARD_STAMP.get(region):
+        utils._SHARD_CACHE.pop(region, None)
+        return None
+    _LOG_STAMP[region] = log_stamp
+    seen = _SEQ.get(region, 0)
+    entries = [entry for entry in _read_log(region) if entry["seq"] > seen]
+    if not entries:
+        return store
+    _SEQ[region] = entries[-1]["seq"]
+    records, delta, _ = plan_changes(store, entries)
+    return store.apply(records, delta)
+
+
+# ============================================
+# Public API
+# ============================================
+
+def ingest_places(
+    upserts: Sequence[Dict[str, Any]] = (),
+    deletes: Sequence[str] = (),
+    region: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Validate, log and apply one batch (upserts first, then deletes).
+    Raises ValueError listing every invalid row; nothing is applied then.
+    """
+    region = region or DEFAULT_REGION
+    if region not in utils.list_regions():
+        raise ValueError(f"Unknown region '{region}'. Available: {', '.join(utils.list_regions())}")
+
+    errors = [f"upserts[{i}]: {problem}" for i, row in enumerate(upserts) for problem in validate_place(row)]
+    errors += [f"deletes[{i}]: name is required" for i, name in enumerate(deletes) if not str(name).strip()]
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    ops = [{"op": "upsert", "place": clean_place(row)} for row in upserts]
+    ops += [{"op": "delete", "name": name.strip()} for name in deletes]
+
+    with _lock(region):
+        store = get_place_store(region)
+        records, delta, summary = plan_changes(store, ops)
+        _append_log(region, ops)  # Durable before it becomes visible
+        publish_place_store(store.apply(records, delta))
+        log_ops = _LOG_OPS[region]
+
+    if log_ops >= COMPACT_AFTER_OPS:
+        compact_in_background(region)
+    return {"region": region, **summary, "rows": len(records), "log_ops": log_ops}
+
+
+def _snapshot_path(region: str) -> str:
+    """Shard file the compacted snapshot replaces (combine_new.csv itself is never rewritten)"""
+    current = utils._shard_files().get(region)
+    if current and os.path.dirname(os.path.abspath(current)) == os.path.abspath(utils.SHARD_DIR):
+        return current
+    return os.path.join(utils.SHARD_DIR, f"{region}.csv")
+
+
+def records_to_dataframe(records: Sequence[PlaceRecord]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [[getattr(r, field) for field in PLACE_FIELDS.values()] for r in records],
+        columns=list(PLACE_FIELDS)
+    )
+
+
+def compact(region: Optional[str] = None) -> Dict[str, Any]:
+    """Write the live snapshot as the region's shard file and drop the log entries it covers"""
+    region = region or DEFAULT_REGION
+    started = time.perf_counter()
+    with _lock(region):
+        store = get_place_store(region)
+        upto = _SEQ.get(region, 0)
+
+    df = utils.compact_frame(records_to_dataframe(store.records))
+    path = _snapshot_path(region)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    utils.invalidate_regions()
+
+    with _lock(region):
+        remaining = [entry for entry in _read_log(region) if entry["seq"] > upto]
+        if os.path.exists(_log_path(region)):
+            tmp_log = f"{_log_path(region)}.tmp"
+            with open(tmp_log, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry) + "\n" for entry in remaining))
+            os.replace(tmp_log, _log_path(region))
+        _LOG_OPS[region] = len(remaining)
+        # Re-point the shard cache at the compacted frame without recompiling the live store
+        live = get_place_store(region)
+        utils._SHARD_CACHE[region] = df
+        publish_place_store(live, source=df)
+
+    result = {
+        "region": region,
+        "path": path,
+        "rows": len(df),
+        "compacted_through_seq": upto,
+        "log_ops": len(remaining),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    _LAST_COMPACTION[region] = result
+    return result
+
+
+def compact_in_background(region: str) -> bool:
+    """Start compact(region) on a daemon thread unless one is already running"""
+    with _STATE_LOCK:
+        if _COMPACTING.get(region):
+            return False
+        _COMPACTING[region] = True
+
+    def run():
+        try:
+            compact(region)
+        except Exception as e:
+            print(f"[ingest] Compaction of {region} failed:", e)
+        finally:
+            _COMPACTING[region] = False
+
+    threading.Thread(target=run, name=f"compact-{region}", daemon=True).start()
+    return True
+
+
+def ingest_status() -> Dict[str, Dict[str, Any]]:
+    return {
+        region: {
+            "seq": _SEQ.get(region, 0),
+            "log_ops": _LOG_OPS.get(region, 0),
+            "compacting": _COMPACTING.get(region, False),
+            "last_compaction": _LAST_COMPACTION.get(region),
+        }
+        for region in utils.list_regions()
+    }
@@ -0,0 +1,328 @@
+"""
+Itinerary cache + speculative prefetch - raw TripPlanner results keyed by request parameters
+A profile seen on /api/recommendations starts a low-priority generation for its likely start time
+"""
+
+import os
+import copy
+import time
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .tracing import log, root_span
+
+# Off (0) unless set - cached itineraries are reused verbatim for this long
+CACHE_TTL_SECONDS = float(os.getenv("ITINERARY_CACHE_TTL_SECONDS", "0"))
+CACHE_MAX_ENTRIES = int(os.getenv("ITINERARY_CACHE_MAX_ENTRIES", "256"))
+
+PREFETCH_ENABLED = os.getenv("ITINERARY_PREFETCH", "false").lower() == "true"
+# Upstream generations the prefetcher may start per minute (token bucket)
+PREFETCH_PER_MINUTE = float(os.getenv("ITINERARY_PREFETCH_PER_MINUTE", "4"))
+PREFETCH_QUEUE = int(os.getenv("ITINERARY_PREFETCH_QUEUE", "8"))
+# Queued prefetches are dropped while this many user generations are running
+PREFETCH_MAX_FOREGROUND = int(os.getenv("ITINERARY_PREFETCH_MAX_FOREGROUND", "2"))
+# Start time assumed for a profile that has never requested an itinerary
+PREFETCH_DEFAULT_START = os.getenv("ITINERARY_PREFETCH_DEFAULT_START", "09:00")
+# Seconds an idle prefetch worker waits before exiting
+IDLE_SECONDS = 60
+
+Profile = Tuple[str, str, str]  # (dietary, transport, accessibility)
+CacheKey = Tuple[str, str, str, str]  # (start_time, dietary, transport, accessibility)
+
+
+def itinerary_key(start_time: str, dietary: str, transport: str, accessibility: str) -> CacheKey:
+    return (start_time, dietary, transport, accessibility)
+
+
+class _Entry:
+    __slots__ = ("result", "expires", "prefetched", "hits")
+
+    def __init__(self, result: Dict[str, Any], expires: float, prefetched: bool):
+        self.result = result
+        self.expires = expires
+        self.prefetched = prefetched
+        self.hits = 0
+
+
+class ItineraryCache:
+    """
+    TTL + LRU cache of generate_itinerary() results. Concurrent misses for a
+    key wait on the generation already in flight (user or prefetch) instead
+    of paying for a second one.
+
+    Usage:
+        result = itinerary_cache.get_or_generate(key, lambda: jamai_client.generate_itinerary(...))
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Future] = {}
+        self._speculative: Dict[CacheKey, int] = {}  # In-flight prefetch -> users waiting on it
+        self._lock = threading.Lock()
+        self.foreground = 0  # User-initiated generations running now
+        self.stats = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _lookup(self, key: CacheKey) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires < time.time():
+            self._drop(key)
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        if entry.prefetched and not entry.hits:
+            self.stats["prefetch_wasted"] += 1
+
+    def contains(self, key: CacheKey) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None or key in self._inflight
+
+    def _claim(self, key: CacheKey) -> Tuple[Optional[Dict[str, Any]], Optional[Future], bool]:
+        """(cached result, generation to wait for, whether the caller owns a new generation)"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                entry.hits += 1
+                self.stats["hits"] += 1
+                if entry.prefetched and entry.hits == 1:
+                    self.stats["prefetch_hits"] += 1
+                return entry.result, None, False
+            if key in self._inflight:
+                self.stats["joined"] += 1
+                if key in self._speculative:
+                    self._speculative[key] += 1
+                    if self._speculative[key] == 1:
+                        self.stats["prefetch_hits"] += 1
+                return None, self._inflight[key], False
+            self._inflight[key] = Future()
+            self.stats["misses"] += 1
+            self.foreground += 1
+            return None, None, True
+
+    def _finish(self, key: CacheKey, result: Optional[Dict[str, Any]], error: Optional[BaseException], prefetched: bool):
+        with self._lock:
+            future = self._inflight.pop(key)
+            joined = self._speculative.pop(key, 0)
+            if not prefetched:
+                self.foreground -= 1
+            if error is None:
+                entry = _Entry(result, time.time() + self.ttl, prefetched)
+                entry.hits = joined
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._drop(next(iter(self._entries)))
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def get_or_generate(self, key: CacheKey, generate: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Cached result, the in-flight one, or a fresh generate() (stored on success)"""
+        if not self.enabled:
+            return generate()
+        result, pending, _ = self._claim(key)
+        if result is not None:
+            return copy.deepcopy(result)
+        if pending is not None:
+            try:
+                return copy.deepcopy(pending.result())
+            except Exception:
+                pass  # The other generation failed - try our own
+            return self.get_or_generate(key, generate)
+
+        try:
+            result = generate()
+        except BaseException as e:
+            self._finish(key, None, e, prefetched=False)
+            raise
+        self._finish(key, result, None, prefetched=False)
+        return copy.deepcopy(result)
+
+    def prefetch(self, key: CacheKey, generate: Callable[[], Dict[str, Any]]) -> bool:
+        """Generate into the cache unless the key is cached or in flight; True if it ran"""
+        if not self._reserve(key):
+            return False
+        try:
+            result = generate()
+        except Exception as e:
+            self._finish(key, None, e, prefetched=True)
+            with self._lock:
+                self.stats["prefetch_failed"] += 1
+            return False
+        with self._lock:
+            self.stats["prefetched"] += 1
+        self._finish(key, result, None, prefetched=True)
+        return True
+
+    def _reserve(self, key: CacheKey) -> bool:
+        # Like _claim, but a present entry is not a hit (nobody asked for it)
+        with self._lock:
+            if self._lookup(key) is not None or key in self._inflight:
+                return False
+            self._inflight[key] = Future()
+            self._speculative[key] = 0
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            entries = len(self._entries)
+            inflight = len(self._inflight)
+        lookups = stats.get("hits", 0) + stats.get("misses", 0) + stats.get("joined", 0)
+        prefetched = stats.get("prefetched", 0)
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "entries": entries,
+            "in_flight": inflight,
+            "foreground": self.foreground,
+            **stats,
+            "hit_rate": round((stats.get("hits", 0) + stats.get("joined", 0)) / lookups, 3) if lookups else None,
+            # Share of speculative generations a user later asked for
+            "prefetch_hit_rate": round(stats.get("prefetch_hits", 0) / prefetched, 3) if prefetched else None,
+        }
+
+
+class ItineraryPrefetcher:
+    """
+    Single low-priority worker. observe() queues the profile's most likely
+    start time; the queue is bounded, rate-limited by a token bucket, and
+    cleared whenever user generations pile up (cache.foreground).
+
+    Usage:
+        prefetcher.observe(("Halal only", "Public transport", "No preference"))
+    """
+
+    def __init__(
+        self,
+        cache: ItineraryCache,
+        generate: Callable[..., Dict[str, Any]],
+        enabled: bool = PREFETCH_ENABLED,
+        per_minute: float = PREFETCH_PER_MINUTE,
+        max_foreground: int = PREFETCH_MAX_FOREGROUND,
+        queue_size: int = PREFETCH_QUEUE
+    ):
+        self.cache = cache
+        self.generate = generate
+        self.enabled = enabled and cache.enabled
+        if enabled and not cache.enabled:
+            log("[prefetch] ITINERARY_PREFETCH needs ITINERARY_CACHE_TTL_SECONDS > 0; prefetch disabled")
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, per_minute / 6)
+        self.tokens = self.capacity
+        self.refilled = time.monotonic()
+        self.max_foreground = max_foreground
+        self.queue: Deque[CacheKey] = deque(maxlen=queue_size)
+        self.start_times: Dict[Profile, Counter] = {}
+        self.stats = Counter()
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def record_request(self, start_time: str, dietary: str, transport: str, accessibility: str) -> None:
+        """Learn which start time a profile actually asks for"""
+        with self._cond:
+            self.start_times.setdefault((dietary, transport, accessibility), Counter())[start_time] += 1
+
+    def likely_start(self, profile: Profile) -> str:
+        with self._cond:
+            counts = self.start_times.get(profile)
+            return counts.most_common(1)[0][0] if counts else PREFETCH_DEFAULT_START
+
+    def _under_load(self) -> bool:
+        return self.cache.foreground >= self.max_foreground
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def observe(self, profile: Profile) -> bool:
+        """Queue a prefetch for this profile; False when skipped"""
+        if not self.enabled:
+            return False
+        key = itinerary_key(self.likely_start(profile), *profile)
+        if self.cache.contains(key):
+            self.stats["already_cached"] += 1
+            return False
+        with self._cond:
+            if self._under_load():
+                self.stats["skipped_load"] += 1
+                return False
+            if key in self.queue:
+                return False
+            if not self._take_token():
+                self.stats["budget_denied"] += 1
+                return False
+            if len(self.queue) == self.queue.maxlen:
+                self.stats["dropped"] += 1
+            self.queue.append(key)
+            self.stats["queued"] += 1
+            self._ensure_worker()
+            self._cond.notify()
+        return True
+
+    def _ensure_worker(self) -> None:
+        # Called under self._cond
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="itinerary-prefetch", daemon=True)
+            self._worker.start()
+
+    def _next(self) -> Optional[CacheKey]:
+        with self._cond:
+            while True:
+                while not self.queue:
+                    if not self._cond.wait(timeout=IDLE_SECONDS):
+                        self._worker = None  # Exit; the next observe() starts a fresh worker
+                        return None
+                if not self._under_load():
+                    return self.queue.popleft()
+                # Users are waiting on upstream - speculative work goes first
+                self.stats["cancelled"] += len(self.queue)
+                self.queue.clear()
+
+    def _run(self) -> None:
+        while True:
+            key = self._next()
+            if key is None:
+                return
+            start_time, dietary, transport, accessibility = key
+            with root_span("itinerary.prefetch", start_time=start_time):
+                ran = self.cache.prefetch(key, lambda: self.generate(
+                    start_time=start_time, dietary=dietary, transport=transport,
+                    accessibility=accessibility, stream=False
+                ))
+            self.stats["ran" if ran else "skipped_cached"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"enabled": self.enabled, "queued_now": len(self.queue), **dict(self.stats)}
+
+
+def _generate(**params) -> Dict[str, Any]:
+    from .jamai_client import jamai_client  # Lazy: keeps this module importable without the SDK
+
+    return jamai_client.generate_itinerary(**params)
+
+
+# ============================================
+# Shared cache + prefetcher
+# ============================================
+
+itinerary_cache = ItineraryCache()
+prefetcher = ItineraryPrefetcher(itinerary_cache, _generate)
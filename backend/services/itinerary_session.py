@@ -0,0 +1,297 @@
+"""
+Interactive itinerary editing - server-side state for one WebSocket session
+Edits recompute only the slots they affect, from the local place index; JamAI is asked only on request
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from .itinerary_validator import activity_kind, best_substitute, slot_start, check_activity
+from .place_store import PlaceRecord, find_places, get_place_stores
+from .routing import score_route
+from .tracing import log, span
+from .utils import enrich_itinerary_activity, parse_time, parse_time_ranges
+
+# Same values as the preference enums in models/schemas.py
+DIETARY_OPTIONS = ("Halal only", "No preference")
+ACCESSIBILITY_OPTIONS = ("Wheelchair-friendly", "No preference")
+TRANSPORT_OPTIONS = ("Public transport", "Taxi/Grab", "Own vehicle")
+# Slot names clients may use instead of indexes (the TripPlanner's five slots)
+SLOT_NAMES = ("breakfast", "morning", "lunch", "afternoon", "dinner")
+# Locally valid places offered to JamAI when a slot edit asks for the model's pick
+AI_CANDIDATES = 15
+
+
+def _format_minutes(minute: int) -> str:
+    return f"{(minute // 60) % 24:02d}:{minute % 60:02d}"
+
+
+def _shift_window(window: str, delta: int) -> str:
+    ranges = parse_time_ranges(window or "")
+    if not ranges:
+        return window
+    start, end = ranges[0]
+    return f"{_format_minutes(start + delta)}-{_format_minutes(end + delta)}"
+
+
+def _check_strings(values: Dict[str, Any], keys, what: str) -> None:
+    """Fields that must be strings when present (a client can send any JSON)"""
+    for key in keys:
+        if values.get(key) is not None and not isinstance(values[key], str):
+            raise ValueError(f"{what} '{key}' must be a string, got {type(values[key]).__name__}")
+
+
+class ItinerarySession:
+    """
+    One itinerary plus its constraints. apply() takes an edit operation and
+    returns a delta: the slots that changed (index + full activity), current
+    route issues and any substitutions made.
+
+    Operations:
+        {"op": "replace_slot", "slot": 2 | "lunch", "place": optional name, "ai": optional bool}
+        {"op": "shift_start", "start_time": "10:30"}
+        {"op": "set_constraint", "dietary" | "accessibility" | "transport": value}
+
+    Usage:
+        session = ItinerarySession(response["itinerary"], "09:00", "Halal only", "Public transport", "No preference")
+        delta = session.apply({"op": "replace_slot", "slot": "lunch"})
+    """
+
+    def __init__(
+        self,
+        activities: List[Dict[str, Any]],
+        start_time: str,
+        dietary: str = "No preference",
+        transport: str = "Public transport",
+        accessibility: str = "No preference",
+        region: Optional[str] = None,
+        jamai=None
+    ):
+        self.constraints = {"dietary": dietary, "transport": transport, "accessibility": accessibility}
+        self._check_constraints(self.constraints)
+        if not isinstance(activities, list) or not all(isinstance(a, dict) for a in activities):
+            raise ValueError("itinerary must be a list of activity objects")
+        for activity in activities:
+            _check_strings(activity, ("time", "place", "type"), "Activity")
+        _check_strings({"start_time": start_time, "region": region}, ("start_time", "region"), "Session")
+        if parse_time(start_time) is None:
+            raise ValueError(f"Invalid start_time '{start_time}' (expected HH:MM)")
+        self.start_time = start_time
+        self.region = region
+        self.jamai = jamai
+        self.version = 0
+        self.activities = [enrich_itinerary_activity(dict(a)) for a in activities]
+        self.activities, self.route_issues = score_route(self.activities, transport)
+
+    @staticmethod
+    def _check_constraints(values: Dict[str, str]) -> None:
+        allowed = {"dietary": DIETARY_OPTIONS, "transport": TRANSPORT_OPTIONS, "accessibility": ACCESSIBILITY_OPTIONS}
+        for name, value in values.items():
+            if name not in allowed:
+                raise ValueError(f"Unknown constraint '{name}'. Expected one of: {', '.join(allowed)}")
+            if value not in allowed[name]:
+                raise ValueError(f"{name} must be one of: {', '.join(allowed[name])}")
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "start_time": self.start_time,
+            "constraints": dict(self.constraints),
+            "itinerary": self.activities,
+            "route_issues": self.route_issues,
+        }
+
+    # ---------- helpers ----------
+
+    def _slot_index(self, slot: Any) -> int:
+        if isinstance(slot, str) and slot.lower() in SLOT_NAMES and len(self.activities) == len(SLOT_NAMES):
+            return SLOT_NAMES.index(slot.lower())
+        if isinstance(slot, int) and not isinstance(slot, bool) and 0 <= slot < len(self.activities):
+            return slot
+        raise ValueError(f"Unknown slot {slot!r} (index 0-{len(self.activities) - 1} or one of {', '.join(SLOT_NAMES)})")
+
+    def _records(self) -> List[Optional[PlaceRecord]]:
+        matches = find_places([a.get("place") or "" for a in self.activities], self.region)
+        return [store.records[row_id] if store else None for store, row_id in (m or (None, None) for m in matches)]
+
+    def _place_in(self, index: int, record: PlaceRecord, reasoning: str) -> None:
+        """Put `record` into slot `index` (enriched fields of the previous place are dropped)"""
+        old = self.activities[index]
+        self.activities[index] = enrich_itinerary_activity({
+            "time": old.get("time", ""),
+            "place": record.name,
+            "type": old.get("type") or record.type,
+            "reasoning": reasoning,
+        })
+
+    def _substitute(self, index: int, records: List[Optional[PlaceRecord]]) -> Optional[PlaceRecord]:
+        activity = self.activities[index]
+        used = {r.name_lower for i, r in enumerate(records) if r is not None and i != index}
+        if records[index] is not None:
+            used.add(records[index].name_lower)
+        previous = records[index - 1].name if index > 0 and records[index - 1] is not None else None
+        return best_substitute(
+            activity_kind(activity, records[index]), slot_start(activity), previous, used,
+            self.constraints["dietary"], self.constraints["accessibility"], self.constraints["transport"],
+            get_place_stores(self.region), None
+        )
+
+    def _ai_pick(self, index: int, records: List[Optional[PlaceRecord]]) -> Optional[PlaceRecord]:
+        """Let the slot table choose among locally valid places (one JamAI call)"""
+        from .jamai_client import SLOT_STEPS
+
+        activity = self.activities[index]
+        kind = activity_kind(activity, records[index])
+        start = slot_start(activity)
+        used = {r.name_lower for r in records if r is not None}
+        candidates = []
+        for store in get_place_stores(self.region):
+            for row_id in store.filter(
+                place_type=kind,
+                halal_status=self.constraints["dietary"] if kind == "Food" else "No preference",
+                accessibility=self.constraints["accessibility"],
+                filter_open_now=start is not None,
+                current_time=_format_minutes(start) if start is not None else None
+            ):
+                if store.records[row_id].name_lower not in used:
+                    candidates.append(store.records[row_id].name)
+        if not candidates:
+            return None
+
+        ranges = parse_time_ranges(activity.get("time") or "")
+        if len(self.activities) == len(SLOT_STEPS):
+            step = SLOT_STEPS[index][0]
+        else:
+            step = next((s for s, _, k in SLOT_STEPS if k == kind), SLOT_STEPS[1][0])
+        parse = (
+            f"Start {self.start_time}, dietary {self.constraints['dietary']}, "
+            f"transport {self.constraints['transport']}, accessibility {self.constraints['accessibility']}"
+        )
+        try:
+            with span("session.ai_pick", candidates=min(len(candidates), AI_CANDIDATES)):
+                choice = self.jamai.choose_slot(
+                    step, parse, ranges[0] if ranges else (9 * 60, 10 * 60), [], candidates[:AI_CANDIDATES]
+                )
+        except Exception as e:
+            log(f"[session] JamAI slot pick failed, using the local pick: {e}")
+            return None
+        match = find_places([choice.get("place") or ""], self.region)[0]
+        record = match[0].records[match[1]] if match else None
+        if record is None or record.name not in candidates[:AI_CANDIDATES]:
+            return None  # Model went off-list - the caller falls back to the local pick
+        return record
+
+    def _repair(self, indexes, records, reason: str) -> List[Dict[str, Any]]:
+        """Re-check the given slots under the current constraints; replace the ones that fail"""
+        repairs = []
+        for i in indexes:
+            problems = check_activity(
+                self.activities[i], records[i], self.constraints["dietary"], self.constraints["accessibility"]
+            )
+            if not problems:
+                continue
+            substitute = self._substitute(i, records)
+            repairs.append({
+                "slot": i,
+                "original_place": self.activities[i].get("place"),
+                "replacement_place": substitute.name if substitute else None,
+                "reasons": problems,
+            })
+            if substitute is not None:
+                self._place_in(i, substitute, f"Replaced after {reason} ({'; '.join(problems)})")
+                records[i] = substitute
+        return repairs
+
+    # ---------- operations ----------
+
+    def _replace_slot(self, op: Dict[str, Any], records) -> List[Dict[str, Any]]:
+        index = self._slot_index(op.get("slot"))
+        warnings = []
+        if op.get("place"):
+            match = find_places([op["place"]], self.region)[0]
+            if match is None:
+                raise ValueError(f"'{op['place']}' is not in the dataset")
+            record = match[0].records[match[1]]
+            problems = check_activity(
+                {"time": self.activities[index].get("time"), "type": self.activities[index].get("type")},
+                record, self.constraints["dietary"], self.constraints["accessibility"]
+            )
+            # An explicit choice is honoured; problems are reported back
+            warnings = [{"slot": index, "original_place": self.activities[index].get("place"),
+                         "replacement_place": record.name, "reasons": problems}] if problems else []
+            self._place_in(index, record, "Chosen by you")
+            return warnings
+
+        record = None
+        if op.get("ai") and self.jamai is not None and getattr(self.jamai, "client", None):
+            record = self._ai_pick(index, records)
+        if record is None:
+            record = self._substitute(index, records)
+        if record is None:
+            raise ValueError("No other place fits this slot under the current constraints")
+        self._place_in(index, record, "Swapped in on request")
+        return []
+
+    def _shift_start(self, op: Dict[str, Any], records) -> List[Dict[str, Any]]:
+        new_start = parse_time(op.get("start_time") or "")
+        if new_start is None:
+            raise ValueError(f"Invalid start_time '{op.get('start_time')}' (expected HH:MM)")
+        old_start = parse_time(self.start_time)
+        delta = (new_start.hour * 60 + new_start.minute) - (old_start.hour * 60 + old_start.minute)
+        self.start_time = f"{new_start.hour:02d}:{new_start.minute:02d}"
+        for activity in self.activities:
+            activity["time"] = _shift_window(activity.get("time", ""), delta)
+        # Places stay unless the shift puts them outside opening hours
+        return self._repair(range(len(self.activities)), records, f"moving the start to {self.start_time}")
+
+    def _set_constraint(self, op: Dict[str, Any], records) -> List[Dict[str, Any]]:
+        changes = {k: op[k] for k in ("dietary", "transport", "accessibility") if k in op}
+        if not changes:
+            raise ValueError("set_constraint needs dietary, transport and/or accessibility")
+        self._check_constraints(changes)
+        self.constraints.update(changes)
+        if set(changes) == {"transport"}:
+            return []  # Only the legs change
+        label = ", ".join(f"{k} {v}" for k, v in changes.items())
+        return self._repair(range(len(self.activities)), records, f"switching to {label}")
+
+    OPERATIONS = {
+        "replace_slot": _replace_slot,
+        "shift_start": _shift_start,
+        "set_constraint": _set_constraint,
+    }
+
+    def apply(self, op: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply one edit; raises ValueError (state unchanged) for invalid ones"""
+        if not isinstance(op, dict):
+            raise ValueError("An edit must be a JSON object")
+        name = op.get("op")
+        handler = self.OPERATIONS.get(name) if isinstance(name, str) else None
+        if handler is None:
+            raise ValueError(f"Unknown op {name!r}. Expected one of: {', '.join(self.OPERATIONS)}")
+        _check_strings(op, ("place", "start_time"), "Edit")
+
+        started = time.perf_counter()
+        before = [dict(a) for a in self.activities]
+        saved = (self.start_time, dict(self.constraints))
+        with span("session.edit", op=op["op"]) as s:
+            try:
+                repairs = handler(self, op, self._records())
+            except Exception:
+                # Whatever failed, the session stays at the last good version
+                self.activities, (self.start_time, self.constraints) = before, saved
+                raise
+            self.activities, self.route_issues = score_route(self.activities, self.constraints["transport"])
+            changed = [i for i, (old, new) in enumerate(zip(before, self.activities)) if old != new]
+            s.set("changed", len(changed))
+
+        self.version += 1
+        return {
+            "version": self.version,
+            "changes": [{"slot": i, "activity": self.activities[i]} for i in changed],
+            "start_time": self.start_time,
+            "constraints": dict(self.constraints),
+            "route_issues": self.route_issues,
+            "repairs": repairs,
+            "ms": round(1000 * (time.perf_counter() - started), 1),
+        }
@@ -0,0 +1,181 @@
+"""
+Local post-validation and repair of LLM itineraries
+Checks every activity against the compiled place store and swaps in the
+best valid substitute for the same slot - no extra JamAI round trip
+"""
+
+from typing import List, Dict, Optional, Tuple, Sequence
+
+from .place_store import get_place_stores, find_places, PlaceRecord
+from .popularity import popularity
+from .recommendations import score_place
+from .routing import load_travel_matrix, optimize_itinerary
+from .utils import parse_time_ranges, enrich_itinerary_activity
+from .tracing import span
+
+# LLM slot labels that mean a meal
+FOOD_LABELS = {"food", "breakfast", "brunch", "lunch", "dinner", "supper", "meal", "snack"}
+
+# Substitute ranking: rule score first, then closeness to the previous stop
+SCORE_WEIGHT = 10
+UNKNOWN_TRAVEL_MINUTES = 30
+
+
+def activity_kind(activity: Dict, record: Optional[PlaceRecord]) -> str:
+    """"Food" or "Attraction" - the place's own type when known, else the slot label"""
+    if record is not None and record.type:
+        return record.type
+    return "Food" if (activity.get("type") or "").strip().lower() in FOOD_LABELS else "Attraction"
+
+
+def slot_start(activity: Dict) -> Optional[int]:
+    """Start of the activity's time window in minutes, or None if it has none"""
+    ranges = parse_time_ranges(activity.get("time") or "")
+    return ranges[0][0] if ranges else None
+
+
+def check_activity(
+    activity: Dict,
+    record: Optional[PlaceRecord],
+    dietary: str,
+    accessibility: str,
+    allowed: Optional[set] = None
+) -> List[str]:
+    """Reasons this activity is invalid (empty if it is fine)"""
+    place = (activity.get("place") or "").strip()
+    if record is None:
+        return [f"{place or 'Unnamed place'} is not in the dataset"]
+
+    problems = []
+    start = slot_start(activity)
+    if start is not None and record.hours and not record.is_open(start):
+        problems.append(f"{record.name} is closed at {start // 60:02d}:{start % 60:02d}")
+    if dietary == "Halal only" and activity_kind(activity, record) == "Food" and not record.is_halal:
+        problems.append(f"{record.name} is not halal")
+    if accessibility == "Wheelchair-friendly" and not record.is_wheelchair_accessible:
+        problems.append(f"{record.name} is not wheelchair accessible")
+    if allowed is not None and record.name_lower not in allowed:
+        problems.append(f"{record.name} is not among the allowed places")
+    return problems
+
+
+def best_substitute(
+    kind: str,
+    start: Optional[int],
+    previous: Optional[str],
+    used: set,
+    dietary: str,
+    accessibility: str,
+    transport: str,
+    stores: Sequence,
+    allowed: Optional[set]
+) -> Optional[PlaceRecord]:
+    """Best-scoring unused place of `kind` open at `start`, short hops from `previous` preferred (None if nothing fits)"""
+    matrix = load_travel_matrix()
+    current_time = f"{start // 60:02d}:{start % 60:02d}" if start is not None else None
+    minute = start if start is not None else 12 * 60
+    best, best_key = None, None
+    for store in stores:
+        row_ids = store.filter(
+            place_type=kind,
+            halal_status=dietary if kind == "Food" else "No preference",
+            accessibility=accessibility,
+            filter_open_now=start is not None,
+            current_time=current_time
+        )
+        for row_id in row_ids:
+            record = store.records[row_id]
+            if record.name_lower in used or (allowed is not None and record.name_lower not in allowed):
+                continue
+            score, _ = score_place(record, minute, minute // 60, dietary, accessibility)
+            travel = matrix.get(previous, record.name, transport) if previous else 0
+            key = SCORE_WEIGHT * score - (UNKNOWN_TRAVEL_MINUTES if travel is None else travel)
+            if best_key is None or key > best_key:
+                best, best_key = record, key
+    return best
+
+
+def validate_itinerary(
+    activities: List[Dict],
+    dietary: str = "No preference",
+    accessibility: str = "No preference",
+    transport: str = "Public transport",
+    region: Optional[str] = None,
+    allowed_names: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Check each activity (in the dataset, open at its slot start, halal / wheelchair
+    requirements, no repeats, within allowed_names if given) and replace failures
+    with the best valid place of the same type for that slot.
+
+    Returns (activities, repairs); each repair is
+    {"time", "original_place", "replacement_place" (None if nothing fits), "reasons"}.
+    """
+    stores = get_place_stores(region)
+    allowed = {name.lower().strip() for name in allowed_names} if allowed_names is not None else None
+    matches = find_places([a.get("place") or "" for a in activities], region)
+
+    repaired, repairs = [], []
+    used: set = set()
+    previous: Optional[str] = None
+    for activity, match in zip(activities, matches):
+        record = match[0].records[match[1]] if match else None
+        problems = check_activity(activity, record, dietary, accessibility, allowed)
+        if record is not None and record.name_lower in used:
+            problems.append(f"{record.name} is already in the itinerary")
+
+        if not problems:
+            used.add(record.name_lower)
+            previous = record.name
+            repaired.append(activity)
+            continue
+
+        start = slot_start(activity)
+        substitute = best_substitute(
+            activity_kind(activity, record), start, previous, used,
+            dietary, accessibility, transport, stores, allowed
+        )
+        repairs.append({
+            "time": activity.get("time"),
+            "original_place": activity.get("place"),
+            "replacement_place": substitute.name if substitute else None,
+            "reasons": problems,
+        })
+        if substitute is None:
+            repaired.append(activity)
+            continue
+
+        used.add(substitute.name_lower)
+        previous = substitute.name
+        fixed = dict(activity)
+        fixed["place"] = substitute.name
+        fixed["reasoning"] = f"Replaced {activity.get('place') or 'unnamed place'} ({'; '.join(problems)})"
+        repaired.append(fixed)
+
+    return repaired, repairs
+
+
+def finalize_itinerary(
+    activities: List[Dict],
+    dietary: str,
+    transport: str,
+    accessibility: str,
+    region: Optional[str] = None,
+    allowed_names: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict], List[str], List[Dict]]:
+    """
+    Everything that happens to LLM output before it is returned:
+    validate + repair, enrich from the dataset, then reorder / check legs.
+    Returns (activities, route_issues, repairs).
+    """
+    with span("itinerary.validate", activities=len(activities)) as s:
+        repaired, repairs = validate_itinerary(
+            activities, dietary, accessibility, transport, region, allowed_names
+        )
+        s.set("repairs", len(repairs))
+    with span("itinerary.enrich", activities=len(repaired)):
+        enriched = [enrich_itinerary_activity(act) for act in repaired]
+    with span("itinerary.route", transport=transport):
+        routed, route_issues = optimize_itinerary(enriched, transport)
+    popularity.record_matches(find_places([act.get("place", "") for act in routed], region), "itinerary")
+    return routed, route_issues, repairs
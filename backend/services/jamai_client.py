@@ -7,9 +7,14 @@ Key imports: jamaibase.JamAI and jamaibase.types (not protocol!)
 
 import os
 import json
-from typing import Dict, Any, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from dotenv import load_dotenv
 
+from .hedging import Hedger
+from .tracing import span, start_span, log
+
 load_dotenv()
 
 # ============================================
@@ -37,10 +42,92 @@ try:
 except Exception:
     JAMAI_AVAILABLE = False
 
-if not JAMAI_AVAILABLE:
+# Local stand-in answering from the place store (load tests, scripts.replay)
+JAMAI_STANDIN = os.getenv("JAMAI_STANDIN", "false").lower() == "true"
+if JAMAI_STANDIN:
+    from . import jamai_standin
+    t = jamai_standin.types
+elif not JAMAI_AVAILABLE:
     print("Warning: jamaibase not installed. Run: pip install jamaibase")
 
 
+# ============================================
+# HTTP TRANSPORT
+# jamaibase builds its own HTTP client and only exposes a timeout; TripPlanner
+# rows take tens of seconds, so it is long. Pool limits are the SDK's defaults.
+# ============================================
+JAMAI_TIMEOUT = float(os.getenv("JAMAI_TIMEOUT", "180"))
+
+
+# ============================================
+# DAG ORCHESTRATION (ITINERARY_ORCHESTRATION=dag)
+# The TripPlanner chain runs every step in sequence; here parse runs once,
+# the five slot picks run concurrently on a smaller table, conflicts are
+# fixed locally, then validate + final run once.
+# ============================================
+PARSE_TABLE_ID = os.getenv("JAMAI_PARSE_TABLE", "TripPlannerParse")  # -> "parse"
+SLOT_TABLE_ID = os.getenv("JAMAI_SLOT_TABLE", "TripPlannerSlot")     # -> "choice" (JSON)
+FINAL_TABLE_ID = os.getenv("JAMAI_FINAL_TABLE", "TripPlannerFinal")  # -> "validate", "final"
+
+# (step column, slot name, activity type) in itinerary order
+SLOT_STEPS = [
+    ("step2_breakfast", "breakfast", "Food"),
+    ("step3_morning", "morning", "Attraction"),
+    ("step4_lunch", "lunch", "Food"),
+    ("step5_afternoon", "afternoon", "Attraction"),
+    ("step6_dinner", "dinner", "Food"),
+]
+
+# Re-pick rounds for slots that clash after the concurrent pass
+MAX_REPAIR_ROUNDS = 2
+
+
+def _slot_windows(start_time: str) -> Dict[str, Tuple[int, int]]:
+    """Fixed time window (minutes since midnight) per slot step for a start time"""
+    from .utils import parse_time
+
+    start = parse_time(start_time)
+    t0 = start.hour * 60 + start.minute if start else 9 * 60
+    breakfast = (t0, t0 + 60)
+    morning = (breakfast[1] + 15, breakfast[1] + 165)
+    lunch_start = max(morning[1] + 15, 12 * 60 + 30)
+    lunch = (lunch_start, lunch_start + 60)
+    afternoon = (lunch[1] + 15, lunch[1] + 195)
+    dinner_start = max(afternoon[1] + 15, 19 * 60)
+    dinner = (dinner_start, dinner_start + 90)
+    return dict(zip([step for step, _, _ in SLOT_STEPS], [breakfast, morning, lunch, afternoon, dinner]))
+
+
+def _format_window(window: Tuple[int, int]) -> str:
+    return "-".join(f"{(m // 60) % 24:02d}:{m % 60:02d}" for m in window)
+
+
+def _run_dag(
+    nodes: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Any]]],
+    max_workers: int
+) -> Dict[str, Any]:
+    """
+    Run {name: (dependencies, fn(results so far))} on a thread pool,
+    starting each node as soon as its dependencies have finished.
+    """
+    results: Dict[str, Any] = {}
+    pending = dict(nodes)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, (deps, fn) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    # Each node runs in a copy of the caller's context (keeps trace spans nested)
+                    running[pool.submit(contextvars.copy_context().run, fn, dict(results))] = name
+                    del pending[name]
+            if not running:
+                raise ValueError(f"Unresolvable step dependencies: {', '.join(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
 def _safe_text(cell: Any) -> str:
     """
     Safely extract text from a JamAI cell object.
@@ -70,6 +157,14 @@ class JamAIClient:
     
     def __init__(self):
         """Initialize JamAI client with env vars."""
+        # "chain" = single TripPlanner row, "dag" = generate_itinerary_dag()
+        self.orchestration = os.getenv("ITINERARY_ORCHESTRATION", "chain").lower()
+        self.action_table_id = "TripPlanner"
+        # Non-streaming add_table_rows calls past the p95 get one duplicate (JAMAI_HEDGE_*)
+        self.hedger = Hedger()
+        if JAMAI_STANDIN:
+            self.client = jamai_standin.StandInJamAI()
+            return
         if not JAMAI_AVAILABLE:
             self.client = None
             return
@@ -83,8 +178,7 @@ class JamAIClient:
             )
         
         # Initialize client
-        self.client = JamAI(project_id=project_id, token=api_key)
-        self.action_table_id ="TripPlanner"
+        self.client = JamAI(project_id=project_id, token=api_key, timeout=JAMAI_TIMEOUT)
     
     def generate_itinerary(
         self,
@@ -92,7 +186,8 @@ class JamAIClient:
         dietary: str,
         transport: str,
         accessibility: str,
-        stream: bool = False
+        stream: bool = False,
+        candidate_places: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Call TripPlanner Action Table to generate day itinerary.
@@ -103,6 +198,8 @@ class JamAIClient:
             transport: "Public transport" / "Taxi/Grab" / "Own vehicle"
             accessibility: "Wheelchair-friendly" or "No preference"
             stream: Whether to stream output (for live UI updates)
+            candidate_places: Restrict the plan to these place names
+                (multi-day trips give each day a disjoint slice of PlacesKB)
         
         Returns:
             {
@@ -114,20 +211,29 @@ class JamAIClient:
         """
         if not self.client:
             raise RuntimeError("JamAI client not initialized. Check your API keys.")
+        if self.orchestration == "dag" and not stream:
+            # Streaming UIs follow the single-row chain's column-by-column output
+            return self.generate_itinerary_dag(
+                start_time, dietary, transport, accessibility, candidate_places=candidate_places
+            )
         
         # ============================================
         # CORRECT REQUEST FORMAT
         # - Use t.MultiRowAddRequest (not RowAddRequest)
         # - data is a LIST of dicts, even for single row
         # ============================================
+        row = {
+            "start_time": start_time,
+            "dietary": dietary,
+            "transport": transport,
+            "accessibility": accessibility
+        }
+        if candidate_places:
+            row["candidate_places"] = ", ".join(candidate_places)
+        
         request = t.MultiRowAddRequest(
             table_id=self.action_table_id,
-            data=[{  # Note: data is a LIST
-                "start_time": start_time,
-                "dietary": dietary,
-                "transport": transport,
-                "accessibility": accessibility
-            }],
+            data=[row],  # Note: data is a LIST
             stream=stream
         )
         
@@ -136,10 +242,16 @@ class JamAIClient:
         # - Use t.TableType.ACTION (uppercase!)
         # - Pass request object directly
         # ============================================
-        response = self.client.table.add_table_rows(
-            t.TableType.ACTION,  # UPPERCASE - this is critical!
-            request
-        )
+        with span("jamai.add_table_rows", table=self.action_table_id, stream=stream):
+            if stream:
+                response = self.client.table.add_table_rows(
+                    t.TableType.ACTION,  # UPPERCASE - this is critical!
+                    request
+                )
+            else:
+                response = self.hedger.call(
+                    self.action_table_id, self.client.table.add_table_rows, t.TableType.ACTION, request
+                )
         
         # ============================================
         # DEFENSIVE RESPONSE EXTRACTION
@@ -232,21 +344,31 @@ class JamAIClient:
             "step8_final": ""
         }
         
-        # Stream response
-        for chunk in self.client.table.add_table_rows(t.TableType.ACTION, request):
-            col_name = getattr(chunk, "output_column_name", None)
-            text = getattr(chunk, "text", "")
-            
-            if col_name and col_name in accumulated and text:
-                accumulated[col_name] += text
-                if on_chunk:
-                    on_chunk(col_name, text)
+        # Stream response - one span per step column, from its first token to the next step's
+        with span("jamai.add_table_rows", table=self.action_table_id, stream=True):
+            step_span, step_name = None, None
+            try:
+                for chunk in self.client.table.add_table_rows(t.TableType.ACTION, request):
+                    col_name = getattr(chunk, "output_column_name", None)
+                    text = getattr(chunk, "text", "")
+                    
+                    if col_name and col_name in accumulated and text:
+                        if col_name != step_name:
+                            if step_span is not None:
+                                step_span.end()
+                            step_span, step_name = start_span("jamai.step", step=col_name), col_name
+                        accumulated[col_name] += text
+                        if on_chunk:
+                            on_chunk(col_name, text)
+            finally:
+                if step_span is not None:
+                    step_span.end()
         
         # Parse final JSON
         try:
             itinerary_json = json.loads(accumulated["step8_final"])
         except json.JSONDecodeError:
-            print("[jamai_client] Warning: failed to parse final JSON from streaming; final_key=", accumulated["step8_final"])
+            log("[jamai_client] Warning: failed to parse final JSON from streaming; final_key=", accumulated["step8_final"])
             itinerary_json = {"itinerary": [], "summary": "Error parsing itinerary", "transport_notes": ""}
 
         # Convert accumulated (defaultdict) to a plain dict for return
@@ -258,6 +380,176 @@ class JamAIClient:
             "transport_notes": itinerary_json.get("transport_notes", ""),
             "reasoning_chain": reasoning_chain  # instead of accumulated
         }
+
+    # ============================================
+    # DAG ORCHESTRATOR
+    # ============================================
+    
+    def _call_table(self, table_id: str, row: Dict[str, str]) -> Dict[str, str]:
+        """Add one row to an Action Table and return its output columns as text"""
+        request = t.MultiRowAddRequest(table_id=table_id, data=[row], stream=False)
+        with span("jamai.add_table_rows", table=table_id, stream=False):
+            response = self.hedger.call(table_id, self.client.table.add_table_rows, t.TableType.ACTION, request)
+        row0 = response.rows[0] if getattr(response, "rows", None) else None
+        if not row0:
+            raise ValueError(f"No response from {table_id} Action Table")
+        cols = getattr(row0, "columns", {}) or {}
+        return {name: _safe_text(cell) for name, cell in cols.items()}
+    
+    def choose_slot(
+        self,
+        step: str,
+        parse: str,
+        window: Tuple[int, int],
+        exclude: List[str],
+        candidate_places: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """One slot pick on the slot table -> activity dict (+ raw model text)"""
+        _, slot, kind = next(s for s in SLOT_STEPS if s[0] == step)
+        row = {
+            "parse": parse,
+            "slot": slot,
+            "kind": kind,
+            "time": _format_window(window),
+            "exclude": ", ".join(exclude),
+        }
+        if candidate_places:
+            row["candidates"] = ", ".join(candidate_places)
+        text = self._call_table(SLOT_TABLE_ID, row).get("choice", "")
+        
+        try:
+            choice = json.loads(text)
+        except json.JSONDecodeError:
+            choice = {}
+        if not isinstance(choice, dict):
+            choice = {}
+        return {
+            "time": _format_window(window),
+            "place": (choice.get("place") or "").strip(),
+            "type": kind,
+            "reasoning": choice.get("reasoning") or "",
+            "raw": text,
+        }
+    
+    @staticmethod
+    def _slot_conflicts(
+        choices: Dict[str, Dict[str, Any]],
+        windows: Dict[str, Tuple[int, int]]
+    ) -> Dict[str, str]:
+        """step -> problem, for empty picks, repeats and places closed at the slot start"""
+        from .utils import lookup_place_by_name, parse_opening_hours, is_open_at
+        
+        conflicts = {}
+        seen = set()
+        for step, _, _ in SLOT_STEPS:
+            place = choices[step]["place"]
+            if not place:
+                conflicts[step] = "no place chosen"
+                continue
+            if place.lower() in seen:
+                conflicts[step] = f"{place} is already in the itinerary"
+                continue
+            seen.add(place.lower())
+            
+            found = lookup_place_by_name(place)
+            hours = parse_opening_hours(found.get("opening_hours")) if found else []
+            if hours and not is_open_at(hours, windows[step][0]):
+                conflicts[step] = f"{place} is closed at {_format_window(windows[step]).split('-')[0]}"
+        return conflicts
+    
+    def generate_itinerary_dag(
+        self,
+        start_time: str,
+        dietary: str,
+        transport: str,
+        accessibility: str,
+        candidate_places: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Same result as generate_itinerary(), built from a step DAG:
+        
+            parse -> {breakfast, morning, lunch, afternoon, dinner} -> resolve -> final
+        
+        Slot picks run concurrently, so latency is parse + slowest slot
+        + final instead of the sum of all eight steps.
+        """
+        if not self.client:
+            raise RuntimeError("JamAI client not initialized. Check your API keys.")
+        
+        windows = _slot_windows(start_time)
+        slot_steps = [step for step, _, _ in SLOT_STEPS]
+        
+        def parse(_):
+            return self._call_table(PARSE_TABLE_ID, {
+                "start_time": start_time,
+                "dietary": dietary,
+                "transport": transport,
+                "accessibility": accessibility
+            }).get("parse", "")
+        
+        def slot(step):
+            return lambda done: self.choose_slot(
+                step, done["step1_parse"], windows[step], [], candidate_places
+            )
+        
+        def resolve(done):
+            choices = {step: done[step] for step in slot_steps}
+            conflicts = self._slot_conflicts(choices, windows)
+            for _ in range(MAX_REPAIR_ROUNDS):
+                if not conflicts:
+                    break
+                # Re-pick every clashing slot at once, excluding everything already placed
+                placed = [c["place"] for step, c in choices.items() if c["place"] and step not in conflicts]
+                rejected = [choices[step]["place"] for step in conflicts if choices[step]["place"]]
+                with ThreadPoolExecutor(max_workers=len(conflicts)) as pool:
+                    repicks = {
+                        step: pool.submit(
+                            self.choose_slot, step, done["step1_parse"], windows[step],
+                            placed + rejected, candidate_places
+                        )
+                        for step in conflicts
+                    }
+                    for step, future in repicks.items():
+                        choices[step] = future.result()
+                conflicts = self._slot_conflicts(choices, windows)
+            return choices, [f"{step}: {problem}" for step, problem in conflicts.items()]
+        
+        def final(done):
+            choices, issues = done["resolve"]
+            activities = [{k: v for k, v in choices[step].items() if k != "raw"} for step in slot_steps]
+            return activities, self._call_table(FINAL_TABLE_ID, {
+                "parse": done["step1_parse"],
+                "transport": transport,
+                "slots": json.dumps(activities),
+                "issues": "; ".join(issues),
+            })
+        
+        nodes = {"step1_parse": ([], parse)}
+        nodes.update({step: (["step1_parse"], slot(step)) for step in slot_steps})
+        nodes["resolve"] = (slot_steps, resolve)
+        nodes["final"] = (["resolve"], final)
+        results = _run_dag(nodes, max_workers=len(slot_steps))
+        
+        activities, final_cols = results["final"]
+        choices, _ = results["resolve"]
+        step8_final = final_cols.get("final", "")
+        try:
+            itinerary_json = json.loads(step8_final)
+        except json.JSONDecodeError:
+            # Slots are already resolved - assemble locally rather than fail
+            itinerary_json = {"itinerary": activities, "summary": "", "transport_notes": ""}
+        
+        reasoning_chain = {"step1_parse": results["step1_parse"]}
+        reasoning_chain.update({step: choices[step]["raw"] for step in slot_steps})
+        reasoning_chain["step7_validate"] = final_cols.get("validate", "")
+        reasoning_chain["step8_final"] = step8_final
+        
+        return {
+            "itinerary": itinerary_json.get("itinerary", []),
+            "summary": itinerary_json.get("summary", ""),
+            "transport_notes": itinerary_json.get("transport_notes", ""),
+            "reasoning_chain": reasoning_chain
+        }
            
 
 
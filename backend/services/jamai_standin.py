@@ -0,0 +1,205 @@
+"""
+Local JamAI Base stand-in - answers Action Table calls from the place store
+Enable with JAMAI_STANDIN=true for load tests and traffic replay (no network, no credentials)
+Knowledge tables are kept in memory (PlacesKB sync tests)
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from .place_store import get_place_stores, minute_of_day
+
+# Simulated model time per generated column (the chain has 8, the DAG 7 over 3 tables)
+STEP_SECONDS = float(os.getenv("JAMAI_STANDIN_STEP_SECONDS", "0.15"))
+# Streamed chunks per column
+STREAM_CHUNKS = 4
+
+STEP_COLUMNS = [
+    "step1_parse", "step2_breakfast", "step3_morning", "step4_lunch",
+    "step5_afternoon", "step6_dinner", "step7_validate", "step8_final",
+]
+
+
+class MultiRowAddRequest:
+    def __init__(self, table_id: str, data: List[Dict[str, Any]], stream: bool = False):
+        self.table_id = table_id
+        self.data = data
+        self.stream = stream
+
+
+class MultiRowDeleteRequest:
+    def __init__(self, table_id: str, row_ids: List[str]):
+        self.table_id = table_id
+        self.row_ids = row_ids
+
+
+# Mirrors the parts of jamaibase.types the client uses
+types = SimpleNamespace(
+    MultiRowAddRequest=MultiRowAddRequest,
+    MultiRowDeleteRequest=MultiRowDeleteRequest,
+    TableType=SimpleNamespace(ACTION="action", KNOWLEDGE="knowledge"),
+)
+
+
+def _cell(text: str) -> SimpleNamespace:
+    return SimpleNamespace(text=text)
+
+
+def _pick(
+    rng: random.Random,
+    kind: str,
+    minute: Optional[int],
+    dietary: str,
+    accessibility: str,
+    exclude: set,
+    candidates: Optional[set]
+) -> Optional[str]:
+    """A plausible place for one slot - right type, open, meets the requirements"""
+    names = []
+    for store in get_place_stores():
+        row_ids = store.filter(
+            place_type=kind,
+            halal_status=dietary if kind == "Food" else "No preference",
+            accessibility=accessibility
+        )
+        for row_id in row_ids:
+            record = store.records[row_id]
+            if record.name_lower in exclude or (candidates is not None and record.name_lower not in candidates):
+                continue
+            if minute is not None and record.hours and not record.is_open(minute):
+                continue
+            names.append(record.name)
+    return rng.choice(names) if names else None
+
+
+def _split_names(value: str) -> set:
+    return {name.strip().lower() for name in value.split(",") if name.strip()}
+
+
+class _StandInTables:
+    def __init__(self, step_seconds: float):
+        self.step_seconds = step_seconds
+        # table_id -> row_id -> row, for knowledge tables
+        self.knowledge: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.requests = 0
+
+    def add_table_rows(self, table_type: str, request: MultiRowAddRequest):
+        self.requests += 1
+        if table_type == types.TableType.KNOWLEDGE:
+            return self._add_knowledge(request)
+        row = request.data[0]
+        if request.stream:
+            return self._stream(request.table_id, row)
+        columns = self._columns(request.table_id, row)
+        time.sleep(self.step_seconds * len(columns))
+        return SimpleNamespace(rows=[SimpleNamespace(columns={k: _cell(v) for k, v in columns.items()})])
+
+    def _add_knowledge(self, request: MultiRowAddRequest) -> SimpleNamespace:
+        table = self.knowledge.setdefault(request.table_id, {})
+        rows = []
+        for data in request.data:
+            row_id = uuid.uuid4().hex
+            table[row_id] = dict(data)
+            rows.append(SimpleNamespace(row_id=row_id, columns={k: _cell(str(v)) for k, v in data.items()}))
+        return SimpleNamespace(rows=rows)
+
+    def delete_table_rows(self, table_type: str, request: MultiRowDeleteRequest) -> SimpleNamespace:
+        self.requests += 1
+        table = self.knowledge.get(request.table_id, {})
+        for row_id in request.row_ids:
+            table.pop(row_id, None)
+        return SimpleNamespace(ok=True)
+
+    def list_table_rows(self, table_type: str, table_id: str, offset: int = 0, limit: int = 100) -> SimpleNamespace:
+        """Same page shape as the SDK: items are {"ID", column: {"value": ...}}"""
+        self.requests += 1
+        rows = list(self.knowledge.get(table_id, {}).items())
+        items = [
+            {"ID": row_id, **{k: {"value": v} for k, v in row.items()}}
+            for row_id, row in rows[offset:offset + limit]
+        ]
+        return SimpleNamespace(items=items, offset=offset, limit=limit, total=len(rows))
+
+    def _stream(self, table_id: str, row: Dict[str, Any]) -> Iterator[SimpleNamespace]:
+        for name, text in self._columns(table_id, row).items():
+            size = max(1, len(text) // STREAM_CHUNKS + 1)
+            for start in range(0, len(text), size):
+                time.sleep(self.step_seconds / STREAM_CHUNKS)
+                yield SimpleNamespace(output_column_name=name, text=text[start:start + size])
+
+    def _columns(self, table_id: str, row: Dict[str, Any]) -> Dict[str, str]:
+        from .jamai_client import PARSE_TABLE_ID, SLOT_TABLE_ID, FINAL_TABLE_ID
+
+        if table_id == PARSE_TABLE_ID:
+            return {"parse": self._parse(row)}
+        if table_id == SLOT_TABLE_ID:
+            return {"choice": self._slot(row)}
+        if table_id == FINAL_TABLE_ID:
+            return {"validate": "All slots checked (stand-in)", "final": json.dumps({
+                "itinerary": json.loads(row.get("slots") or "[]"),
+                "summary": "Stand-in itinerary",
+                "transport_notes": f"Getting around by {row.get('transport', '')}",
+            })}
+        return self._trip_planner(row)
+
+    @staticmethod
+    def _parse(row: Dict[str, Any]) -> str:
+        return (
+            f"Start {row.get('start_time', '')}, dietary {row.get('dietary', '')}, "
+            f"transport {row.get('transport', '')}, accessibility {row.get('accessibility', '')}"
+        )
+
+    @staticmethod
+    def _slot(row: Dict[str, Any]) -> str:
+        rng = random.Random(json.dumps(row, sort_keys=True))
+        parse = row.get("parse", "")
+        dietary = "Halal only" if "Halal only" in parse else "No preference"
+        accessibility = "Wheelchair-friendly" if "Wheelchair-friendly" in parse else "No preference"
+        candidates = _split_names(row["candidates"]) if row.get("candidates") else None
+        place = _pick(
+            rng, row.get("kind", "Food"), minute_of_day((row.get("time") or "").split("-")[0]),
+            dietary, accessibility, _split_names(row.get("exclude", "")), candidates
+        )
+        return json.dumps({"place": place or "", "reasoning": f"Stand-in pick for {row.get('slot', '')}"})
+
+    def _trip_planner(self, row: Dict[str, Any]) -> Dict[str, str]:
+        from .jamai_client import SLOT_STEPS, _slot_windows, _format_window
+
+        rng = random.Random(json.dumps(row, sort_keys=True))
+        dietary = row.get("dietary", "No preference")
+        accessibility = row.get("accessibility", "No preference")
+        candidates = _split_names(row["candidate_places"]) if row.get("candidate_places") else None
+        windows = _slot_windows(row.get("start_time", "09:00"))
+
+        columns = {"step1_parse": self._parse(row)}
+        activities, used = [], set()
+        for step, slot, kind in SLOT_STEPS:
+            place = _pick(rng, kind, windows[step][0], dietary, accessibility, used, candidates)
+            if place:
+                used.add(place.lower())
+                activities.append({
+                    "time": _format_window(windows[step]),
+                    "place": place,
+                    "type": kind,
+                    "reasoning": f"Stand-in pick for {slot}",
+                })
+            columns[step] = place or "No suitable place"
+        columns["step7_validate"] = "All slots checked (stand-in)"
+        columns["step8_final"] = json.dumps({
+            "itinerary": activities,
+            "summary": "Stand-in itinerary",
+            "transport_notes": f"Getting around by {row.get('transport', '')}",
+        })
+        return columns
+
+
+class StandInJamAI:
+    """Drop-in for jamaibase.JamAI: only `.table.add_table_rows` is implemented"""
+
+    def __init__(self, step_seconds: float = STEP_SECONDS):
+        self.table = _StandInTables(step_seconds)
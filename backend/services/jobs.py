@@ -0,0 +1,174 @@
+"""
+Background itinerary jobs - submit, poll or stream progress, fetch the result later
+Results live in an in-process store with a TTL; identical in-flight requests share a job
+"""
+
+import os
+import time
+import uuid
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from .jamai_client import jamai_client
+from .itinerary_validator import finalize_itinerary
+from .tracing import root_span
+
+JOB_WORKERS = int(os.getenv("ITINERARY_JOB_WORKERS", "4"))
+# Queued + running jobs allowed before submissions are refused
+MAX_PENDING_JOBS = int(os.getenv("ITINERARY_MAX_PENDING_JOBS", "64"))
+JOB_TTL_SECONDS = float(os.getenv("ITINERARY_JOB_TTL_SECONDS", "900"))
+MAX_STORED_JOBS = 1000
+
+# TripPlanner output columns in generation order (progress reporting)
+STEP_COLUMNS = [
+    "step1_parse", "step2_breakfast", "step3_morning", "step4_lunch",
+    "step5_afternoon", "step6_dinner", "step7_validate", "step8_final",
+]
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class JobQueueFull(Exception):
+    """Too many jobs pending - the caller should retry later"""
+
+
+class Job:
+    """One itinerary generation. Mutated only by its worker thread (under the store lock)."""
+
+    def __init__(self, job_id: str, key: str, params: Dict[str, str]):
+        self.id = job_id
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.current_step: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Bumped on every change; SSE subscribers diff against it
+        self.version = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def progress(self) -> Dict[str, Any]:
+        done = STEP_COLUMNS.index(self.current_step) if self.current_step in STEP_COLUMNS else 0
+        if self.status == SUCCEEDED:
+            done = len(STEP_COLUMNS)
+        return {"current_step": self.current_step, "steps_done": done, "steps_total": len(STEP_COLUMNS)}
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "progress": self.progress(),
+            "result": self.result if include_result else None,
+            "error": self.error,
+        }
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Stable fingerprint of a request - equal inputs share a job"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class JobStore:
+    """
+    Job registry plus worker pool.
+
+    Usage:
+        job, attached = job_store.submit(request.model_dump())
+        job = job_store.get(job.id)
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, ttl: float = JOB_TTL_SECONDS):
+        self.workers = workers
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="itinerary-job")
+        return self._pool
+
+    def submit(self, params: Dict[str, Any]) -> Tuple[Job, bool]:
+        """(job, attached) - attached is True when an identical job was reused"""
+        if not jamai_client.client:
+            raise RuntimeError("JamAI client not initialized. Check your API keys.")
+        key = request_key(params)
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status != FAILED:
+                return existing, True
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= MAX_PENDING_JOBS:
+                raise JobQueueFull(f"{pending} itinerary jobs pending, try again later")
+            job = Job(uuid.uuid4().hex, key, params)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._executor().submit(self._run, job)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _update(self, job: Job, **changes) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            job.version += 1
+
+    def _run(self, job: Job) -> None:
+        self._update(job, status=RUNNING)
+
+        def on_chunk(col_name: str, text: str):
+            if col_name != job.current_step:
+                self._update(job, current_step=col_name)
+
+        try:
+            # Jobs outlive the submitting request, so each gets its own trace
+            with root_span("itinerary.job", **{"job.id": job.id}):
+                result = jamai_client.generate_itinerary_streaming(on_chunk=on_chunk, **job.params)
+                result["itinerary"], result["route_issues"], result["repairs"] = finalize_itinerary(
+                    result.get("itinerary", []),
+                    job.params.get("dietary", "No preference"),
+                    job.params.get("transport", ""),
+                    job.params.get("accessibility", "No preference")
+                )
+            self._update(job, status=SUCCEEDED, result=result)
+        except Exception as e:
+            print(f"[jobs] Job {job.id} failed:", e)
+            self._update(job, status=FAILED, error=str(e))
+
+    def _expire(self) -> None:
+        """Drop finished jobs past their TTL, then the oldest finished ones over capacity"""
+        now = time.time()
+        finished = [j for j in self._jobs.values() if j.finished]
+        stale = [j for j in finished if now - j.updated_at > self.ttl]
+        overflow = len(self._jobs) - len(stale) - MAX_STORED_JOBS
+        if overflow > 0:
+            fresh = sorted((j for j in finished if j not in stale), key=lambda j: j.updated_at)
+            stale.extend(fresh[:overflow])
+        for job in stale:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+
+# ============================================
+# Singleton instance for import
+# ============================================
+job_store = JobStore()
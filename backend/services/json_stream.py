@@ -0,0 +1,34 @@
+"""
+Incremental JSON encoding for large responses
+Writes {"<array>": [...], ...} chunk by chunk so only one chunk of rows is in memory
+"""
+
+from typing import Dict, Iterable, Iterator, List, Any, Optional
+
+import orjson
+
+
+def iter_json_object(
+    array_key: str,
+    chunks: Iterable[List[Dict[str, Any]]],
+    fields: Dict[str, Any],
+    row_defaults: Optional[Dict[str, Any]] = None
+) -> Iterator[bytes]:
+    """
+    Yield the bytes of {array_key: [rows...], **fields}.
+
+    row_defaults fills keys a response model would add (e.g. optional fields
+    left at None) so the streamed document matches the buffered one.
+    """
+    yield b'{"' + array_key.encode() + b'":['
+    first = True
+    for rows in chunks:
+        if not rows:
+            continue
+        if row_defaults:
+            rows = [{**row_defaults, **row} for row in rows]
+        body = orjson.dumps(rows)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    tail = orjson.dumps(fields)
+    yield b"]" + (b"," + tail[1:] if len(tail) > 2 else b"}")
@@ -0,0 +1,244 @@
+"""
+PlacesKB sync - push only added / changed / deleted places to the JamAI knowledge table
+A manifest of per-place content hashes and row IDs records what was last uploaded
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .place_store import PlaceStore, get_place_stores
+from .utils import DATA_DIR, PLACE_FIELDS
+
+KB_TABLE_ID = os.getenv("JAMAI_KB_TABLE", "PlacesKB")
+MANIFEST_PATH = os.getenv("PLACESKB_MANIFEST", os.path.join(DATA_DIR, "placeskb_manifest.json"))
+BATCH_SIZE = int(os.getenv("PLACESKB_BATCH_SIZE", "100"))
+MAX_ATTEMPTS = int(os.getenv("PLACESKB_MAX_ATTEMPTS", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("PLACESKB_RETRY_BASE_SECONDS", "1"))
+# Manifest key prefix for table rows that match no local place (deleted by the next sync)
+ORPHAN_PREFIX = "orphan:"
+
+
+def kb_row(record, region: str) -> Dict[str, str]:
+    """Knowledge-table row: Title is the exact local name (what enrichment looks up)"""
+    fields = record.to_dict()
+    lines = [f"{column}: {fields[field]}" for column, field in PLACE_FIELDS.items() if fields.get(field)]
+    lines.append(f"Region: {region}")
+    return {"Title": record.name, "Text": "\n".join(lines)}
+
+
+def row_hash(row: Dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(row, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def local_rows(stores: Optional[Sequence[PlaceStore]] = None) -> Dict[str, Dict[str, str]]:
+    """region:name -> knowledge row for every place (first of duplicate names wins)"""
+    rows: Dict[str, Dict[str, str]] = {}
+    for store in stores if stores is not None else get_place_stores():
+        for record in store.records:
+            rows.setdefault(f"{store.region}:{record.name_lower}", kb_row(record, store.region))
+    return rows
+
+
+class Manifest:
+    """What the knowledge table holds, per place key: {"hash", "row_id"}. Saved atomically."""
+
+    def __init__(self, path: str = MANIFEST_PATH, table_id: str = KB_TABLE_ID):
+        self.path = path
+        self.table_id = table_id
+        self.rows: Dict[str, Dict[str, Optional[str]]] = {}
+        self.loaded = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            # A manifest for another table says nothing about this one
+            if saved.get("table_id") == table_id:
+                self.rows = saved.get("rows", {})
+                self.loaded = True
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"table_id": self.table_id, "updated_at": time.time(), "rows": self.rows}, f)
+        os.replace(tmp, self.path)
+
+
+class SyncPlan:
+    def __init__(self, local: Dict[str, Dict[str, str]], manifest: Manifest, full: bool = False):
+        hashes = {key: row_hash(row) for key, row in local.items()}
+        self.local = local
+        self.hashes = hashes
+        self.added = sorted(key for key in local if key not in manifest.rows)
+        self.changed = sorted(
+            key for key in local
+            if key in manifest.rows and (full or manifest.rows[key].get("hash") != hashes[key])
+        )
+        self.deleted = sorted(key for key in manifest.rows if key not in local)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.changed or self.deleted)
+
+    def summary(self) -> Dict[str, int]:
+        return {"added": len(self.added), "changed": len(self.changed), "deleted": len(self.deleted)}
+
+
+def _cell_value(cell: Any) -> Any:
+    """SDK row cells are {"value": ...}; plain values pass through"""
+    return cell.get("value") if isinstance(cell, dict) else cell
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class KnowledgeSync:
+    """
+    Applies a SyncPlan in bulk batches: stale rows (deleted + old versions of
+    changed places) are removed, then new versions added. The manifest is
+    saved after every batch, so an interrupted sync resumes where it stopped.
+
+    Usage:
+        KnowledgeSync(jamai.client, jamai_client.t).run()
+    """
+
+    def __init__(
+        self,
+        client,
+        types,
+        table_id: str = KB_TABLE_ID,
+        manifest_path: str = MANIFEST_PATH,
+        batch_size: int = BATCH_SIZE,
+        max_attempts: int = MAX_ATTEMPTS,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.client = client
+        self.t = types
+        self.table_id = table_id
+        self.manifest = Manifest(manifest_path, table_id)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.retries = 0
+
+    def _with_retries(self, what: str, fn: Callable[[], Any]) -> Any:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                self.retries += 1
+                delay = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+                print(f"[kb_sync] {what} failed ({e}); retry {attempt}/{self.max_attempts - 1} in {delay:.0f}s")
+                self.sleep(delay)
+
+    def _remote_rows(self) -> Iterable[Dict[str, Any]]:
+        offset = 0
+        while True:
+            page = self._with_retries(
+                f"listing rows from {offset}",
+                lambda: self.client.table.list_table_rows(
+                    self.t.TableType.KNOWLEDGE, self.table_id, offset=offset, limit=self.batch_size
+                )
+            )
+            items = list(getattr(page, "items", page))
+            yield from items
+            offset += len(items)
+            if len(items) < self.batch_size:
+                return
+
+    def adopt(self, local: Dict[str, Dict[str, str]]) -> Dict[str, int]:
+        """
+        Rebuild the manifest from what the table holds now (a table loaded by
+        hand, or a lost manifest). A row whose Title is a local place name is
+        adopted with the hash of its current content, so the diff replaces it
+        only if it differs. Any other row is an orphan: a name that matches no
+        local place, or a second copy of one. Orphans are deleted by the sync.
+        """
+        by_title: Dict[str, List[str]] = {}
+        for key, row in local.items():
+            by_title.setdefault(row["Title"].strip().lower(), []).append(key)
+
+        self.manifest.rows = {}
+        adopted = orphans = 0
+        for item in self._remote_rows():
+            row_id = item.get("ID")
+            title = str(_cell_value(item.get("Title")) or "")
+            text = str(_cell_value(item.get("Text")) or "")
+            keys = [k for k in by_title.get(title.strip().lower(), []) if k not in self.manifest.rows]
+            if keys:
+                self.manifest.rows[keys[0]] = {"hash": row_hash({"Title": title, "Text": text}), "row_id": row_id}
+                adopted += 1
+            else:
+                self.manifest.rows[f"{ORPHAN_PREFIX}{row_id}"] = {"hash": None, "row_id": row_id}
+                orphans += 1
+        return {"adopted": adopted, "orphans": orphans}
+
+    def _delete(self, keys: List[str]) -> None:
+        row_ids = [self.manifest.rows[key]["row_id"] for key in keys if self.manifest.rows[key].get("row_id")]
+        if row_ids:
+            request = self.t.MultiRowDeleteRequest(table_id=self.table_id, row_ids=row_ids)
+            self._with_retries(
+                f"delete of {len(row_ids)} rows",
+                lambda: self.client.table.delete_table_rows(self.t.TableType.KNOWLEDGE, request)
+            )
+        for key in keys:
+            del self.manifest.rows[key]
+        self.manifest.save()
+
+    def _add(self, keys: List[str], plan: SyncPlan) -> None:
+        request = self.t.MultiRowAddRequest(
+            table_id=self.table_id, data=[plan.local[key] for key in keys], stream=False
+        )
+        response = self._with_retries(
+            f"add of {len(keys)} rows",
+            lambda: self.client.table.add_table_rows(self.t.TableType.KNOWLEDGE, request)
+        )
+        rows = getattr(response, "rows", None) or []
+        for i, key in enumerate(keys):
+            row_id = getattr(rows[i], "row_id", None) if i < len(rows) else None
+            self.manifest.rows[key] = {"hash": plan.hashes[key], "row_id": row_id}
+        self.manifest.save()
+
+    def run(
+        self,
+        stores: Optional[Sequence[PlaceStore]] = None,
+        dry_run: bool = False,
+        full: bool = False,
+        adopt: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        adopt: match the table's existing rows first (see adopt()). Default:
+        only when there is no manifest yet, so the first sync against a table
+        loaded by hand neither duplicates nor leaves stale rows behind.
+        """
+        started = time.perf_counter()
+        local = local_rows(stores)
+        adoption = None
+        if adopt or (adopt is None and not self.manifest.loaded and self.client is not None):
+            if self.client is None:
+                raise RuntimeError("JamAI client not initialized. Check your API keys.")
+            adoption = self.adopt(local)
+            if not dry_run:
+                self.manifest.save()
+        plan = SyncPlan(local, self.manifest, full=full)
+        result = {"table_id": self.table_id, **plan.summary(), "dry_run": dry_run}
+        if adoption is not None:
+            result.update(adoption)
+        if not dry_run and not plan.empty:
+            if self.client is None:
+                raise RuntimeError("JamAI client not initialized. Check your API keys.")
+            stale = plan.deleted + plan.changed
+            for batch in _chunks(stale, self.batch_size):
+                self._delete(batch)
+            for batch in _chunks(plan.added + plan.changed, self.batch_size):
+                self._add(batch, plan)
+        result["retries"] = self.retries
+        result["rows"] = len(plan.local)
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
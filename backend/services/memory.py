@@ -0,0 +1,160 @@
+"""
+Memory report - approximate bytes held by the place snapshot, its indexes and the caches
+Objects reachable from several structures are counted once, under the first one measured
+"""
+
+import sys
+import time
+import types
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+# Never walked into: code and module objects lead to everything else in the process
+_OPAQUE = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    types.CodeType, types.FrameType, types.GeneratorType,
+)
+
+
+def _slot_names(obj: Any):
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        yield from ((slots,) if isinstance(slots, str) else slots)
+
+
+class SizeWalk:
+    """
+    Bytes reachable from an object: containers, __dict__ / __slots__ attributes,
+    numpy buffers and DataFrame columns. One walk remembers what it has counted,
+    so objects shared between structures (interned strings, records held by
+    several indexes) are counted once, under the first structure sized.
+
+    Usage:
+        walk = SizeWalk()
+        store_bytes, frame_bytes = walk.size(store.records), walk.size(df)
+    """
+
+    def __init__(self):
+        self.seen: Set[int] = set()
+        # Temporary views (columns, codes) stay alive so their ids are not reused mid-walk
+        self._held: List[Any] = []
+
+    def _temporaries(self, *objs: Any) -> List[Any]:
+        self._held.extend(objs)
+        return list(objs)
+
+    def size(self, obj: Any) -> int:
+        seen = self.seen
+        total = 0
+        stack = [obj]
+        while stack:
+            o = stack.pop()
+            if id(o) in seen:
+                continue
+            seen.add(id(o))
+
+            if isinstance(o, _OPAQUE):
+                continue
+            if isinstance(o, (str, bytes, int, float, bool)) or o is None:
+                total += sys.getsizeof(o)
+            elif isinstance(o, np.ndarray):
+                total += sys.getsizeof(o)  # Header only for views - the owner is counted via .base
+                if o.base is not None:
+                    stack.append(o.base)
+                if o.dtype == object:
+                    stack.extend(o.ravel().tolist())
+            elif isinstance(o, pd.DataFrame):
+                total += int(o.index.memory_usage())
+                stack.extend(self._temporaries(*(o[column] for column in o.columns)))
+            elif isinstance(o, pd.Series):
+                if isinstance(o.dtype, pd.CategoricalDtype):
+                    stack.extend(self._temporaries(o.cat.codes.to_numpy(), o.cat.categories.to_numpy()))
+                else:
+                    stack.extend(self._temporaries(o.to_numpy()))
+            elif isinstance(o, pd.Index):
+                stack.extend(self._temporaries(o.to_numpy()))
+            elif isinstance(o, dict):
+                total += sys.getsizeof(o)
+                stack.extend(o.keys())
+                stack.extend(o.values())
+            elif isinstance(o, (list, tuple, set, frozenset)):
+                total += sys.getsizeof(o)
+                stack.extend(o)
+            else:
+                total += sys.getsizeof(o)
+                if hasattr(o, "__dict__"):
+                    stack.append(vars(o))
+                for name in _slot_names(o):
+                    if name not in ("__dict__", "__weakref__") and hasattr(o, name):
+                        stack.append(getattr(o, name))
+        return total
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Bytes reachable from `obj` (see SizeWalk)"""
+    return SizeWalk().size(obj)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def memory_report() -> Dict[str, Any]:
+    """
+    Per region: compiled records, name index, each derived index (facets,
+    semantic, suggest, ...) and the source DataFrame - in that order, so the
+    DataFrame only shows what it does not share with the records. Then the
+    process-wide caches. Only regions already loaded are measured.
+    """
+    from . import utils, images, routing
+    from .place_store import _STORE_CACHE
+    from .itinerary_cache import itinerary_cache
+    from .popularity import popularity
+    from .jobs import job_store
+    from .profiler import profile_store
+
+    started = time.perf_counter()
+    walk = SizeWalk()
+    regions = {}
+    for region in sorted(set(_STORE_CACHE) | set(utils._SHARD_CACHE)):
+        store = _STORE_CACHE.get(region)
+        report: Dict[str, Any] = {}
+        if store is not None:
+            report["rows"] = len(store)
+            report["records"] = walk.size(store.records)
+            report["name_index"] = walk.size(store.name_index)
+            report["derived"] = {key: walk.size(value) for key, value in sorted(store._derived.items())}
+        frame = utils._SHARD_CACHE.get(region)
+        if frame is not None:
+            report["dataframe"] = walk.size(frame)
+        report["total"] = (
+            report.get("records", 0) + report.get("name_index", 0) + report.get("dataframe", 0)
+            + sum(report.get("derived", {}).values())
+        )
+        regions[region] = report
+
+    caches = {
+        "merged_dataframe": walk.size(utils._DF_CACHE),
+        "travel_matrix": walk.size(routing._MATRIX_CACHE),
+        "image_urls": walk.size(images._URL_CACHE),
+        "itinerary_cache": walk.size(itinerary_cache),
+        "popularity": walk.size(popularity),
+        "jobs": walk.size(job_store),
+        "profiles": walk.size(profile_store),
+    }
+    return {
+        "regions": regions,
+        "caches": caches,
+        "total_bytes": sum(r["total"] for r in regions.values()) + sum(caches.values()),
+        "rss_bytes": _rss_bytes(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
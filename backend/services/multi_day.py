@@ -0,0 +1,141 @@
+"""
+Multi-day itineraries - one TripPlanner run per day, executed concurrently
+Each day plans from its own slice of the catalog so no place repeats across days
+"""
+
+import os
+import time
+import asyncio
+from typing import List, Dict, Optional, AsyncIterator, Tuple
+
+from .jamai_client import jamai_client
+from .place_store import get_place_store
+from .itinerary_validator import finalize_itinerary
+from .utils import DEFAULT_REGION
+
+# Upper bound on TripPlanner rows in flight for one request
+MAX_CONCURRENT_DAYS = int(os.getenv("ITINERARY_MAX_CONCURRENT_DAYS", "3"))
+MAX_DAYS = 7
+
+
+def partition_candidates(
+    days: int,
+    dietary: str = "No preference",
+    accessibility: str = "No preference",
+    region: str = DEFAULT_REGION
+) -> List[List[str]]:
+    """
+    Split the places that satisfy the trip-wide filters into `days` disjoint
+    lists. Food and attractions are dealt round-robin separately so every day
+    gets a similar mix.
+    """
+    store = get_place_store(region)
+    ids = store.filter(halal_status=dietary, accessibility=accessibility)
+
+    partitions: List[List[str]] = [[] for _ in range(days)]
+    dealt: Dict[str, int] = {}
+    for row_id in ids:
+        record = store.records[row_id]
+        kind = record.type or ""
+        seq = dealt.get(kind, 0)
+        partitions[seq % days].append(record.name)
+        dealt[kind] = seq + 1
+    return partitions
+
+
+def _plan_day(
+    start_time: str,
+    dietary: str,
+    transport: str,
+    accessibility: str,
+    candidates: List[str]
+) -> Dict:
+    """One blocking TripPlanner run plus local repair, enrichment and routing"""
+    result = jamai_client.generate_itinerary(
+        start_time=start_time,
+        dietary=dietary,
+        transport=transport,
+        accessibility=accessibility,
+        stream=False,
+        candidate_places=candidates
+    )
+    # The LLM can still pick outside its slice - substitutes come from the slice
+    # too, so days stay disjoint
+    result["itinerary"], result["route_issues"], result["repairs"] = finalize_itinerary(
+        result.get("itinerary", []), dietary, transport, accessibility,
+        allowed_names=candidates
+    )
+    return result
+
+
+def generate_days(
+    days: int,
+    start_time: str,
+    dietary: str,
+    transport: str,
+    accessibility: str,
+    region: Optional[str] = None,
+    max_concurrency: int = MAX_CONCURRENT_DAYS,
+    admission=None
+) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Validate and partition up front (so bad input fails before streaming starts),
+    then return an async iterator of (day number, result, error) that yields each
+    day as it finishes - not in day order. Total latency is roughly one day's
+    generation while days <= max_concurrency.
+
+    admission: the route's AdmissionController. The request's own slot covers
+    one running day; each further day running at the same time takes a slot
+    of its own, so the route limit counts TripPlanner rows, not requests.
+    """
+    if not 1 <= days <= MAX_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_DAYS}")
+    if not jamai_client.client:
+        raise RuntimeError("JamAI client not initialized. Check your API keys.")
+
+    partitions = partition_candidates(days, dietary, accessibility, region or DEFAULT_REGION)
+    plan = (start_time, dietary, transport, accessibility)
+    return _run_days(partitions, plan, max(1, max_concurrency), admission)
+
+
+async def _run_days(
+    partitions: List[List[str]],
+    plan: Tuple[str, str, str, str],
+    max_concurrency: int,
+    admission=None
+) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+    own_slot = asyncio.Lock()  # The slot the request was admitted with
+
+    async def run(day: int, candidates: List[str]):
+        async with semaphore:
+            gated = admission is not None
+            extra = gated and own_slot.locked()
+            try:
+                if extra:
+                    await admission.acquire()
+                elif gated:
+                    await own_slot.acquire()
+            except Exception as e:  # Overloaded - the route is at capacity
+                return day, None, str(e)
+            started = time.monotonic()
+            try:
+                result = await asyncio.to_thread(_plan_day, *plan, candidates)
+                return day, result, None
+            except Exception as e:
+                print(f"[multi_day] Day {day} failed:", e)
+                return day, None, str(e)
+            finally:
+                if extra:
+                    admission.release(time.monotonic() - started)
+                elif gated:
+                    own_slot.release()
+
+    tasks = [asyncio.create_task(run(day, cands)) for day, cands in enumerate(partitions, start=1)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Client went away - don't leave queued days waiting on the semaphore
+        for task in tasks:
+            task.cancel()
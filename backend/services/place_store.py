@@ -0,0 +1,354 @@
+"""
+Compact, immutable place store built once per data snapshot
+Filters return integer row IDs; responses are built without pandas
+"""
+
+import sys
+from datetime import datetime
+from typing import List, Dict, Optional, Any, Sequence, Tuple, Callable
+
+import numpy as np
+import pandas as pd
+
+from .facets import get_facet_index
+from .tracing import span
+from .images import thumbnail_urls
+from .utils import (
+    load_shard, list_regions, DEFAULT_REGION, PLACE_FIELDS, parse_time, parse_opening_hours, is_open_at,
+    is_wheelchair_accessible, matches_halal_requirement, extract_price_min
+)
+
+# Low-cardinality columns - one shared string object per distinct value
+INTERNED_FIELDS = {"type", "category", "cuisine", "halal_status", "price_range"}
+
+# Fields covered by free-text search
+SEARCH_FIELDS = ("name", "description", "category", "cuisine", "famous_for")
+
+
+def _shared_hours(opening_hours: Optional[str], cache: Optional[Dict]) -> Tuple[Tuple[int, int], ...]:
+    """Parsed intervals; records built with the same `cache` share one tuple per hours text"""
+    if cache is None:
+        return tuple(parse_opening_hours(opening_hours))
+    hours = cache.get(opening_hours)
+    if hours is None:
+        hours = cache[opening_hours] = tuple(parse_opening_hours(opening_hours))
+    return hours
+
+
+class PlaceRecord:
+    """One place with precomputed filter keys. Immutable once built."""
+
+    __slots__ = tuple(PLACE_FIELDS.values()) + (
+        "name_lower", "price_min", "hours",
+        "is_halal", "is_wheelchair_accessible",
+    )
+
+    def __init__(self, *, hours_cache: Optional[Dict] = None, **fields: Optional[str]):
+        """hours_cache: dict shared by one snapshot build (see PlaceStore.from_dataframe)"""
+        set_ = object.__setattr__
+        for key in PLACE_FIELDS.values():
+            value = fields.get(key)
+            if value is not None and key in INTERNED_FIELDS:
+                value = sys.intern(value)
+            set_(self, key, value)
+
+        set_(self, "name_lower", (self.name or "").lower().strip())
+        set_(self, "price_min", extract_price_min(self.price_range))
+        set_(self, "hours", _shared_hours(self.opening_hours, hours_cache))
+        set_(self, "is_halal", matches_halal_requirement(self.halal_status, "Halal only"))
+        set_(self, "is_wheelchair_accessible", is_wheelchair_accessible(self.accessibility_info))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("PlaceRecord is immutable")
+
+    @property
+    def search_text(self) -> str:
+        """Lowercased search fields (built on demand; the facet index keeps them packed per store)"""
+        return "\x00".join(getattr(self, f).lower() for f in SEARCH_FIELDS if getattr(self, f))
+
+    def is_open(self, minute_of_day: int) -> bool:
+        return is_open_at(self.hours, minute_of_day)
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        """CSV-derived fields keyed by response name"""
+        return {key: getattr(self, key) for key in PLACE_FIELDS.values()}
+
+
+def minute_of_day(current_time: Optional[str]) -> Optional[int]:
+    """Minutes since midnight for "HH:MM" (server time when None)"""
+    check = parse_time(current_time) if current_time else datetime.now().time()
+    return check.hour * 60 + check.minute if check else None
+
+
+class PlaceStore:
+    """
+    Read-only collection of PlaceRecords for one regional shard,
+    addressed by integer row ID.
+
+    Usage:
+        store = get_place_store("klang-valley")
+        ids = store.filter(place_type="Food", halal_status="Halal only")
+        results = store.to_responses(ids)
+    """
+
+    def __init__(
+        self,
+        records: Sequence[PlaceRecord],
+        region: str = DEFAULT_REGION,
+        name_index: Optional[Dict[str, int]] = None
+    ):
+        self.region = region
+        self.records = tuple(records)
+        if name_index is None:
+            name_index = {}
+            for i, record in enumerate(self.records):
+                name_index.setdefault(record.name_lower, i)
+        self.name_index = name_index
+        # Lazily built per-snapshot structures (semantic index, ...)
+        self._derived: Dict[str, Any] = {}
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, region: str = DEFAULT_REGION) -> "PlaceStore":
+        columns = [c for c in PLACE_FIELDS if c in df.columns]
+        records = []
+        hours_cache: Dict = {}  # Lives for this build only
+        for values in df[columns].itertuples(index=False, name=None):
+            fields = {
+                PLACE_FIELDS[col]: (None if pd.isna(val) else str(val))
+                for col, val in zip(columns, values)
+            }
+            records.append(PlaceRecord(hours_cache=hours_cache, **fields))
+        return cls(records, region)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """Return the structure cached under `key`, building it on first use"""
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    def apply(self, records: Sequence[PlaceRecord], delta: "PlaceDelta") -> "PlaceStore":
+        """
+        Next snapshot after an incremental change. Derived structures already
+        built here are carried over via their `updated(store, delta)` method;
+        ones without it are dropped and rebuilt lazily on first use.
+        """
+        if delta.has_deletes:
+            name_index = None  # Row IDs shift - rebuild (a dict pass, no parsing)
+        else:
+            name_index = dict(self.name_index)
+            for i in delta.changed:
+                name_index.setdefault(records[i].name_lower, int(i))
+        store = PlaceStore(records, self.region, name_index)
+        for key, structure in list(self._derived.items()):
+            if hasattr(structure, "updated"):
+                store._derived[key] = structure.updated(store, delta)
+        return store
+
+    def filter(
+        self,
+        place_type: str = "All",
+        price_range: str = "All",
+        halal_status: str = "No preference",
+        accessibility: str = "No preference",
+        search_query: str = "",
+        filter_open_now: bool = False,
+        current_time: Optional[str] = None
+    ) -> List[int]:
+        """Row IDs matching every active filter, in dataset order (via facet bitsets)"""
+        minute = minute_of_day(current_time) if filter_open_now else None
+        if filter_open_now and minute is None:
+            return []
+
+        with span("place_store.filter", region=self.region) as s:
+            row_ids = get_facet_index(self).select(
+                place_type=place_type,
+                price_range=price_range,
+                halal_status=halal_status,
+                accessibility=accessibility,
+                search_query=search_query,
+                minute_of_day=minute
+            )
+            # One span for the whole bitset AND; the active filters say what it covered
+            s.set("filters", ",".join(name for name, value, default in (
+                ("place_type", place_type, "All"),
+                ("price_range", price_range, "All"),
+                ("halal_status", halal_status, "No preference"),
+                ("accessibility", accessibility, "No preference"),
+                ("search_query", search_query, ""),
+                ("open_now", filter_open_now, False),
+            ) if value != default))
+            s.set("rows", len(row_ids))
+        return row_ids
+
+    def find_by_name(self, place_name: str) -> Optional[int]:
+        """Exact (case-insensitive) match first, then first substring match"""
+        name = place_name.lower().strip()
+        if not name:
+            return None
+        row_id = self.name_index.get(name)
+        if row_id is not None:
+            return row_id
+        for i, record in enumerate(self.records):
+            if name in record.name_lower:
+                return i
+        return None
+
+    def to_response(self, row_id: int, current_time: Optional[str] = None) -> Dict[str, Any]:
+        """PlaceResponse-shaped dict for one row"""
+        return self._response(self.records[row_id], minute_of_day(current_time))
+
+    def to_responses(self, row_ids: Sequence[int], current_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """PlaceResponse-shaped dicts for many rows (time parsed once)"""
+        minute = minute_of_day(current_time)
+        return [self._response(self.records[i], minute) for i in row_ids]
+
+    def _response(self, record: PlaceRecord, minute: Optional[int]) -> Dict[str, Any]:
+        result = record.to_dict()
+        result["region"] = self.region
+        result["thumbnail_urls"] = thumbnail_urls(record.image_url)
+        result["is_open_now"] = minute is not None and record.is_open(minute)
+        result["is_wheelchair_accessible"] = record.is_wheelchair_accessible
+        return result
+
+
+class PlaceDelta:
+    """
+    How the rows of a new snapshot relate to the previous one: surviving rows
+    keep their order at the front (`kept` = their old row IDs), new places are
+    appended, and `changed` lists new row IDs whose content must be re-derived.
+    """
+
+    def __init__(self, old_size: int, kept: Sequence[int], changed: Sequence[int], size: int):
+        self.old_size = old_size
+        self.size = size
+        self.kept = np.asarray(kept, dtype=np.int64)
+        self.changed = np.asarray(sorted(changed), dtype=np.int64)
+        self.remap = np.full(old_size, -1, dtype=np.int64)
+        self.remap[self.kept] = np.arange(len(self.kept))
+        self._stale = np.zeros(size, dtype=bool)
+        self._stale[self.changed] = True
+
+    @property
+    def has_deletes(self) -> bool:
+        return len(self.kept) < self.old_size
+
+    def carry(self, values: np.ndarray) -> np.ndarray:
+        """Per-row array laid out for the new snapshot (appended rows zeroed)"""
+        out = np.zeros((self.size,) + values.shape[1:], dtype=values.dtype)
+        out[:len(self.kept)] = values[self.kept]
+        return out
+
+    def remap_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(mask over `rows`, their new IDs) - entries of deleted or changed rows dropped"""
+        mapped = self.remap[rows]
+        keep = mapped >= 0
+        keep[keep] = ~self._stale[mapped[keep]]
+        return keep, mapped[keep]
+
+
+# Global cache variables (rebuilt whenever load_shard() returns a new snapshot)
+_STORE_CACHE: Dict[str, PlaceStore] = {}
+_STORE_SOURCE: Dict[str, pd.DataFrame] = {}
+# Set in process-pool workers: ingests and compactions happen in the API process
+_FOLLOW_DISK = False
+
+
+def follow_disk_changes() -> None:
+    """Have get_place_store() pick up place changes other processes write to disk"""
+    global _FOLLOW_DISK
+    _FOLLOW_DISK = True
+
+
+def get_place_store(region: str = DEFAULT_REGION) -> PlaceStore:
+    """
+    Compile one regional shard into a PlaceStore once per snapshot.
+    """
+    if _FOLLOW_DISK and region in _STORE_CACHE:
+        from .ingest import follow_disk
+
+        followed = follow_disk(_STORE_CACHE[region])
+        if followed is not None:
+            _STORE_CACHE[region] = followed
+    df = load_shard(region)
+    if region not in _STORE_CACHE or _STORE_SOURCE.get(region) is not df:
+        from .ingest import replay_log  # Changes ingested since the snapshot was written
+
+        _STORE_CACHE[region] = replay_log(PlaceStore.from_dataframe(df, region))
+        _STORE_SOURCE[region] = df
+    return _STORE_CACHE[region]
+
+
+def publish_place_store(store: PlaceStore, source: Optional[pd.DataFrame] = None) -> None:
+    """
+    Make an incrementally updated snapshot current. Callers already holding the
+    previous store keep a consistent view. `source` re-points the snapshot at a
+    compacted DataFrame so it is not recompiled.
+    """
+    _STORE_CACHE[store.region] = store
+    if source is not None:
+        _STORE_SOURCE[store.region] = source
+
+
+def get_place_stores(region: Optional[str] = None) -> List[PlaceStore]:
+    """
+    Stores to fan a query out to: just `region` if given, else every configured region.
+    """
+    regions = [region] if region else list_regions()
+    return [get_place_store(r) for r in regions]
+
+
+def find_place(place_name: str, region: Optional[str] = None) -> Optional[Tuple[PlaceStore, int]]:
+    """
+    Resolve a name across shards: exact match in any region wins over substring matches.
+    """
+    stores = get_place_stores(region)
+    name = place_name.lower().strip() if place_name else ""
+    if not name:
+        return None
+    for store in stores:
+        row_id = store.name_index.get(name)
+        if row_id is not None:
+            return store, row_id
+    for store in stores:
+        row_id = store.find_by_name(name)
+        if row_id is not None:
+            return store, row_id
+    return None
+
+
+def find_places(place_names: Sequence[str], region: Optional[str] = None) -> List[Optional[Tuple[PlaceStore, int]]]:
+    """
+    find_place() for many names at once, in input order (None where nothing matches).
+    Exact matches are dict lookups; the leftovers share one scan per shard.
+    """
+    stores = get_place_stores(region)
+    keys = [name.lower().strip() if name else "" for name in place_names]
+    found: Dict[str, Optional[Tuple[PlaceStore, int]]] = {"": None}
+
+    for key in keys:
+        if key in found:
+            continue
+        found[key] = None
+        for store in stores:
+            row_id = store.name_index.get(key)
+            if row_id is not None:
+                found[key] = (store, row_id)
+                break
+
+    pending = [key for key, match in found.items() if key and match is None]
+    for store in stores:
+        if not pending:
+            break
+        for i, record in enumerate(store.records):
+            hits = [key for key in pending if key in record.name_lower]
+            for key in hits:
+                found[key] = (store, i)
+            if hits:
+                pending = [key for key in pending if key not in hits]
+                if not pending:
+                    break
+
+    return [found[key] for key in keys]
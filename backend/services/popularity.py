@@ -0,0 +1,169 @@
+"""
+Streaming popularity - place views, search clicks and itinerary inclusions in fixed memory
+Count-min sketch + top-K heavy hitters with exponential time decay; recommendations read a periodic snapshot
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Counts halve every this many seconds ("trending now", not all-time)
+HALF_LIFE_SECONDS = float(os.getenv("POPULARITY_HALF_LIFE_SECONDS", "3600"))
+SKETCH_WIDTH = int(os.getenv("POPULARITY_SKETCH_WIDTH", "2048"))
+SKETCH_DEPTH = int(os.getenv("POPULARITY_SKETCH_DEPTH", "4"))
+TOP_K = int(os.getenv("POPULARITY_TOP_K", "256"))
+# How stale the snapshot recommendations score against may get
+REFRESH_SECONDS = float(os.getenv("POPULARITY_REFRESH_SECONDS", "30"))
+
+EVENT_WEIGHTS = {"view": 1.0, "click": 2.0, "itinerary": 3.0}
+
+# Forward decay: events are added with weight e^(t - landmark)/tau so stored counts
+# never need touching; rescale before the weights overflow float64
+_RESCALE_EXPONENT = 600.0
+
+
+def place_key(region: str, name_lower: str) -> str:
+    return f"{region}:{name_lower}"
+
+
+class CountMinSketch:
+    """depth x width counters; estimates never undercount (collisions only add)"""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def add(self, key: str, weight: float = 1.0) -> float:
+        """Add and return the new estimate for `key`"""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += weight
+        return float(self.table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> float:
+        return float(self.table[self._rows, self._columns(key)].min())
+
+
+class PopularityTracker:
+    """
+    Decayed event counts per place. Writes touch SKETCH_DEPTH counters and at
+    most one heavy-hitter slot; reads go through snapshot(), rebuilt at most
+    every REFRESH_SECONDS.
+
+    Usage:
+        popularity.record("klang-valley", "jalan alor", "click")
+        popularity.snapshot()  # {"klang-valley:jalan alor": 1.0, ...}
+    """
+
+    def __init__(
+        self,
+        half_life: float = HALF_LIFE_SECONDS,
+        top_k: int = TOP_K,
+        refresh_seconds: float = REFRESH_SECONDS,
+        clock=time.time
+    ):
+        self.tau = half_life / math.log(2)
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.sketch = CountMinSketch()
+        self.landmark = clock()
+        self.heavy: Dict[str, float] = {}  # key -> forward-decayed estimate
+        self.events: Dict[str, int] = {kind: 0 for kind in EVENT_WEIGHTS}
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, float] = {}
+        self._snapshot_at = float("-inf")
+
+    def _weight(self, now: float) -> float:
+        exponent = (now - self.landmark) / self.tau
+        if exponent > _RESCALE_EXPONENT:
+            # Move the landmark to now; every stored count shrinks by the same factor
+            factor = math.exp(-exponent)
+            self.sketch.table *= factor
+            self.heavy = {key: value * factor for key, value in self.heavy.items()}
+            self.landmark = now
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def record(self, region: str, name_lower: str, kind: str, count: int = 1) -> None:
+        if kind not in EVENT_WEIGHTS:
+            raise ValueError(f"Unknown popularity event '{kind}'. Expected one of: {', '.join(EVENT_WEIGHTS)}")
+        key = place_key(region, name_lower)
+        with self._lock:
+            weight = self._weight(self.clock()) * EVENT_WEIGHTS[kind] * count
+            estimate = self.sketch.add(key, weight)
+            self.events[kind] += count
+            if key in self.heavy or len(self.heavy) < self.top_k:
+                self.heavy[key] = estimate
+            else:
+                # Space-saving style: displace the weakest tracked place if this one beats it
+                weakest = min(self.heavy, key=self.heavy.__getitem__)
+                if estimate > self.heavy[weakest]:
+                    del self.heavy[weakest]
+                    self.heavy[key] = estimate
+
+    def record_matches(self, matches: Iterable[Optional[Tuple[object, int]]], kind: str) -> int:
+        """Record (store, row_id) pairs as returned by find_places(); None entries are skipped"""
+        recorded = 0
+        for match in matches:
+            if match is not None:
+                store, row_id = match
+                self.record(store.region, store.records[row_id].name_lower, kind)
+                recorded += 1
+        return recorded
+
+    def decayed(self, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Tracked places with their decayed event weight as of now, most popular first"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            scale = math.exp(-(now - self.landmark) / self.tau)
+            ranked = sorted(self.heavy.items(), key=lambda item: -item[1])
+        return [(key, value * scale) for key, value in ranked]
+
+    def snapshot(self) -> Dict[str, float]:
+        """place_key -> popularity in (0, 1] relative to the current leader"""
+        now = self.clock()
+        if now - self._snapshot_at >= self.refresh_seconds:
+            ranked = self.decayed(now)
+            top = ranked[0][1] if ranked else 0.0
+            self._snapshot = {key: value / top for key, value in ranked if top and value > 0}
+            self._snapshot_at = now
+        return self._snapshot
+
+    def stats(self, limit: int = 20) -> Dict:
+        return {
+            "half_life_seconds": round(self.tau * math.log(2), 1),
+            "events": dict(self.events),
+            "tracked": len(self.heavy),
+            "sketch_bytes": self.sketch.table.nbytes,
+            "top": [{"place": key, "weight": round(value, 3)} for key, value in self.decayed()[:limit]],
+        }
+
+
+def scoring_vector(store, snapshot: Dict[str, float]) -> np.ndarray:
+    """Snapshot laid out over a PlaceStore's row IDs (0 for places nobody touched)"""
+    vector = np.zeros(len(store.records), dtype=np.float32)
+    prefix = f"{store.region}:"
+    for key, value in snapshot.items():
+        if key.startswith(prefix):
+            row_id = store.name_index.get(key[len(prefix):])
+            if row_id is not None:
+                vector[row_id] = value
+    return vector
+
+
+# ============================================
+# Shared tracker
+# ============================================
+
+popularity = PopularityTracker()
@@ -0,0 +1,234 @@
+"""
+On-demand request profiling - stack sampling or cProfile, kept in a bounded ring buffer
+Only requests that opt in pay anything; everyone else sees one contextvar lookup
+"""
+
+import os
+import sys
+import time
+import uuid
+import marshal
+import pstats
+import cProfile
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+# Fraction of /api requests profiled without being asked (0 = only on request)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+
+# Frames from this tree (routers, services, utils) - stacks are trimmed to start here
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame) -> str:
+    path = frame.f_code.co_filename
+    if path.startswith(APP_ROOT):
+        path = os.path.relpath(path, APP_ROOT)
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame) -> Optional[str]:
+    """Root-first "a;b;c" stack starting at the outermost app frame, None if there is none"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    for i, f in enumerate(frames):
+        if f.f_code.co_filename.startswith(APP_ROOT) and "/tests/" not in f.f_code.co_filename:
+            return ";".join(_frame_label(f) for f in frames[i:])
+    return None
+
+
+class ProfileSession:
+    """
+    One profiled request. Threads doing work for it join via `attach()`
+    (the executor does this for offloaded calls).
+
+    cProfile mode profiles the request's own threads only and, on the event
+    loop thread, also whatever other coroutines run while it is awaiting.
+    """
+
+    def __init__(self, mode: str, method: str, path: str, query: str = ""):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.query = query
+        self.created_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._threads: Dict[int, Optional[cProfile.Profile]] = {}
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def attach(self) -> None:
+        """Start recording the calling thread"""
+        profile = None
+        if self.mode == MODE_CPROFILE:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None  # Another profiler owns this interpreter (3.12+); skip this thread
+        with self._lock:
+            self._threads[threading.get_ident()] = profile
+        if self.mode == MODE_SAMPLE:
+            _sampler.watch(self)
+
+    def detach(self) -> None:
+        with self._lock:
+            profile = self._threads.pop(threading.get_ident(), None)
+        if profile is not None:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def thread_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def add_sample(self, stack: str) -> None:
+        with self._lock:
+            self.stacks[stack] += 1
+            self.samples += 1
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.detach()
+        self.status_code = status_code
+        self.duration_ms = round(1000 * (time.perf_counter() - self._started), 2)
+        if self.mode == MODE_SAMPLE:
+            _sampler.unwatch(self)
+
+    # ---- exports ----
+
+    def formats(self) -> List[str]:
+        return ["pstats"] if self.mode == MODE_CPROFILE else ["collapsed"]
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: "frame;frame;frame count" per line"""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def pstats_bytes(self) -> bytes:
+        """Marshalled stats - load with pstats.Stats(path) or snakeviz"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return marshal.dumps({})
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return marshal.dumps(stats.stats)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "formats": self.formats(),
+        }
+
+
+class _StackSampler:
+    """One background thread sampling the threads of every active sample-mode session"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, session: ProfileSession) -> None:
+        with self._lock:
+            if session not in self._sessions:
+                self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, session: ProfileSession) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for session in sessions:
+                for ident in session.thread_ids():
+                    frame = frames.get(ident)
+                    stack = collapse_stack(frame) if frame is not None else None
+                    if stack:
+                        session.add_sample(stack)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Ring buffer of the last `size` finished profiles"""
+
+    def __init__(self, size: int = PROFILE_BUFFER_SIZE):
+        self._items: "deque[ProfileSession]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._items.append(session)
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return next((s for s in self._items if s.id == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [s.summary() for s in reversed(self._items)]
+
+
+# The session of the request being handled (None almost always)
+current_profile: ContextVar[Optional[ProfileSession]] = ContextVar("current_profile", default=None)
+
+
+def profiled_call(session: ProfileSession, fn: Callable) -> Callable:
+    """Wrap fn so the worker thread running it is recorded into `session`"""
+    @wraps(fn)
+    def run(*args, **kwargs):
+        session.attach()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.detach()
+    return run
+
+
+# ============================================
+# Singleton instances for import
+# ============================================
+_sampler = _StackSampler()
+profile_store = ProfileStore()
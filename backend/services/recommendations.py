@@ -1,26 +1,38 @@
 """
-Home page recommendations - Logic-based filtering
+Home page recommendations - Logic-based filtering, boosted by recent popularity
 """
 
-from typing import List, Dict, Optional
+import heapq
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-from .utils import (
-    load_data, is_open_now, is_wheelchair_accessible,
-    matches_halal_requirement, format_place_response
-)
+from .place_store import get_place_stores, PlaceRecord
+from .popularity import popularity, scoring_vector
+from .tracing import span, traced
 
+# Score added for the most popular place right now (others scale down from it)
+POPULARITY_WEIGHT = 2.0
+# Share of the leader's popularity that counts as "trending now"
+TRENDING_THRESHOLD = 0.5
 
+
+@traced()
 def get_recommendations(
     user_profile: Dict,
     current_time: Optional[str] = None,
-    top_n: int = 5
+    top_n: int = 5,
+    region: Optional[str] = None,
+    trending: Optional[Dict[str, float]] = None
 ) -> List[Dict]:
     """
     Get personalized recommendations based on user profile.
     
     Uses simple logic-based filtering + scoring (NOT AI).
+    Scores every regional shard (or just `region`) and merges the top N.
+    `trending` is a popularity snapshot (routers pass it so process workers
+    see the parent's counts); defaults to the local tracker's.
     """
-    df = load_data()
+    if trending is None:
+        trending = popularity.snapshot()
     
     # Get current time if not provided
     if current_time is None:
@@ -30,63 +42,70 @@ def get_recommendations(
     dietary = user_profile.get("dietary", "No preference")
     accessibility = user_profile.get("accessibility", "No preference")
     
-    # Apply halal filter
-    if dietary == "Halal only":
-        df = df[df["Halal_Status"].isin(["Halal", "Muslim-Friendly"])]
-    
-    # Apply accessibility filter
-    if accessibility == "Wheelchair-friendly":
-        df = df[df["Accessibility_Info"].apply(
-            lambda x: is_wheelchair_accessible(x) if x else False
-        )]
+    hour = int(current_time.split(":")[0])
+    minute = hour * 60 + int(current_time.split(":")[1])
     
-    # Score remaining places
+    # Score remaining places - responses are only built for the winners
     scores = []
-    for _, row in df.iterrows():
-        score = 0
-        reasons = []
-        
-        # Bonus for being open now
-        if is_open_now(row.get("Opening_Hours", ""), current_time):
-            score += 3
-            reasons.append("open now")
-        
-        # Time-based relevance
-        hour = int(current_time.split(":")[0])
-        if row["Type"] == "Food":
-            if 11 <= hour <= 14:
-                score += 2
-                reasons.append("good for lunch")
-            elif 18 <= hour <= 21:
-                score += 2
-                reasons.append("good for dinner")
-        else:
-            if 9 <= hour <= 17:
-                score += 1
-                reasons.append("good time to visit")
-        
-        # Halal bonus when user requires it
-        if dietary == "Halal only" and row.get("Halal_Status") == "Halal":
+    for store in get_place_stores(region):
+        # Apply halal + accessibility filters
+        row_ids = store.filter(halal_status=dietary, accessibility=accessibility)
+        boosts = scoring_vector(store, trending)
+        with span("recommendations.score", region=store.region, rows=len(row_ids)):
+            for row_id in row_ids:
+                score, reasons = score_place(store.records[row_id], minute, hour, dietary, accessibility)
+                boost = float(boosts[row_id])
+                if boost > 0:
+                    score += POPULARITY_WEIGHT * boost
+                    reasons.append("trending now" if boost >= TRENDING_THRESHOLD else "popular lately")
+                scores.append((score, len(scores), store, row_id, reasons))
+    
+    # Top N by score (ties keep dataset order)
+    top = heapq.nsmallest(top_n, scores, key=lambda x: (-x[0], x[1]))
+    
+    results = []
+    with span("recommendations.build_responses", rows=len(top)):
+        for score, _, store, row_id, reasons in top:
+            place = store.to_response(row_id, current_time)
+            place["reasoning"] = ", ".join(reasons).capitalize() if reasons else "Matches your preferences"
+            results.append(place)
+    
+    return results
+
+
+def score_place(
+    record: PlaceRecord, minute: int, hour: int, dietary: str, accessibility: str
+) -> Tuple[int, List[str]]:
+    """Rule-based score and human-readable reasons for one place"""
+    score = 0
+    reasons = []
+    
+    # Bonus for being open now
+    if record.is_open(minute):
+        score += 3
+        reasons.append("open now")
+    
+    # Time-based relevance
+    if record.type == "Food":
+        if 11 <= hour <= 14:
+            score += 2
+            reasons.append("good for lunch")
+        elif 18 <= hour <= 21:
+            score += 2
+            reasons.append("good for dinner")
+    else:
+        if 9 <= hour <= 17:
             score += 1
-            reasons.append("halal certified")
-        
-        # Accessibility bonus
-        if accessibility == "Wheelchair-friendly":
-            if is_wheelchair_accessible(row.get("Accessibility_Info", "")):
-                score += 1
-                reasons.append("wheelchair accessible")
-        
-        # Build place response with reasoning
-        place = format_place_response(row)
-        place["score"] = score
-        place["reasoning"] = ", ".join(reasons).capitalize() if reasons else "Popular choice"
-        scores.append(place)
+            reasons.append("good time to visit")
     
-    # Sort by score and return top N
-    scores.sort(key=lambda x: x["score"], reverse=True)
+    # Halal bonus when user requires it
+    if dietary == "Halal only" and record.halal_status == "Halal":
+        score += 1
+        reasons.append("halal certified")
     
-    # Remove score from response (internal only)
-    for place in scores:
-        place.pop("score", None)
+    # Accessibility bonus
+    if accessibility == "Wheelchair-friendly" and record.is_wheelchair_accessible:
+        score += 1
+        reasons.append("wheelchair accessible")
     
-    return scores[:top_n]
\ No newline at end of file
+    return score, reasons
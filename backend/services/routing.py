@@ -0,0 +1,248 @@
+"""
+Travel-time matrix and local route optimizer for itineraries
+No JamAI dependencies - checks and reorders LLM output in microseconds
+"""
+
+import os
+import math
+from itertools import permutations, product
+from typing import Optional, List, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .utils import DATA_DIR, parse_opening_hours, parse_time_ranges, is_open_at, lookup_place_by_name
+
+COORDS_PATH = os.path.join(DATA_DIR, "place_coordinates.csv")
+MATRIX_PATH = os.path.join(DATA_DIR, "travel_times.npz")
+
+# Matrix layer order - matches TransportMode values in models/schemas.py
+TRANSPORT_MODES = ["Public transport", "Taxi/Grab", "Own vehicle"]
+
+# Per-mode travel model: (road detour factor, average km/h, fixed overhead minutes)
+# Overhead covers walking to stations / waiting, Grab pickup, and parking.
+MODE_PROFILES = {
+    "Public transport": (1.5, 20.0, 15),
+    "Taxi/Grab": (1.35, 28.0, 7),
+    "Own vehicle": (1.35, 30.0, 10),
+}
+
+# Short hops are walked regardless of the chosen transport
+WALK_THRESHOLD_KM = 0.8
+WALK_SPEED_KMH = 4.5
+
+# Beyond this many places per slot type we only validate, never reorder
+MAX_PERMUTE = 5
+
+UNREACHABLE = np.iinfo(np.uint16).max
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    r = 6371.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def estimate_minutes(distance_km: float, transport: str) -> int:
+    """Door-to-door minutes for a straight-line distance"""
+    if distance_km <= WALK_THRESHOLD_KM:
+        return max(1, round(distance_km * 1.3 / WALK_SPEED_KMH * 60))
+    detour, speed, overhead = MODE_PROFILES.get(transport, MODE_PROFILES["Public transport"])
+    return round(distance_km * detour / speed * 60) + overhead
+
+
+class TravelMatrix:
+    """
+    Place-to-place travel minutes, one uint16 layer per transport mode.
+
+    minutes[mode, origin, destination]; lookups go through a lowercased name index.
+    """
+
+    def __init__(self, names: List[str], minutes: np.ndarray):
+        self.names = list(names)
+        self.minutes = minutes
+        self.index = {name.lower(): i for i, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get(self, origin: str, destination: str, transport: str) -> Optional[int]:
+        """Travel minutes between two places, or None if either is unknown"""
+        i = self.index.get(origin.lower())
+        j = self.index.get(destination.lower())
+        if i is None or j is None:
+            return None
+        mode = TRANSPORT_MODES.index(transport) if transport in TRANSPORT_MODES else 0
+        value = int(self.minutes[mode, i, j])
+        return None if value == UNREACHABLE else value
+
+    def save(self, path: str = MATRIX_PATH) -> None:
+        np.savez_compressed(path, names=np.array(self.names), minutes=self.minutes)
+
+
+def build_travel_matrix(coords: pd.DataFrame) -> TravelMatrix:
+    """Precompute travel minutes for every place pair and transport mode"""
+    names = coords["Name"].astype(str).tolist()
+    lats = coords["Latitude"].to_numpy(dtype=float)
+    lons = coords["Longitude"].to_numpy(dtype=float)
+    n = len(names)
+
+    minutes = np.full((len(TRANSPORT_MODES), n, n), UNREACHABLE, dtype=np.uint16)
+    for i in range(n):
+        for j in range(n):
+            if i == j:
+                minutes[:, i, j] = 0
+                continue
+            if np.isnan(lats[i]) or np.isnan(lats[j]):
+                continue
+            km = _haversine_km(lats[i], lons[i], lats[j], lons[j])
+            for m, mode in enumerate(TRANSPORT_MODES):
+                minutes[m, i, j] = min(estimate_minutes(km, mode), UNREACHABLE - 1)
+
+    return TravelMatrix(names, minutes)
+
+
+# Global cache variable
+_MATRIX_CACHE = None
+
+def load_travel_matrix() -> TravelMatrix:
+    """
+    Load the precomputed matrix (built from place_coordinates.csv if the .npz is missing).
+    """
+    global _MATRIX_CACHE
+    if _MATRIX_CACHE is not None:
+        return _MATRIX_CACHE
+
+    if os.path.exists(MATRIX_PATH):
+        with np.load(MATRIX_PATH) as data:
+            _MATRIX_CACHE = TravelMatrix(data["names"].tolist(), data["minutes"])
+    elif os.path.exists(COORDS_PATH):
+        _MATRIX_CACHE = build_travel_matrix(pd.read_csv(COORDS_PATH))
+    else:
+        _MATRIX_CACHE = TravelMatrix([], np.zeros((len(TRANSPORT_MODES), 0, 0), dtype=np.uint16))
+
+    return _MATRIX_CACHE
+
+
+# ========== ROUTE OPTIMIZER ==========
+
+def _slot_kind(activity: Dict) -> str:
+    return "Food" if activity.get("type") == "Food" else "Attraction"
+
+
+def _resolve_name(matrix: TravelMatrix, place: str) -> str:
+    """Map an LLM-written place name onto the canonical dataset name"""
+    if not place or place.lower() in matrix.index:
+        return place or ""
+    found = lookup_place_by_name(place)
+    return found["name"] if found and found.get("name") else place
+
+
+def _route_cost(
+    matrix: TravelMatrix,
+    stops: List[Tuple[str, List[Tuple[int, int]]]],
+    slots: List[Optional[Tuple[int, int]]],
+    transport: str
+) -> Tuple[int, List[Optional[int]], List[str]]:
+    """Total travel minutes plus infeasibility penalties for one ordering"""
+    cost = 0
+    legs: List[Optional[int]] = [None] * len(stops)
+    issues = []
+
+    for i, (name, hours) in enumerate(stops):
+        slot = slots[i]
+        if slot and hours and not is_open_at(hours, slot[0]):
+            cost += 10_000
+            issues.append(f"{name} is closed at {slot[0] // 60:02d}:{slot[0] % 60:02d}")
+
+        if i == 0:
+            continue
+        minutes = matrix.get(stops[i - 1][0], name, transport)
+        legs[i] = minutes
+        if minutes is None:
+            continue
+        cost += minutes
+
+        prev_slot = slots[i - 1]
+        if slot and prev_slot:
+            gap = slot[0] - prev_slot[1]
+            if minutes > gap:
+                cost += 1_000 + (minutes - gap)
+                issues.append(
+                    f"{stops[i - 1][0]} → {name} needs ~{minutes} min by {transport} "
+                    f"but only {max(gap, 0)} min are scheduled"
+                )
+
+    return cost, legs, issues
+
+
+def score_route(activities: List[Dict], transport: str) -> Tuple[List[Dict], List[str]]:
+    """travel_minutes and issues for activities in their current order (nothing is moved)"""
+    if not activities:
+        return [], []
+    matrix = load_travel_matrix()
+    slots = [
+        (ranges[0] if ranges else None)
+        for ranges in (parse_time_ranges(a.get("time") or "") for a in activities)
+    ]
+    stops = [
+        (_resolve_name(matrix, a.get("place") or ""), parse_opening_hours(a.get("opening_hours")))
+        for a in activities
+    ]
+    _, legs, issues = _route_cost(matrix, stops, slots, transport)
+    return [dict(a, travel_minutes=leg) for a, leg in zip(activities, legs)], issues
+
+
+def optimize_itinerary(activities: List[Dict], transport: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Reorder places across the existing time slots to minimise travel and avoid
+    closed places / impossible legs. Food stays in food slots, attractions in
+    attraction slots. Returns (activities with travel_minutes, remaining issues).
+    """
+    if not activities:
+        return [], []
+
+    matrix = load_travel_matrix()
+    slots = [
+        (ranges[0] if ranges else None)
+        for ranges in (parse_time_ranges(a.get("time") or "") for a in activities)
+    ]
+    names = [_resolve_name(matrix, a.get("place") or "") for a in activities]
+    hours = [parse_opening_hours(a.get("opening_hours")) for a in activities]
+
+    # Slot positions per kind, e.g. {"Food": [0, 2, 4], "Attraction": [1, 3]}
+    positions: Dict[str, List[int]] = {}
+    for i, activity in enumerate(activities):
+        positions.setdefault(_slot_kind(activity), []).append(i)
+
+    def evaluate(order: List[int]):
+        stops = [(names[k], hours[k]) for k in order]
+        return _route_cost(matrix, stops, slots, transport)
+
+    identity = list(range(len(activities)))
+    best_order = identity
+    best_cost, best_legs, best_issues = evaluate(identity)
+
+    if best_cost > 0 and all(len(p) <= MAX_PERMUTE for p in positions.values()):
+        kinds = list(positions.values())
+        for choice in product(*(permutations(p) for p in kinds)):
+            order = identity[:]
+            for slot_positions, assigned in zip(kinds, choice):
+                for pos, source in zip(slot_positions, assigned):
+                    order[pos] = source
+            cost, legs, issues = evaluate(order)
+            if cost < best_cost:
+                best_order, best_cost, best_legs, best_issues = order, cost, legs, issues
+
+    result = []
+    for pos, source in enumerate(best_order):
+        activity = dict(activities[source])
+        # The place moves, the time slot stays
+        activity["time"] = activities[pos].get("time")
+        activity["travel_minutes"] = best_legs[pos]
+        result.append(activity)
+
+    return result, best_issues
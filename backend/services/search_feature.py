@@ -1,15 +1,29 @@
 """
-Search and filter functionality - Pure Python/Pandas
+Search and filter functionality - Pure Python over the compiled PlaceStore
 """
 
-import pandas as pd
-from typing import List, Dict, Optional
-from .utils import (
-    load_data, is_open_now, is_wheelchair_accessible,
-    matches_halal_requirement, extract_price_min, format_place_response
-)
+from datetime import datetime
+from typing import List, Dict, Optional, Iterator, Tuple, Sequence, Any
 
+import numpy as np
 
+from .place_store import get_place_stores, minute_of_day
+from .facets import get_facet_index, merge_counts
+from .semantic_index import get_semantic_index, tokenize
+from .tracing import span, traced
+
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
+
+# Hybrid fusion: weight of the vector score vs the keyword score
+SEMANTIC_WEIGHT = 0.6
+# Nearest neighbours pulled per shard before fusion / truncation
+SEMANTIC_CANDIDATES = 200
+DEFAULT_RANKED_LIMIT = 20
+# Rows turned into response dicts at a time when streaming
+STREAM_CHUNK_ROWS = 500
+
+
+@traced()
 def search_places(
     place_type: str = "All",
     price_range: str = "All",
@@ -17,60 +31,218 @@ def search_places(
     accessibility: str = "No preference",
     search_query: str = "",
     filter_open_now: bool = False,
-    current_time: Optional[str] = None
+    current_time: Optional[str] = None,
+    region: Optional[str] = None,
+    mode: str = "keyword",
+    limit: Optional[int] = None
 ) -> List[Dict]:
     """
     Search and filter places based on criteria.
+    Fans out across regional shards (or just `region`) and merges in shard order.
+
+    mode="semantic" ranks by vector similarity, mode="hybrid" fuses vector and
+    keyword scores; both return the best `limit` results with a relevance score.
     Returns list of place dictionaries.
     """
-    df = load_data()
+    total, chunks = iter_search_results(
+        place_type, price_range, halal_status, accessibility, search_query,
+        filter_open_now, current_time, region, mode, limit
+    )
+    results = []
+    for chunk in chunks:
+        results.extend(chunk)
+    return results
+
+
+def iter_search_results(
+    place_type: str = "All",
+    price_range: str = "All",
+    halal_status: str = "No preference",
+    accessibility: str = "No preference",
+    search_query: str = "",
+    filter_open_now: bool = False,
+    current_time: Optional[str] = None,
+    region: Optional[str] = None,
+    mode: str = "keyword",
+    limit: Optional[int] = None,
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+    stores: Optional[Sequence] = None
+) -> Tuple[int, Iterator[List[Dict]]]:
+    """
+    Same search as search_places(), as (total count, iterator of result chunks).
+    Matching runs up front (so bad input raises here); keyword-mode response
+    dicts are only built `chunk_rows` at a time as the iterator is consumed.
+    `stores` pins the shards to search (default: current snapshot of `region`).
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}'. Use one of: {', '.join(SEARCH_MODES)}")
+    
+    filters = dict(
+        place_type=place_type,
+        price_range=price_range,
+        halal_status=halal_status,
+        accessibility=accessibility,
+        filter_open_now=filter_open_now,
+        current_time=current_time
+    )
     
-    # Filter by place type
-    if place_type != "All":
-        df = df[df["Type"] == place_type]
+    if stores is None:
+        stores = get_place_stores(region)
     
-    # Filter by halal status
-    if halal_status == "Halal only":
-        df = df[df["Halal_Status"].isin(["Halal", "Muslim-Friendly"])]
+    if mode != "keyword" and search_query.strip():
+        with span("search.ranked", mode=mode) as s:
+            ranked = _ranked_search(search_query, mode, limit or DEFAULT_RANKED_LIMIT, stores, filters)
+            s.set("rows", len(ranked))
+        return len(ranked), iter([ranked])
     
-    # Filter by accessibility
-    if accessibility == "Wheelchair-friendly":
-        df = df[df["Accessibility_Info"].apply(
-            lambda x: is_wheelchair_accessible(x) if pd.notna(x) else False
-        )]
+    matches: List[Tuple[object, List[int]]] = []
+    remaining = limit
+    with span("search.match", shards=len(stores)) as s:
+        for store in stores:
+            row_ids = store.filter(search_query=search_query, **filters)
+            if remaining is not None:
+                row_ids = row_ids[:remaining]
+                remaining -= len(row_ids)
+            matches.append((store, row_ids))
+        total = sum(len(row_ids) for _, row_ids in matches)
+        s.set("rows", total)
     
-    # Filter by price range
-    if price_range != "All":
-        price_map = {
-            "Budget": (0, 30),
-            "Medium": (30, 80),
-            "Premium": (80, 9999)
-        }
-        if price_range in price_map:
-            min_price, max_price = price_map[price_range]
-            df = df[df["Price_Range"].apply(
-                lambda x: min_price <= extract_price_min(x) <= max_price
-            )]
+    def chunks() -> Iterator[List[Dict]]:
+        for store, row_ids in matches:
+            for start in range(0, len(row_ids), chunk_rows):
+                with span("search.build_responses", region=store.region) as s:
+                    chunk = store.to_responses(row_ids[start:start + chunk_rows], current_time)
+                    s.set("rows", len(chunk))
+                yield chunk
     
-    # Filter by open now
-    if filter_open_now:
-        df = df[df["Opening_Hours"].apply(
-            lambda x: is_open_now(x, current_time)
-        )]
+    return total, chunks()
+
+
+@traced()
+def facet_counts(
+    place_type: str = "All",
+    price_range: str = "All",
+    halal_status: str = "No preference",
+    accessibility: str = "No preference",
+    search_query: str = "",
+    filter_open_now: bool = False,
+    current_time: Optional[str] = None,
+    region: Optional[str] = None,
+    stores: Optional[Sequence] = None
+) -> Dict[str, Dict[str, int]]:
+    """
+    Result count for every filter chip given the other active filters,
+    from precomputed bitsets (one AND + popcount per option per shard).
+    """
+    minute = minute_of_day(current_time)
+    parts = []
+    for store in (stores if stores is not None else get_place_stores(region)):
+        parts.append(get_facet_index(store).counts(
+            open_minute=minute,
+            place_type=place_type,
+            price_range=price_range,
+            halal_status=halal_status,
+            accessibility=accessibility,
+            search_query=search_query,
+            minute_of_day=minute if filter_open_now else None
+        ))
+    return merge_counts(parts)
+
+
+def search_batch(queries: Sequence[Dict[str, Any]]) -> List[Tuple[List[Dict], Optional[Dict]]]:
+    """
+    Evaluate several searches against one snapshot, returning (results, facets)
+    per query in input order. Each query is a dict of search_places() arguments
+    plus optional "include_facets".
+
+    Shards are resolved once per region, the clock is read once, identical
+    queries are answered once, and the facet bitsets (type/price/halal/open-at
+    minute/substring) are shared by every query in the batch.
+    """
+    now = datetime.now().strftime("%H:%M")
+    stores_by_region: Dict[Optional[str], List] = {}
+    answered: Dict[Tuple, Tuple[List[Dict], Optional[Dict]]] = {}
+    outputs = []
+    
+    for i, query in enumerate(queries):
+        query = dict(query)
+        include_facets = query.pop("include_facets", False)
+        query["current_time"] = query.get("current_time") or now
+        key = (include_facets,) + tuple(sorted(query.items()))
+        if key not in answered:
+            region = query.get("region")
+            try:
+                if region not in stores_by_region:
+                    stores_by_region[region] = get_place_stores(region)
+                stores = stores_by_region[region]
+                _, chunks = iter_search_results(**query, stores=stores)
+                results = [place for chunk in chunks for place in chunk]
+                facets = None
+                if include_facets:
+                    facets = facet_counts(
+                        place_type=query.get("place_type", "All"),
+                        price_range=query.get("price_range", "All"),
+                        halal_status=query.get("halal_status", "No preference"),
+                        accessibility=query.get("accessibility", "No preference"),
+                        search_query=query.get("search_query", "") if query.get("mode", "keyword") == "keyword" else "",
+                        filter_open_now=query.get("filter_open_now", False),
+                        current_time=query["current_time"],
+                        stores=stores
+                    )
+            except ValueError as e:
+                raise ValueError(f"queries[{i}]: {e}")
+            answered[key] = (results, facets)
+        outputs.append(answered[key])
+    return outputs
+
+
+def _ranked_search(
+    search_query: str,
+    mode: str,
+    limit: int,
+    stores: Sequence,
+    filters: Dict
+) -> List[Dict]:
+    """Vector (+ keyword) ranking within the filtered rows of every shard"""
+    query_lower = search_query.lower().strip()
+    query_tokens = tokenize(search_query)
     
-    # Text search
-    if search_query:
-        query_lower = search_query.lower()
-        mask = (
-            df["Name"].str.lower().str.contains(query_lower, na=False) |
-            df["Description"].str.lower().str.contains(query_lower, na=False) |
-            df["Category"].str.lower().str.contains(query_lower, na=False) |
-            df.get("Cuisine", pd.Series()).str.lower().str.contains(query_lower, na=False) |
-            df.get("Famous_Dish", pd.Series()).str.lower().str.contains(query_lower, na=False)
-        )
-        df = df[mask]
+    scored = []
+    for store in stores:
+        allowed_ids = store.filter(**filters)
+        allowed = None
+        if len(allowed_ids) < len(store):
+            allowed = np.zeros(len(store), dtype=bool)
+            allowed[allowed_ids] = True
+        
+        index = get_semantic_index(store)
+        hits = index.search(search_query, max(limit, SEMANTIC_CANDIDATES), allowed)
+        
+        if mode == "semantic":
+            scored.extend((score, store, row_id) for row_id, score in hits)
+            continue
+        
+        # Hybrid: every keyword match (via token postings) competes with the vector neighbours
+        fused = {row_id: SEMANTIC_WEIGHT * score for row_id, score in hits}
+        texts = get_facet_index(store).texts
+        rows, counts = index.keyword_matches(query_tokens)
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, counts = rows[keep], counts[keep]
+        for row_id, count in zip(rows.tolist(), counts.tolist()):
+            # Full phrase hit scores 1.0, otherwise the share of query words present
+            if count == len(set(query_tokens)) and query_lower in texts[row_id]:
+                kw = 1.0
+            else:
+                kw = 0.8 * count / len(set(query_tokens))
+            fused[row_id] = fused.get(row_id, 0.0) + (1 - SEMANTIC_WEIGHT) * kw
+        scored.extend((score, store, row_id) for row_id, score in fused.items())
     
-    # Convert to list of dicts
-    results = [format_place_response(row) for _, row in df.iterrows()]
+    scored.sort(key=lambda x: x[0], reverse=True)
     
-    return results
\ No newline at end of file
+    results = []
+    for score, store, row_id in scored[:limit]:
+        place = store.to_response(row_id, filters["current_time"])
+        place["relevance"] = round(score, 4)
+        results.append(place)
+    return results
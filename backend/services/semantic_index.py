@@ -0,0 +1,371 @@
+"""
+Offline semantic search - TF-IDF + truncated SVD (LSA) over place text
+No network, no model downloads: built per snapshot, vectors memory-mapped from disk
+"""
+
+import os
+import re
+import hashlib
+from typing import List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .utils import DATA_DIR
+
+INDEX_DIR = os.path.join(DATA_DIR, "index")
+
+# Fields embedded per place (name counted twice - it is the strongest signal)
+EMBED_FIELDS = ("name", "name", "description", "cuisine", "famous_for", "category")
+
+DIMENSIONS = 64
+MAX_VOCAB = 2048
+# IVF (inverted file) ANN index only pays off on larger shards
+IVF_MIN_ROWS = 2000
+IVF_NPROBE = 8
+KMEANS_ITERATIONS = 8
+CHUNK_ROWS = 8192
+# Cosine below this is noise, not a match
+MIN_SIMILARITY = 0.05
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "its",
+    "of", "on", "or", "the", "to", "with", "your", "you", "this", "that", "but", "can", "also",
+}
+
+# Intent words that rarely appear literally in place descriptions
+QUERY_EXPANSIONS = {
+    "spicy": ["sambal", "chili", "chilli", "curry", "pedas"],
+    "breakfast": ["morning", "nasi", "lemak", "roti", "canai", "toast", "kaya", "dim", "sum"],
+    "supper": ["late", "night", "mamak"],
+    "family": ["kids", "children", "zoo", "park", "theme"],
+    "kids": ["children", "family", "zoo", "park"],
+    "museum": ["history", "gallery", "exhibits", "art"],
+    "nature": ["park", "garden", "forest", "trail", "wildlife"],
+    "vegetarian": ["vegetarian", "thosai", "idli"],
+    "seafood": ["fish", "crab", "prawns", "sotong"],
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with a light plural strip"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _document(record) -> str:
+    return " ".join(getattr(record, f) or "" for f in EMBED_FIELDS)
+
+
+def _fingerprint(documents: Sequence[str]) -> str:
+    digest = hashlib.sha1()
+    for doc in documents:
+        digest.update(doc.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+class SemanticIndex:
+    """
+    LSA vectors for one regional shard plus an optional IVF ANN index.
+
+    vectors: (rows, DIMENSIONS) float32, L2-normalised, memory-mapped when loaded from disk
+    postings: token -> sorted row IDs (keyword side of hybrid search)
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        idf: np.ndarray,
+        components: np.ndarray,
+        vectors: np.ndarray,
+        postings: Dict[str, np.ndarray],
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+        list_rows: Optional[np.ndarray] = None
+    ):
+        self.vocab = vocab
+        self.postings = postings
+        self.idf = idf
+        self.components = components
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+
+    # ---------- build ----------
+
+    @classmethod
+    def build(cls, documents: Sequence[str]) -> "SemanticIndex":
+        token_lists = [tokenize(doc) for doc in documents]
+        n = len(token_lists)
+
+        # Vocabulary: most widespread terms first, capped
+        df_counts: Dict[str, int] = {}
+        for tokens in token_lists:
+            for token in set(tokens):
+                df_counts[token] = df_counts.get(token, 0) + 1
+        terms = sorted(df_counts, key=lambda t: (-df_counts[t], t))[:MAX_VOCAB]
+        vocab = {term: i for i, term in enumerate(terms)}
+        idf = np.array([np.log((1 + n) / (1 + df_counts[t])) + 1 for t in terms], dtype=np.float32)
+
+        rows, cols, vals = _sparse_tfidf(token_lists, vocab, idf)
+        components = _top_components(rows, cols, vals, len(vocab), DIMENSIONS)
+        vectors = _project(rows, cols, vals, n, components)
+
+        postings: Dict[str, List[int]] = {}
+        for r, tokens in enumerate(token_lists):
+            for token in set(tokens):
+                postings.setdefault(token, []).append(r)
+
+        index = cls(vocab, idf, components, vectors,
+                    {t: np.array(rows_, dtype=np.int32) for t, rows_ in postings.items()})
+        if n >= IVF_MIN_ROWS:
+            index._build_ivf()
+        return index
+
+    def _build_ivf(self) -> None:
+        """Spherical k-means coarse quantizer; rows grouped by nearest centroid"""
+        n = len(self.vectors)
+        n_lists = max(8, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        centroids = np.array(self.vectors[rng.choice(n, n_lists, replace=False)])
+
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = self._assign(centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.maximum(norms, 1e-9))
+
+        assignment = self._assign(centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_lists)
+        self.centroids = centroids.astype(np.float32)
+        self.list_rows = order.astype(np.int32)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def _assign(self, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(self.vectors), dtype=np.int32)
+        for start in range(0, len(self.vectors), CHUNK_ROWS):
+            block = self.vectors[start:start + CHUNK_ROWS]
+            out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return out
+
+    # ---------- incremental update ----------
+
+    def updated(self, store, delta) -> "SemanticIndex":
+        """
+        Index for the next snapshot (see PlaceStore.apply). The model (vocab, idf,
+        components, IVF centroids) is kept and changed rows are folded in, so
+        existing vectors stay comparable; a full rebuild happens after compaction.
+        """
+        changed = delta.changed
+        token_lists = [tokenize(_document(store.records[i])) for i in changed]
+
+        vectors = delta.carry(np.asarray(self.vectors, dtype=np.float32))
+        if len(changed):
+            rows, cols, vals = _sparse_tfidf(token_lists, self.vocab, self.idf)
+            vectors[changed] = _project(rows, cols, vals, len(changed), self.components)
+
+        postings = {}
+        for token, rows_ in self.postings.items():
+            _, mapped = delta.remap_rows(rows_)
+            if len(mapped):
+                postings[token] = mapped.astype(np.int32)
+        additions: Dict[str, List[int]] = {}
+        for row, tokens in zip(changed, token_lists):
+            for token in set(tokens):
+                additions.setdefault(token, []).append(int(row))
+        for token, rows_ in additions.items():
+            merged = np.concatenate([postings.get(token, np.zeros(0, np.int32)), np.array(rows_, np.int32)])
+            postings[token] = np.sort(merged)
+
+        index = SemanticIndex(self.vocab, self.idf, self.components, vectors, postings)
+        if self.centroids is not None:
+            # Same quantizer, lists re-assigned (k-means is not re-run)
+            index.centroids = self.centroids
+            assignment = index._assign(self.centroids)
+            counts = np.bincount(assignment, minlength=len(self.centroids))
+            index.list_rows = np.argsort(assignment, kind="stable").astype(np.int32)
+            index.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return index
+
+    # ---------- persistence ----------
+
+    def save(self, prefix: str) -> None:
+        np.save(f"{prefix}.vectors.npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        extras = {}
+        if self.centroids is not None:
+            extras = dict(centroids=self.centroids, list_offsets=self.list_offsets, list_rows=self.list_rows)
+        post_terms = list(self.postings)
+        post_lengths = [len(self.postings[t]) for t in post_terms]
+        np.savez(
+            f"{prefix}.model.npz",
+            terms=np.array(list(self.vocab), dtype=str),
+            idf=self.idf,
+            components=self.components,
+            post_terms=np.array(post_terms, dtype=str),
+            post_offsets=np.concatenate([[0], np.cumsum(post_lengths)]).astype(np.int64),
+            post_rows=np.concatenate([self.postings[t] for t in post_terms] or [np.zeros(0, np.int32)]),
+            **extras
+        )
+
+    @classmethod
+    def load(cls, prefix: str) -> "SemanticIndex":
+        """Raises ValueError for files that need unpickling (older format) - rebuild those"""
+        with np.load(f"{prefix}.model.npz", allow_pickle=False) as model:
+            vocab = {term: i for i, term in enumerate(model["terms"].tolist())}
+            ivf = (model["centroids"], model["list_offsets"], model["list_rows"]) if "centroids" in model else (None, None, None)
+            idf, components = model["idf"], model["components"]
+            offsets, post_rows = model["post_offsets"], model["post_rows"]
+            postings = {
+                term: post_rows[offsets[i]:offsets[i + 1]]
+                for i, term in enumerate(model["post_terms"].tolist())
+            }
+        vectors = np.load(f"{prefix}.vectors.npy", mmap_mode="r")
+        return cls(vocab, idf, components, vectors, postings, *ivf)
+
+    # ---------- query ----------
+
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        tokens = tokenize(query)
+        expanded = list(tokens)
+        for token in tokens:
+            expanded.extend(QUERY_EXPANSIONS.get(token, []))
+
+        weights = np.zeros(len(self.vocab), dtype=np.float32)
+        for token in expanded:
+            i = self.vocab.get(token)
+            if i is not None:
+                # Original query words weigh more than expansions
+                weights[i] += self.idf[i] * (1.0 if token in tokens else 0.5)
+        if not weights.any():
+            return None
+
+        q = weights @ self.components
+        norm = np.linalg.norm(q)
+        return q / norm if norm else None
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        (row_id, cosine) pairs, best first. `allowed` is a boolean mask over rows.
+        Uses IVF probing when built, exact scan otherwise.
+        """
+        q = self.embed_query(query)
+        if q is None:
+            return []
+
+        if self.centroids is not None:
+            probes = np.argsort(self.centroids @ q)[::-1][:IVF_NPROBE]
+            candidates = np.concatenate([
+                self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+            ])
+        else:
+            candidates = np.arange(len(self.vectors))
+
+        if allowed is not None:
+            candidates = candidates[allowed[candidates]]
+        if len(candidates) == 0:
+            return []
+
+        scores = self.vectors[candidates] @ q
+        k = min(top_k, len(candidates))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(candidates[i]), float(scores[i])) for i in best if scores[i] >= MIN_SIMILARITY]
+
+    def keyword_matches(self, query_tokens: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(row IDs, number of distinct query tokens each row contains)"""
+        lists = [self.postings[t] for t in set(query_tokens) if t in self.postings]
+        if not lists:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+        rows, counts = np.unique(np.concatenate(lists), return_counts=True)
+        return rows, counts
+
+
+def _sparse_tfidf(token_lists, vocab, idf) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """COO triplets of the row-normalised TF-IDF matrix"""
+    rows, cols, vals = [], [], []
+    for r, tokens in enumerate(token_lists):
+        counts: Dict[int, int] = {}
+        for token in tokens:
+            c = vocab.get(token)
+            if c is not None:
+                counts[c] = counts.get(c, 0) + 1
+        if not counts:
+            continue
+        weights = {c: (1 + np.log(tf)) * idf[c] for c, tf in counts.items()}
+        norm = np.sqrt(sum(w * w for w in weights.values()))
+        for c, w in weights.items():
+            rows.append(r)
+            cols.append(c)
+            vals.append(w / norm)
+    return (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+            np.array(vals, dtype=np.float32))
+
+
+def _top_components(rows, cols, vals, n_terms: int, k: int) -> np.ndarray:
+    """
+    Right singular vectors of the TF-IDF matrix via the (terms x terms) Gram matrix.
+    The vocabulary cap keeps this small regardless of catalog size.
+    """
+    gram = np.zeros((n_terms, n_terms), dtype=np.float64)
+    # Group nnz by row - rows are emitted in order by _sparse_tfidf
+    boundaries = np.flatnonzero(np.diff(rows)) + 1
+    for r_cols, r_vals in zip(np.split(cols, boundaries), np.split(vals, boundaries)):
+        gram[np.ix_(r_cols, r_cols)] += np.outer(r_vals, r_vals)
+
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    k = min(k, n_terms)
+    top = eigenvectors[:, np.argsort(eigenvalues)[::-1][:k]]
+    components = np.zeros((n_terms, DIMENSIONS), dtype=np.float32)
+    components[:, :k] = top
+    return components
+
+
+def _project(rows, cols, vals, n_rows: int, components: np.ndarray) -> np.ndarray:
+    """Document vectors = TF-IDF @ components, L2-normalised"""
+    vectors = np.zeros((n_rows, components.shape[1]), dtype=np.float32)
+    for start in range(0, len(rows), CHUNK_ROWS * 16):
+        end = start + CHUNK_ROWS * 16
+        np.add.at(vectors, rows[start:end], vals[start:end, None] * components[cols[start:end]])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def get_semantic_index(store) -> SemanticIndex:
+    """
+    Semantic index for a PlaceStore, built once per snapshot.
+    Reuses data/index/<region>-<fingerprint>.* from disk when the text is unchanged.
+    """
+    def build() -> SemanticIndex:
+        documents = [_document(record) for record in store.records]
+        prefix = os.path.join(INDEX_DIR, f"{store.region}-{_fingerprint(documents)}")
+        if os.path.exists(f"{prefix}.model.npz") and os.path.exists(f"{prefix}.vectors.npy"):
+            try:
+                return SemanticIndex.load(prefix)
+            except ValueError:
+                pass  # Written by an older version (pickled vocabulary); rebuilt below
+
+        index = SemanticIndex.build(documents)
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            index.save(prefix)
+            # Re-open memory-mapped so the vectors live in the page cache, not the heap
+            return SemanticIndex.load(prefix)
+        except OSError:
+            return index
+
+    return store.derived("semantic_index", build)
@@ -0,0 +1,161 @@
+"""
+Typeahead suggestions - sorted-array prefix index over names, cuisines, categories, dishes
+Built once per snapshot; a lookup is a bisect plus a short scan
+"""
+
+import re
+import heapq
+from bisect import bisect_left
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from .place_store import get_place_stores
+
+# Suggestion kind -> PlaceRecord field
+SUGGEST_FIELDS = {
+    "name": "name",
+    "cuisine": "cuisine",
+    "category": "category",
+    "dish": "famous_for",
+}
+
+# Prefixes up to this length match too many keys to scan per keystroke,
+# so their ranked completions are precomputed at build time
+SHORT_PREFIX = 2
+SHORT_TOP = 20
+# Longer prefixes matching more than this many keys are precomputed too;
+# the rest are ranked by scanning their whole matching block
+MAX_SCAN = 512
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+class SuggestIndex:
+    """
+    Every word-start suffix of every suggestion text, sorted, so that
+    "lemak" completes "Nasi Lemak Wanjo Kg Baru" as well as "Lemak ...".
+
+    entries: (display text, kind, number of places) - one per distinct text/kind
+    """
+
+    def __init__(self, entries: Sequence[Tuple[str, str, int]]):
+        self.entries = list(entries)
+        self._full = [normalize(text) for text, _, _ in self.entries]
+        self._kinds = [kind for _, kind, _ in self.entries]
+        # Prefix-independent part of the ranking: popularity, then brevity
+        self._static = [(-count, len(text), text) for text, _, count in self.entries]
+
+        keyed = []
+        for eid, norm in enumerate(self._full):
+            for match in re.finditer(r"(?:^|(?<=[\s(&/-]))\w", norm):
+                keyed.append((norm[match.start():], eid))
+        keyed.sort()
+        self.keys = [key for key, _ in keyed]
+        self.ids = [eid for _, eid in keyed]
+
+        # (prefix, kind) -> best SHORT_TOP entry IDs, for every 1-2 character
+        # prefix and every longer one matching more than MAX_SCAN keys
+        self._top: Dict[Tuple[str, str], List[int]] = {}
+        pending, length = [(0, len(self.keys))], 1
+        while pending:
+            deeper = []
+            for lo, hi in pending:
+                i = lo
+                while i < hi:
+                    if len(self.keys[i]) < length:
+                        i += 1
+                        continue
+                    prefix = self.keys[i][:length]
+                    j = bisect_left(self.keys, prefix + "\uffff", i, hi)
+                    if length <= SHORT_PREFIX or j - i > MAX_SCAN:
+                        self._precompute(prefix, self.ids[i:j])
+                    if length < SHORT_PREFIX or j - i > MAX_SCAN:
+                        deeper.append((i, j))  # Longer prefixes inside this block may need it too
+                    i = j
+            pending, length = deeper, length + 1
+
+    def _precompute(self, prefix: str, eids: List[int]) -> None:
+        by_kind: Dict[str, set] = {}
+        for eid in eids:
+            by_kind.setdefault(self._kinds[eid], set()).add(eid)
+        for kind, group in by_kind.items():
+            self._top[(prefix, kind)] = heapq.nsmallest(SHORT_TOP, group, key=lambda e: self._rank(e, prefix))
+
+    @classmethod
+    def from_store(cls, store) -> "SuggestIndex":
+        counts: Dict[Tuple[str, str], int] = {}
+        display: Dict[Tuple[str, str], str] = {}
+        for record in store.records:
+            for kind, field in SUGGEST_FIELDS.items():
+                text = getattr(record, field)
+                if not text:
+                    continue
+                key = (normalize(text), kind)
+                counts[key] = counts.get(key, 0) + 1
+                display.setdefault(key, text.strip())
+        return cls([(display[key], key[1], count) for key, count in counts.items()])
+
+    def _rank(self, eid: int, prefix: str) -> Tuple:
+        # Whole-text prefix beats a mid-text word match, then popularity, then brevity
+        return (not self._full[eid].startswith(prefix),) + self._static[eid]
+
+    def suggest(
+        self,
+        prefix: str,
+        limit: int = 8,
+        kinds: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, str, int, Tuple]]:
+        """Ranked (text, kind, count, rank key) completions for a prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        kinds = list(kinds) if kinds else list(SUGGEST_FIELDS)
+
+        keys, ids, entry_kinds = self.keys, self.ids, self._kinds
+        start = end = 0
+        if len(prefix) > SHORT_PREFIX:
+            # Keys are sorted, so the matching block ends at the first non-match
+            start = bisect_left(keys, prefix)
+            end = bisect_left(keys, prefix + "\uffff", start)
+        if len(prefix) <= SHORT_PREFIX or end - start > MAX_SCAN:
+            eids = {eid for kind in kinds for eid in self._top.get((prefix, kind), [])}
+        else:
+            eids = {ids[i] for i in range(start, end) if entry_kinds[ids[i]] in kinds}
+
+        ranked = heapq.nsmallest(limit, eids, key=lambda e: self._rank(e, prefix))
+        return [(*self.entries[e], self._rank(e, prefix)) for e in ranked]
+
+
+def get_suggest_index(store) -> SuggestIndex:
+    """Suggest index for a PlaceStore, built once per snapshot"""
+    return store.derived("suggest_index", lambda: SuggestIndex.from_store(store))
+
+
+def suggest(
+    prefix: str,
+    limit: int = 8,
+    kinds: Optional[Sequence[str]] = None,
+    region: Optional[str] = None
+) -> List[Dict]:
+    """
+    Ranked completions merged across regional shards.
+    Returns [{"text", "type", "count"}], where count is the number of matching places.
+    """
+    unknown = [k for k in (kinds or []) if k not in SUGGEST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown suggestion type(s): {', '.join(unknown)}. "
+                         f"Use: {', '.join(SUGGEST_FIELDS)}")
+
+    merged: Dict[Tuple[str, str], List] = {}
+    for store in get_place_stores(region):
+        for text, kind, count, rank in get_suggest_index(store).suggest(prefix, limit, kinds):
+            key = (normalize(text), kind)
+            if key in merged:
+                merged[key][2] += count
+            else:
+                merged[key] = [text, kind, count, rank]
+
+    # Re-rank with the merged counts
+    ranked = sorted(merged.values(), key=lambda m: (m[3][0], -m[2], len(m[0]), m[0]))
+    return [{"text": text, "type": kind, "count": count} for text, kind, count, _ in ranked[:limit]]
@@ -0,0 +1,331 @@
+"""
+Lightweight request tracing - nested spans in a contextvar, exported per finished trace
+Spans only exist inside a traced request; elsewhere span() is a no-op
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+# "none" (trace IDs only), "jsonl" (local file) or "otlp" (OTLP/HTTP JSON collector)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_JSONL_PATH = os.getenv(
+    "TRACE_JSONL_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "data", "traces", "spans.jsonl")
+)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "malaysian-tourism-api")
+
+# Finished spans waiting for the exporter thread; beyond this they are dropped
+MAX_QUEUED_SPANS = 10000
+EXPORT_BATCH_SPANS = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """One timed operation. Attributes must be JSON-serialisable."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns",
+                 "attributes", "status", "_trace")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], trace: List["Span"]):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self._trace = trace
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._trace.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in outside a traced request"""
+
+    trace_id = span_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    active = _current_span.get()
+    return active.trace_id if active is not None else None
+
+
+def start_span(name: str, **attributes) -> Any:
+    """Child of the current span, NOT made current - for spans that end in another frame"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    child = Span(name, parent.trace_id, parent.span_id, parent._trace)
+    child.attributes.update(attributes)
+    return child
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """
+    Usage:
+        with span("search.match", mode=mode) as s:
+            ...
+            s.set("rows", total)
+    """
+    child = start_span(name, **attributes)
+    if child is NOOP_SPAN:
+        yield child
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: run the function inside span(name or its qualified name)"""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def root_span(name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None, **attributes):
+    """Start a trace (or continue a remote one); exports every span of it on exit"""
+    trace: List[Span] = []
+    root = Span(name, trace_id or _new_id(128), parent_id, trace)
+    root.attributes.update(attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        exporter.submit(trace)
+
+
+def log(*args) -> None:
+    """print() tagged with the current trace ID, so log lines join up with spans"""
+    trace_id = current_trace_id()
+    if trace_id:
+        print(f"[trace {trace_id}]", *args)
+    else:
+        print(*args)
+
+
+# ============================================
+# Exporters
+# ============================================
+
+class JsonlExporter:
+    """One span per line in a local file"""
+
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for item in spans:
+                f.write(json.dumps(item, default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Dict[str, Any]], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest body"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{
+            "scope": {"name": "tourism.tracing"},
+            "spans": [{
+                "traceId": s["trace_id"],
+                "spanId": s["span_id"],
+                "parentSpanId": s["parent_id"] or "",
+                "name": s["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(s["start_ns"]),
+                "endTimeUnixNano": str(s["end_ns"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+                "status": {"code": 2 if s["status"] == "error" else 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class OtlpHttpExporter:
+    """POSTs OTLP/JSON to {endpoint}/v1/traces (any OTLP collector, or scripts.trace_collector)"""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, timeout: float = 2.0):
+        self.url = f"{endpoint}/v1/traces"
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        self._client.post(self.url, json=to_otlp(spans)).raise_for_status()
+
+
+class MemoryExporter:
+    """Keeps the most recent spans in memory (tests, debugging)"""
+
+    def __init__(self, max_spans: int = 5000):
+        self.max_spans = max_spans
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        self.spans.extend(spans)
+        del self.spans[:-self.max_spans]
+
+
+def build_exporter(kind: str = TRACE_EXPORTER):
+    if kind == "jsonl":
+        return JsonlExporter()
+    if kind == "otlp":
+        return OtlpHttpExporter()
+    if kind == "memory":
+        return MemoryExporter()
+    return None
+
+
+class SpanExporter:
+    """
+    Hands finished traces to a backend on a background thread, in batches,
+    so requests never wait on disk or network.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: List[Span]) -> None:
+        if self.backend is None:
+            return
+        for finished in trace:
+            try:
+                self._queue.put_nowait(finished)
+            except queue.Full:
+                self.dropped += 1
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="span-exporter", daemon=True)
+                    self._thread.start()
+
+    def flush(self) -> None:
+        """Export everything queued so far, including batches the thread is holding"""
+        while not self._queue.empty():
+            self._export_batch(block=False)
+        self._queue.join()
+
+    def _export_batch(self, block: bool) -> None:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=EXPORT_INTERVAL_SECONDS) if block else self._queue.get_nowait())
+            while len(batch) < EXPORT_BATCH_SPANS:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return
+        try:
+            self.backend.export([s.to_dict() for s in batch])
+        except Exception as e:
+            self.failed += len(batch)
+            print("[tracing] Span export failed:", e)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _loop(self) -> None:
+        while True:
+            self._export_batch(block=True)
+
+
+# ============================================
+# Singleton instance for import
+# ============================================
+exporter = SpanExporter(build_exporter())
@@ -6,40 +6,148 @@ No JamAI dependencies - pure Python logic
 import pandas as pd
 from datetime import datetime, time
 import re
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import os
+import sys
 from functools import lru_cache
 
 # Get the data directory path
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 
-# Global cache variable
+# Regional shards: data/shards/<region>.csv (or .parquet), same columns as combine_new.csv
+SHARD_DIR = os.path.join(DATA_DIR, "shards")
+
+# combine_new.csv is served as this region when no shard file replaces it
+DEFAULT_REGION = "klang-valley"
+
+# Repetitive columns held as categoricals (one string per distinct value, int codes per row)
+CATEGORICAL_COLUMNS = ("Type", "Category", "Cuisine", "Halal_Status", "Price_Range", "Region")
+# ...unless a column has more distinct values than this share of its rows
+MAX_CATEGORY_RATIO = 0.5
+
+# Global cache variables
 _DF_CACHE = None
+_SHARD_CACHE: Dict[str, pd.DataFrame] = {}
+# ((SHARD_DIR, DATA_REGIONS) it was resolved for, region -> file, served regions)
+_REGION_CACHE: Optional[Tuple[Tuple[str, str], Dict[str, str], List[str]]] = None
+
+
+def _scan_shard_files() -> Dict[str, str]:
+    files = {}
+    if os.path.isdir(SHARD_DIR):
+        for filename in sorted(os.listdir(SHARD_DIR)):
+            region, ext = os.path.splitext(filename)
+            if ext == ".parquet" or (ext == ".csv" and region not in files):
+                files[region] = os.path.join(SHARD_DIR, filename)
+
+    if DEFAULT_REGION not in files:
+        parquet_path = os.path.join(DATA_DIR, "combined.parquet")
+        csv_path = os.path.join(DATA_DIR, "combine_new.csv")
+        if os.path.exists(parquet_path):
+            files[DEFAULT_REGION] = parquet_path
+        elif os.path.exists(csv_path):
+            files[DEFAULT_REGION] = csv_path
+
+    # Home region first so merged results keep the original dataset on top
+    if DEFAULT_REGION in files:
+        files = {DEFAULT_REGION: files.pop(DEFAULT_REGION), **files}
+    return files
+
+
+def _resolve_regions() -> Tuple[Dict[str, str], List[str]]:
+    """Shard directory listing, resolved once and reused until invalidate_regions()"""
+    global _REGION_CACHE
+    configured = os.getenv("DATA_REGIONS", "").strip()
+    key = (SHARD_DIR, configured)
+    if _REGION_CACHE is None or _REGION_CACHE[0] != key:
+        files = _scan_shard_files()
+        if configured:
+            regions = [r.strip() for r in configured.split(",") if r.strip() in files]
+        else:
+            regions = list(files)
+        _REGION_CACHE = (key, files, regions)
+    return _REGION_CACHE[1], _REGION_CACHE[2]
+
+
+def invalidate_regions() -> None:
+    """Forget the resolved shard files (a compaction or new shard changed the directory)"""
+    global _REGION_CACHE
+    _REGION_CACHE = None
+
+
+def _shard_files() -> Dict[str, str]:
+    """Region name -> data file, parquet preferred over csv"""
+    return _resolve_regions()[0]
+
+
+def list_regions() -> List[str]:
+    """
+    Regions this deployment serves.
+    Set DATA_REGIONS=klang-valley,penang to load a subset; default is every shard on disk.
+    """
+    return list(_resolve_regions()[1])
+
+
+def load_shard(region: str) -> pd.DataFrame:
+    """
+    Load one regional shard with caching. Shards are only read when first used.
+    """
+    if region in _SHARD_CACHE:
+        return _SHARD_CACHE[region]
+
+    if region not in list_regions():
+        raise ValueError(f"Unknown region '{region}'. Available: {', '.join(list_regions())}")
+
+    path = _shard_files()[region]
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df = compact_frame(df)
+    _SHARD_CACHE[region] = df
+    return df
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Low-cardinality columns as categoricals with interned categories, so the frame
+    and the PlaceRecords compiled from it share one string per distinct value.
+    """
+    conversions = {}
+    for column in CATEGORICAL_COLUMNS:
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = list(values.cat.categories)
+        elif values.dtype == object and values.nunique() <= MAX_CATEGORY_RATIO * len(values):
+            categories = list(values.dropna().unique())
+        else:
+            continue
+        if all(isinstance(c, str) for c in categories):
+            conversions[column] = pd.CategoricalDtype(sorted(sys.intern(c) for c in categories))
+    # astype builds new blocks - assigning columns in place would keep the old object block alive
+    return df.astype(conversions) if conversions else df
+
 
 def load_data() -> pd.DataFrame:
     """
     Load the tourism data with caching to prevent re-reading disk.
+    Returns every configured region as one DataFrame (with a Region column).
     """
     global _DF_CACHE
     if _DF_CACHE is not None:
         return _DF_CACHE
 
-    csv_path = os.path.join(DATA_DIR, "combine_new.csv")
-    parquet_path = os.path.join(DATA_DIR, "combined.parquet")
-    
-    if os.path.exists(parquet_path):
-        _DF_CACHE = pd.read_parquet(parquet_path)
-    elif os.path.exists(csv_path):
-        _DF_CACHE = pd.read_csv(csv_path)
-    else:
+    regions = list_regions()
+    if not regions:
         raise FileNotFoundError(
             f"No data file found. Place combine_new.csv or combined.parquet in {DATA_DIR}"
         )
-    
-    # Standardize column names to avoid key errors later
-    # _DF_CACHE.columns = _DF_CACHE.columns.str.strip() 
+
+    frames = [load_shard(region).assign(Region=region) for region in regions]
+    # Concatenating categoricals with different categories falls back to object - re-encode
+    _DF_CACHE = compact_frame(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True))
     return _DF_CACHE
 
+
 def parse_time(time_str: str) -> Optional[time]:
     """Convert time string to datetime.time object"""
     if not isinstance(time_str, str):
@@ -53,16 +161,75 @@ def parse_time(time_str: str) -> Optional[time]:
         except ValueError:
             return None
 
+# Matches "9:00 AM - 5:30 PM", "9am-12:30pm", "09:00-17:00" and "10:00 to 18:00"
+_TIME_RANGE_PATTERN = re.compile(
+    r'(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?',
+    re.IGNORECASE
+)
+
+
+def _to_minutes(hour: str, minute: Optional[str], meridiem: Optional[str]) -> int:
+    h = int(hour) % 24
+    if meridiem:
+        h = h % 12 + (12 if meridiem.lower() == "pm" else 0)
+    return h * 60 + int(minute or 0)
+
+
+def parse_time_ranges(text: str) -> List[Tuple[int, int]]:
+    """
+    Extract every time range in a string as (start, end) minutes since midnight.
+    End is 1440 for ranges that close at midnight; end < start means the range
+    crosses midnight (e.g. 15:30 - 02:30).
+    """
+    if not isinstance(text, str):
+        return []
+
+    ranges = []
+    for h1, m1, ap1, h2, m2, ap2 in _TIME_RANGE_PATTERN.findall(text):
+        # "2-4pm" style: borrow the closing meridiem when the start omits it
+        # ("11-1pm" means 11am, not 11pm)
+        if not ap1 and ap2 and not m1:
+            ap1 = ap2
+            if _to_minutes(h1, m1, ap1) > _to_minutes(h2, m2, ap2):
+                ap1 = "am" if ap2.lower() == "pm" else "pm"
+        # Skip bare numbers such as "Jalan 3-5" - need minutes or am/pm on each side
+        if not (m1 or ap1) or not (m2 or ap2):
+            continue
+        start = _to_minutes(h1, m1, ap1)
+        end = _to_minutes(h2, m2, ap2)
+        if end == 0:
+            end = 24 * 60
+        ranges.append((start, end))
+    return ranges
+
+
+def parse_opening_hours(opening_hours_str: str) -> List[Tuple[int, int]]:
+    """Opening intervals in minutes since midnight (day-of-week qualifiers are ignored)"""
+    if pd.isna(opening_hours_str):
+        return []
+    text = str(opening_hours_str).strip()
+    if "24/7" in text or "24 HOURS" in text.upper():
+        return [(0, 24 * 60)]
+    return parse_time_ranges(text)
+
+
+def is_open_at(intervals: List[Tuple[int, int]], minute_of_day: int) -> bool:
+    """Check a minute of the day against parsed opening intervals"""
+    for open_min, close_min in intervals:
+        if close_min < open_min:  # Crosses midnight (e.g. 18:00 - 02:00)
+            if minute_of_day >= open_min or minute_of_day <= close_min:
+                return True
+        elif open_min <= minute_of_day <= close_min:
+            return True
+    return False
+
+
 def is_open_now(opening_hours_str: str, check_time: Optional[str] = None) -> bool:
     """Check if a place is open at given time"""
-    if pd.isna(opening_hours_str):
+    intervals = parse_opening_hours(opening_hours_str)
+    if not intervals:
         return False
     
-    opening_hours_str = str(opening_hours_str).strip()
-    
-    if "24/7" in opening_hours_str or "24 HOURS" in opening_hours_str.upper():
-        return True
-    
     # Handle check_time
     if check_time is None:
         # WARNING: This uses server time. Ideally, pass a timezone-aware time from the frontend.
@@ -72,21 +239,8 @@ def is_open_now(opening_hours_str: str, check_time: Optional[str] = None) -> boo
         if check_time_obj is None:
             return False
     
-    # Regex improved to be slightly more lenient with spaces
-    pattern = r'(\d{1,2}:\d{2})\s*(?:-|to)\s*(\d{1,2}:\d{2})'
-    match = re.search(pattern, opening_hours_str, re.IGNORECASE)
-    
-    if match:
-        open_time = parse_time(match.group(1))
-        close_time = parse_time(match.group(2))
-        
-        if open_time and close_time:
-            if close_time < open_time: # Crosses midnight (e.g. 18:00 - 02:00)
-                return check_time_obj >= open_time or check_time_obj <= close_time
-            else: # Standard day (e.g. 09:00 - 17:00)
-                return open_time <= check_time_obj <= close_time
-    
-    return False
+    return is_open_at(intervals, check_time_obj.hour * 60 + check_time_obj.minute)
+
 
 def is_wheelchair_accessible(accessibility_info: str) -> bool:
     if pd.isna(accessibility_info):
@@ -102,6 +256,7 @@ def is_wheelchair_accessible(accessibility_info: str) -> bool:
     positive_keywords = ['wheelchair', 'ramp', 'lift', 'elevator', 'accessible']
     return any(x in info for x in positive_keywords)
 
+
 def matches_halal_requirement(place_halal_status: str, user_requirement: str) -> bool:
     if not user_requirement or user_requirement == "No preference":
         return True
@@ -109,9 +264,11 @@ def matches_halal_requirement(place_halal_status: str, user_requirement: str) ->
     if pd.isna(place_halal_status):
         return False
     
-    status = str(place_halal_status).strip().lower()
+    # Ignore qualifiers such as "Muslim-Friendly (Pork-Free)" / "Halal (Vegetarian)"
+    status = str(place_halal_status).split("(")[0].strip().lower()
     return status in ["halal", "muslim-friendly"]
 
+
 def extract_price_min(price_str: str) -> int:
     if pd.isna(price_str):
         return 999999
@@ -127,30 +284,33 @@ def extract_price_min(price_str: str) -> int:
     
     return 999999
 
+# Map CSV column names to output JSON keys (PlaceResponse fields)
+PLACE_FIELDS = {
+    "Name": "name",
+    "Type": "type",
+    "Image_URL": "image_url",
+    "Category": "category",
+    "Cuisine": "cuisine",
+    "Halal_Status": "halal_status",
+    "Famous_Dish": "famous_for",
+    "Price_Range": "price_range",
+    "Ticket_Price_Breakdown": "ticket_price",
+    "Opening_Hours": "opening_hours",
+    "Address": "address",
+    "Description": "description",
+    "Accessibility_Info": "accessibility_info",
+    "Public_Transport": "how_to_get_there",
+    "Contact_Website": "contact",
+}
+
+
 def format_place_response(row: pd.Series) -> Dict[str, Any]:
     """
-    Formats the row into a dictionary.
+    Formats a DataFrame row into a dictionary.
+    Request handlers use the compiled PlaceStore instead (see place_store.py).
     """
-    # Map CSV column names to output JSON keys
-    field_mapping = {
-        "Name": "name",
-        "Type": "type",  # <--- CHANGED: Was "place_type", now "type" to match Pydantic
-        "Description": "description",
-        "Category": "category",
-        "Contact": "contact",
-        "Ticket_Price": "ticket_price",
-        "Price_Range": "price_range",
-        "Halal_Status": "halal_status",
-        "Accessibility_Info": "accessibility_info",
-        "Open_Now": "open_now",
-        "Image_URL": "image_url",
-        "Address": "address",
-        "How_to_Get_There": "how_to_get_there",
-        "Opening_Hours": "opening_hours"
-    }
-    
     result = {}
-    for col_name, output_key in field_mapping.items():
+    for col_name, output_key in PLACE_FIELDS.items():
         val = row.get(col_name)
         # Convert NaN to empty string/None for JSON safety
         if pd.isna(val):
@@ -158,60 +318,35 @@ def format_place_response(row: pd.Series) -> Dict[str, Any]:
         else:
             result[output_key] = str(val)
 
-    # Handle the computed Open_Now if it exists in the row, otherwise default false
-    if "open_now" not in result:
-        result["open_now"] = False
-        
+    result["is_open_now"] = is_open_now(result["opening_hours"])
+    result["is_wheelchair_accessible"] = is_wheelchair_accessible(result["accessibility_info"])
     return result
-    
-    result = {}
-    for col_name, output_key in field_mapping.items():
-        val = row.get(col_name)
-        # Convert NaN to empty string/None for JSON safety
-        if pd.isna(val):
-            result[output_key] = None
-        else:
-            result[output_key] = str(val)
 
-    # Handle the computed Open_Now if it exists in the row, otherwise default false
-    if "open_now" not in result:
-        result["open_now"] = False
-        
-    return result
 
 def lookup_place_by_name(place_name: str) -> Optional[Dict]:
     """Look up a place by name."""
-    df = load_data()
-    
+    from .place_store import find_place
+
     if not place_name:
         return None
 
-    # Lowercase search for case-insensitive matching
-    place_name_lower = place_name.lower().strip()
-    
-    # Create a lowercased series for comparison to avoid re-computing it
-    # (In high perf scenarios, cache the lowercased name column too)
-    names_lower = df["Name"].astype(str).str.lower()
-    
-    # 1. Exact Match
-    match = df[names_lower == place_name_lower]
-    
-    # 2. Contains Match (Fuzzy) if exact fails
-    if match.empty:
-        match = df[names_lower.str.contains(place_name_lower, regex=False)]
-    
-    if not match.empty:
-        # Return the first match
-        return format_place_response(match.iloc[0])
-    
-    return None
+    found = find_place(place_name)
+    if found is None:
+        return None
+    store, row_id = found
+    return store.to_response(row_id)
+
 
 def enrich_itinerary_activity(activity: Dict) -> Dict:
     """
     Enrich an itinerary activity with full place data.
     """
+    from .tracing import span
+
     place_name = activity.get("place", "")
-    place_data = lookup_place_by_name(place_name)
+    with span("utils.enrich_itinerary_activity", place=place_name) as s:
+        place_data = lookup_place_by_name(place_name)
+        s.set("found", place_data is not None)
     
     # Start with existing activity data
     enriched = activity.copy()
@@ -220,7 +355,7 @@ def enrich_itinerary_activity(activity: Dict) -> Dict:
         # Safely update using data from DB
         # Only overwrite if the DB has data (not None)
         fields_to_enrich = [
-            "image_url", "address", "opening_hours", 
+            "image_url", "thumbnail_urls", "address", "opening_hours", 
             "price_range", "halal_status", "description", 
             "accessibility_info", "how_to_get_there"
         ]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.middleware.admission import (
+    AdmissionController, AdmissionMiddleware, AdmissionRule, Overloaded,
+    PRIORITY_STREAM, PRIORITY_DEFAULT
+)
+
+
+def test_queue_full_and_wait_timeout_reject_fast():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, max_wait=0.05)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as full:
+            await controller.acquire()
+        assert full.value.status_code == 503 and full.value.retry_after >= 1
+
+        with pytest.raises(Overloaded):
+            await waiter  # Nobody released within max_wait
+        controller.release()
+        assert controller.active == 0 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_streaming_waiters_are_admitted_first():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=5, max_wait=1)
+        await controller.acquire()
+        order = []
+
+        async def worker(name, priority):
+            await controller.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(worker("plain", PRIORITY_DEFAULT)),
+            asyncio.create_task(worker("stream", PRIORITY_STREAM)),
+        ]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        assert order == ["stream", "plain"]
+
+    asyncio.run(scenario())
+
+
+def test_per_client_token_bucket_returns_429():
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, rules=[
+        AdmissionRule("/slow", max_concurrent=2, max_queue=2, max_wait=1, rate_per_minute=60, rate_burst=2)
+    ])
+
+    @app.get("/slow")
+    def slow():
+        return {"ok": True}
+
+    @app.get("/fast")
+    def fast():
+        return {"ok": True}
+
+    client = TestClient(app)
+    codes = [client.get("/slow", headers={"X-API-Key": "a"}).status_code for _ in range(3)]
+    assert codes == [200, 200, 429]
+    assert client.get("/slow", headers={"X-API-Key": "b"}).status_code == 200
+    assert all(client.get("/fast").status_code == 200 for _ in range(5))
+
+    limited = client.get("/slow", headers={"X-API-Key": "a"})
+    assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
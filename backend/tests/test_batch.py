@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.place_store import find_place, find_places
+from backend.services.search_feature import search_batch, search_places
+
+client = TestClient(app)
+
+
+def test_search_batch_matches_individual_searches_in_order():
+    queries = [
+        {"place_type": "Food", "current_time": "12:00"},
+        {"halal_status": "Halal only", "filter_open_now": True, "current_time": "12:00", "include_facets": True},
+        {"place_type": "Food", "current_time": "12:00"},
+    ]
+    outputs = search_batch(queries)
+
+    assert [r for r, _ in outputs][0] == search_places(place_type="Food", current_time="12:00")
+    assert outputs[1][0] == search_places(halal_status="Halal only", filter_open_now=True, current_time="12:00")
+    assert outputs[1][1]["halal_status"]["Halal only"] == len(outputs[1][0])
+    assert outputs[2][0] is outputs[0][0]  # Identical query answered once
+
+
+def test_batch_endpoint_reports_failing_query_index():
+    resp = client.post("/api/search/batch", json={"queries": [{}, {"region": "atlantis"}]})
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("queries[1]:")
+
+
+def test_find_places_matches_find_place_in_order():
+    names = ["batu caves", "Zoo", "nothing like this", "", "KL BIRD PARK"]
+    expected = [find_place(n) for n in names]
+    assert [(m[1] if m else None) for m in find_places(names)] == [(m[1] if m else None) for m in expected]
+
+    resp = client.post("/api/places/lookup", json={"names": names})
+    body = resp.json()
+    assert body["found_count"] == 3
+    assert [r["query"] for r in body["results"]] == names
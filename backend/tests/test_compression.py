@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.middleware.compression import CompressionMiddleware, negotiate
+from backend.services.json_stream import iter_json_object
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("") is None
+
+
+def test_iter_json_object_matches_buffered_shape():
+    chunks = [[{"a": 1}], [], [{"a": 2}, {"a": 3}]]
+    body = b"".join(iter_json_object("results", chunks, {"total_count": 3}, {"b": None}))
+    assert body == b'{"results":[{"b":null,"a":1},{"b":null,"a":2},{"b":null,"a":3}],"total_count":3}'
+
+
+def test_streamed_search_matches_buffered_and_is_compressed():
+    client = TestClient(app)
+    buffered = client.get("/api/search", headers={"Accept-Encoding": "gzip"})
+    streamed = client.get("/api/search", params={"stream": "true"}, headers={"Accept-Encoding": "gzip"})
+
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert "content-length" not in streamed.headers
+    assert streamed.json() == buffered.json()
+
+
+def test_small_bodies_skip_and_repeats_reuse_compressed_bytes():
+    mini = FastAPI()
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @mini.get("/small")
+    def small():
+        return {"ok": True}
+
+    @mini.get("/big")
+    def big():
+        return {"rows": ["x" * 50] * 100}
+
+    @mini.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 50), media_type="text/event-stream")
+
+    client = TestClient(mini)
+    assert "content-encoding" not in client.get("/small").headers
+    assert "content-encoding" not in client.get("/events").headers
+
+    first = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert int(first.headers["content-length"]) < 1000
+    assert second.json() == first.json()
+    middleware = client.app.middleware_stack
+    while not isinstance(middleware, CompressionMiddleware):
+        middleware = middleware.app
+    assert middleware.cache.hits == 1
+
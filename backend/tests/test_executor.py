@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.executor import CpuExecutor, DeadlineExceeded
+
+
+def test_calls_run_off_the_event_loop_and_are_counted():
+    executor = CpuExecutor(mode="thread", threads=2)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(executor.run(time.sleep, 0.1) for _ in range(3)))
+        task.cancel()
+        return ticks, results
+
+    ticks, results = asyncio.run(scenario())
+    assert ticks >= 10  # Loop kept running while the sleeps blocked worker threads
+    stats = executor.snapshot()["pools"]["thread"]
+    assert stats["completed"] == 3 and stats["in_flight"] == 0
+    assert stats["max_wait_ms"] >= 50  # Third call queued behind two workers
+
+
+def test_deadline_raises_and_is_recorded():
+    executor = CpuExecutor(mode="thread", threads=1, deadline=0.05)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(executor.run(time.sleep, 0.3))
+    assert executor.snapshot()["pools"]["thread"]["timed_out"] == 1
+
+
+def test_admin_metrics_require_token(monkeypatch):
+    client = TestClient(app)
+    assert client.get("/api/admin/executor").status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/executor", headers={"X-Admin-Token": "nope"}).status_code == 403
+    body = client.get("/api/admin/executor", headers={"X-Admin-Token": "s3cret"}).json()
+    assert "thread" in body["pools"]
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services import facets
+from backend.services.place_store import get_place_store
+from backend.services.facets import FacetIndex, get_facet_index
+from backend.services.search_feature import facet_counts
+
+
+def test_select_matches_per_record_filters():
+    store = get_place_store()
+    ids = store.filter(place_type="Food", halal_status="Halal only", filter_open_now=True, current_time="13:00")
+
+    expected = [
+        i for i, r in enumerate(store.records)
+        if r.type == "Food" and r.is_halal and r.is_open(13 * 60)
+    ]
+    assert ids == expected
+
+
+def test_counts_ignore_own_dimension():
+    store = get_place_store()
+    index = get_facet_index(store)
+    counts = index.counts(place_type="Food", halal_status="Halal only")
+
+    # Each option's count equals the size of the result set if it were selected
+    halal_food = len(store.filter(place_type="Food", halal_status="Halal only"))
+    assert counts["place_type"]["Food"] == halal_food
+    assert counts["halal_status"]["Halal only"] == halal_food
+    assert counts["halal_status"]["No preference"] == len(store.filter(place_type="Food"))
+    assert counts["place_type"]["All"] == len(store.filter(halal_status="Halal only"))
+
+
+def test_facet_counts_over_shards():
+    facets = facet_counts(price_range="Budget", current_time="10:00")
+
+    assert set(facets) == {"place_type", "price_range", "halal_status", "accessibility", "filter_open_now"}
+    assert facets["price_range"]["Budget"] == facets["place_type"]["All"]
+    assert "true" in facets["filter_open_now"]
+
+
+def test_bitset_caches_are_lru_and_thread_safe(monkeypatch):
+    monkeypatch.setattr(facets, "OPEN_CACHE_SIZE", 2)
+    index = FacetIndex(get_place_store().records)
+    first = index.open_bits(600)
+    index.open_bits(700)
+    assert index.open_bits(600) is first  # Hit moves 600 to the back
+    index.open_bits(800)
+    assert list(index._open_cache) == [600, 800]
+
+    monkeypatch.setattr(facets, "QUERY_CACHE_SIZE", 4)
+    queries = [f"{c}{d}" for c in "aeiou" for d in "nrst"]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda q: facets.popcount(index.query_bits(q)), queries * 50))
+    expected = [int(index.texts.contains(q).sum()) for q in queries]
+    assert results == expected * 50
@@ -0,0 +1,74 @@
+import time
+import threading
+
+import pytest
+
+from backend.services.hedging import Hedger, pool_threads
+
+
+def _warm(hedger, key, seconds=0.01, calls=20):
+    for _ in range(calls):
+        hedger.call(key, time.sleep, seconds)
+
+
+def test_slow_call_is_hedged_and_the_first_success_wins():
+    hedger = Hedger(percentile=95, budget=1.0, min_samples=20)
+    _warm(hedger, "TripPlanner")
+    assert hedger.delay("TripPlanner") < 0.05
+
+    attempts = []
+
+    def upstream():
+        attempts.append(threading.current_thread().name)
+        if len(attempts) == 1:
+            time.sleep(0.5)  # The stuck run
+            return "slow"
+        return "fast"
+
+    started = time.perf_counter()
+    assert hedger.call("TripPlanner", upstream) == "fast"
+    assert time.perf_counter() - started < 0.3
+    assert (hedger.hedged, hedger.hedge_wins) == (1, 1)
+
+
+def test_hedges_stay_within_budget():
+    hedger = Hedger(percentile=50, budget=0.1, min_samples=20)
+    _warm(hedger, "TripPlannerSlot", seconds=0.002)
+    for _ in range(20):
+        hedger.call("TripPlannerSlot", time.sleep, 0.02)
+    # 40 calls at 10% -> 4 hedges, plus the one of slack
+    assert hedger.hedged <= 0.1 * hedger.calls + 1
+    assert hedger.budget_denied > 0
+
+
+def test_errors_surface_when_every_attempt_fails():
+    hedger = Hedger(percentile=50, budget=1.0, min_samples=1)
+    hedger.call("TripPlannerFinal", time.sleep, 0.001)
+
+    def broken():
+        time.sleep(0.02)
+        raise RuntimeError("upstream 500")
+
+    with pytest.raises(RuntimeError, match="upstream 500"):
+        hedger.call("TripPlannerFinal", broken)
+    assert hedger.hedged == 1
+
+
+def test_queue_wait_is_not_upstream_latency():
+    hedger = Hedger(percentile=95, budget=1.0, min_samples=20, threads=1)
+    _warm(hedger, "TripPlanner")
+    blocker = hedger._pool.submit(time.sleep, 0.3)  # Every pool thread busy
+
+    started = time.perf_counter()
+    hedger.call("TripPlanner", time.sleep, 0.001)
+    # Ran on the caller's thread instead of queueing behind the blocker; neither hedged nor recorded as slow
+    assert time.perf_counter() - started < 0.2 and not blocker.done()
+    assert hedger.hedged == 0
+    assert hedger.windows["TripPlanner"].samples[-1] < 0.1
+    blocker.result()
+
+
+def test_pool_is_sized_from_calls_in_flight():
+    assert pool_threads(32, budget=0.05) == 34
+    assert pool_threads(4, budget=0.05) == 5
+    assert Hedger(budget=0.05).threads == pool_threads(budget=0.05)
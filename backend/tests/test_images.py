@@ -0,0 +1,32 @@
+import os
+
+from PIL import Image
+
+from backend.services import images
+from backend.services.images import build_thumbnails, image_key
+
+
+def test_image_key_from_github_url():
+    url = "https://raw.githubusercontent.com/x/y/frid/images/nasi%20lemak%20wanjo.jpg"
+    assert image_key(url) == "nasi-lemak-wanjo"
+    assert image_key(None) is None
+
+
+def test_build_writes_hashed_variants_and_urls(tmp_path, monkeypatch):
+    source = tmp_path / "Big Photo.png"
+    Image.new("RGBA", (1600, 1200), (200, 30, 30, 255)).save(source)
+    out = tmp_path / "thumbs"
+
+    manifest = build_thumbnails([str(source)], out_dir=str(out))
+
+    variants = manifest["big-photo"]["variants"]
+    assert set(variants) == {"sm", "md", "lg"}
+    with Image.open(out / variants["md"]["webp"]) as img:
+        assert img.size == (320, 240)
+    assert os.path.getsize(out / variants["sm"]["jpeg"]) < os.path.getsize(source) / 10
+
+    monkeypatch.setattr(images, "THUMB_DIR", str(out))
+    urls = images.thumbnail_urls("https://example.com/images/Big%20Photo.png")
+    assert urls["sm"].startswith("/api/images/big-photo/sm?v=")
+    path, media_type, _ = images.resolve_thumbnail("big-photo", "sm", accept="image/webp,*/*")
+    assert media_type == "image/webp" and os.path.exists(path)
@@ -0,0 +1,146 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.scripts.generate_catalog import generate_region
+from backend.services import ingest, place_store, utils
+from backend.services.executor import CpuExecutor
+from backend.services.facets import FacetIndex, get_facet_index
+from backend.services.place_store import get_place_store
+from backend.services.search_feature import search_places
+from backend.services.semantic_index import SemanticIndex, _document, get_semantic_index
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    generate_region("penang", 80, random.Random(5), images=[]).to_csv(tmp_path / "penang.csv", index=False)
+    monkeypatch.setattr(utils, "SHARD_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_SHARD_CACHE", {})
+    monkeypatch.setattr(place_store, "_STORE_CACHE", {})
+    monkeypatch.setattr(place_store, "_STORE_SOURCE", {})
+    monkeypatch.setattr(ingest, "INGEST_DIR", str(tmp_path / "ingest"))
+    for state in ("_SEQ", "_LOG_OPS", "_LAST_COMPACTION"):
+        monkeypatch.setattr(ingest, state, {})
+    monkeypatch.setenv("DATA_REGIONS", "penang")
+    return tmp_path
+
+
+def _change_batch(store):
+    first, second, third = store.records[0], store.records[1], store.records[2]
+    upserts = [
+        {"Name": first.name, "Opening_Hours": "Monday to Sunday: 3:00 AM - 4:00 AM"},
+        {"Name": second.name.upper(), "Halal_Status": None},
+        {"Name": "Kopi Tiam Baru", "Type": "Food", "Category": "Cafe", "Price_Range": "Budget",
+         "Halal_Status": "Halal", "Opening_Hours": "Monday to Sunday: 7:00 AM - 10:00 PM"},
+    ]
+    return upserts, [third.name]
+
+
+def test_delta_updated_indexes_match_a_rebuild(catalog):
+    store = get_place_store("penang")
+    get_facet_index(store).counts(open_minute=8 * 60)  # Warm the open-bits cache too
+    get_semantic_index(store)
+
+    upserts, deletes = _change_batch(store)
+    summary = ingest.ingest_places(upserts, deletes, region="penang")
+    assert (summary["inserted"], summary["updated"], summary["deleted"]) == (1, 2, 1)
+
+    live = get_place_store("penang")
+    assert live is not store and len(live) == len(store)
+    rebuilt = FacetIndex(live.records)
+    for filters in ({"place_type": "Food", "halal_status": "Halal only"},
+                    {"minute_of_day": 8 * 60}, {"minute_of_day": 3 * 60 + 30},
+                    {"search_query": "kopi"}):
+        assert get_facet_index(live).select(**filters) == rebuilt.select(**filters)
+
+    semantic = get_semantic_index(live)
+    fresh = SemanticIndex.build([_document(r) for r in live.records])
+    assert semantic.vectors.shape == fresh.vectors.shape
+    assert semantic.postings.keys() == fresh.postings.keys()
+    assert all(np.array_equal(semantic.postings[t], fresh.postings[t]) for t in fresh.postings)
+    assert live.find_by_name(store.records[2].name) is None
+
+
+def test_changes_are_searchable_replayed_and_compacted(catalog):
+    store = get_place_store("penang")
+    upserts, deletes = _change_batch(store)
+    ingest.ingest_places(upserts, deletes, region="penang")
+
+    open_early = {p["name"] for p in search_places(region="penang", filter_open_now=True, current_time="03:30")}
+    assert store.records[0].name in open_early
+    assert store.records[2].name not in {p["name"] for p in search_places(region="penang")}
+    assert search_places(region="penang", search_query="Kopi Tiam Baru")[0]["name"] == "Kopi Tiam Baru"
+
+    # A restart recompiles the snapshot and replays the log
+    place_store._STORE_CACHE.clear()
+    utils._SHARD_CACHE.clear()
+    replayed = get_place_store("penang")
+    assert [r.to_dict() for r in replayed.records] == [r.to_dict() for r in get_place_store("penang").records]
+    assert replayed.find_by_name("kopi tiam baru") is not None
+    assert ingest.ingest_status()["penang"]["log_ops"] == 4
+
+    result = ingest.compact("penang")
+    assert result["rows"] == len(replayed) and result["log_ops"] == 0
+    assert get_place_store("penang") is replayed  # Not recompiled
+
+    place_store._STORE_CACHE.clear()
+    utils._SHARD_CACHE.clear()
+    reloaded = get_place_store("penang")
+    assert [r.to_dict() for r in reloaded.records] == [r.to_dict() for r in replayed.records]
+
+
+def test_process_workers_see_ingested_and_compacted_changes(catalog):
+    store = get_place_store("penang")
+    executor = CpuExecutor(mode="process", processes=1)
+
+    def names(**filters):
+        results = asyncio.run(executor.run(search_places, region="penang", **filters))
+        return {p["name"] for p in results}
+
+    try:
+        assert "Kopi Tiam Baru" not in names()  # Worker compiled the snapshot at start-up
+        upserts, deletes = _change_batch(store)
+        ingest.ingest_places(upserts, deletes, region="penang")
+        assert "Kopi Tiam Baru" in names(search_query="kopi tiam baru")
+        assert store.records[2].name not in names()
+
+        ingest.compact("penang")
+        ingest.ingest_places([], [store.records[3].name], region="penang")
+        after = names()
+        assert "Kopi Tiam Baru" in after and store.records[3].name not in after
+        assert len(after) == len(get_place_store("penang"))
+    finally:
+        executor._process_pool.shutdown()
+
+
+def test_invalid_rows_are_rejected_without_applying(catalog):
+    store = get_place_store("penang")
+    with pytest.raises(ValueError) as e:
+        ingest.ingest_places([
+            {"Name": store.records[0].name, "Rating": "5"},
+            {"Name": store.records[1].name, "Opening_Hours": "whenever"},
+        ], region="penang")
+    assert "upserts[0]: unknown column(s) Rating" in str(e.value)
+    assert "upserts[1]: Opening_Hours 'whenever' could not be parsed" in str(e.value)
+
+    with pytest.raises(ValueError, match="needs Type"):
+        ingest.ingest_places([{"Name": "Brand New Place"}], region="penang")
+    assert get_place_store("penang") is store
+    assert ingest.ingest_status()["penang"]["log_ops"] == 0
+
+
+def test_admin_ingest_route_validates(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    resp = client.post(
+        "/api/admin/places",
+        json={"upserts": [{"Name": "", "Colour": "red"}]},
+        headers={"X-Admin-Token": "secret"}
+    )
+    assert resp.status_code == 400
+    assert "Name is required" in resp.json()["detail"]
@@ -0,0 +1,80 @@
+import time
+import threading
+
+from backend.services.itinerary_cache import ItineraryCache, ItineraryPrefetcher, itinerary_key
+
+PROFILE = ("Halal only", "Public transport", "No preference")
+
+
+class FakeUpstream:
+    def __init__(self, seconds=0.0):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self, **params):
+        self.calls.append(params)
+        time.sleep(self.seconds)
+        return {"itinerary": [{"place": "Jalan Alor"}], "params": params}
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_prefetched_itinerary_is_served_from_cache():
+    cache = ItineraryCache(ttl=60)
+    upstream = FakeUpstream()
+    prefetcher = ItineraryPrefetcher(cache, upstream, enabled=True, per_minute=60)
+    prefetcher.record_request("10:30", *PROFILE)
+
+    assert prefetcher.observe(PROFILE)
+    key = itinerary_key("10:30", *PROFILE)
+    assert _wait_for(lambda: cache.snapshot().get("prefetched") == 1)
+    assert not prefetcher.observe(PROFILE)  # Already cached
+
+    result = cache.get_or_generate(key, lambda: upstream(start_time="never"))
+    assert result["params"]["start_time"] == "10:30" and len(upstream.calls) == 1
+    stats = cache.snapshot()
+    assert (stats["prefetch_hits"], stats["prefetch_hit_rate"]) == (1, 1.0)
+
+
+def test_user_request_joins_a_prefetch_in_flight():
+    cache = ItineraryCache(ttl=60)
+    upstream = FakeUpstream(seconds=0.2)
+    key = itinerary_key("09:00", *PROFILE)
+    worker = threading.Thread(target=cache.prefetch, args=(key, lambda: upstream(start_time="09:00")))
+    worker.start()
+    assert _wait_for(lambda: cache.contains(key))
+
+    result = cache.get_or_generate(key, lambda: upstream(start_time="duplicate"))
+    worker.join()
+    assert result["params"]["start_time"] == "09:00" and len(upstream.calls) == 1
+    assert cache.snapshot()["prefetch_hits"] == 1
+    assert cache.snapshot().get("prefetch_wasted", 0) == 0
+
+
+def test_prefetch_respects_budget_and_yields_to_users():
+    cache = ItineraryCache(ttl=60)
+    prefetcher = ItineraryPrefetcher(cache, FakeUpstream(), enabled=True, per_minute=6, max_foreground=1)
+    profiles = [(d, t, "No preference") for d in ("Halal only", "No preference")
+                for t in ("Public transport", "Taxi/Grab", "Own vehicle")]
+    accepted = sum(prefetcher.observe(p) for p in profiles)
+    assert accepted == 1 and prefetcher.stats["budget_denied"] == len(profiles) - 1
+
+    cache.foreground = 1  # A user generation is running
+    prefetcher.tokens = prefetcher.capacity
+    assert not prefetcher.observe(("Halal only", "Own vehicle", "Wheelchair-friendly"))
+    assert prefetcher.stats["skipped_load"] == 1
+
+
+def test_cache_is_a_passthrough_when_disabled():
+    cache = ItineraryCache(ttl=0)
+    upstream = FakeUpstream()
+    key = itinerary_key("09:00", *PROFILE)
+    cache.get_or_generate(key, lambda: upstream(start_time="09:00"))
+    cache.get_or_generate(key, lambda: upstream(start_time="09:00"))
+    assert len(upstream.calls) == 2
+    assert not ItineraryPrefetcher(cache, upstream, enabled=True).enabled
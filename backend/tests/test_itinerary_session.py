@@ -0,0 +1,159 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.itinerary_session import ItinerarySession
+from backend.services.place_store import find_place
+
+DAY = [
+    {"time": "08:00-09:00", "place": "Pure Saiva", "type": "Breakfast"},
+    {"time": "09:30-11:30", "place": "Batu Caves", "type": "Attraction"},
+    {"time": "12:00-13:00", "place": "Nam Heong Chicken Rice", "type": "Lunch"},
+    {"time": "14:00-16:00", "place": "KL Bird Park", "type": "Attraction"},
+    {"time": "18:00-19:00", "place": "Sri Nirwana Maju", "type": "Dinner"},
+]
+
+
+def _record(name):
+    store, row_id = find_place(name)
+    return store.records[row_id]
+
+
+def test_replacing_a_slot_only_touches_that_slot():
+    session = ItinerarySession(DAY, "08:00")
+    before = [a["place"] for a in session.activities]
+    delta = session.apply({"op": "replace_slot", "slot": "lunch"})
+
+    assert delta["version"] == 1 and delta["repairs"] == []
+    changed = {c["slot"] for c in delta["changes"]}
+    assert 2 in changed and changed <= {2, 3}  # Lunch, plus the leg out of it
+    new_place = session.activities[2]["place"]
+    assert new_place not in before and _record(new_place).type == "Food"
+    assert _record(new_place).is_open(12 * 60)
+    assert session.activities[2]["address"]  # Enriched like a generated itinerary
+    assert [a["place"] for i, a in enumerate(session.activities) if i != 2] == before[:2] + before[3:]
+
+
+def test_constraint_change_repairs_only_failing_slots():
+    session = ItinerarySession(DAY, "08:00")
+    delta = session.apply({"op": "set_constraint", "dietary": "Halal only"})
+
+    assert [r["slot"] for r in delta["repairs"]] == [2]  # Nam Heong is not halal
+    assert _record(session.activities[2]["place"]).is_halal
+    assert session.constraints["dietary"] == "Halal only"
+
+    delta = session.apply({"op": "set_constraint", "transport": "Taxi/Grab"})
+    assert delta["repairs"] == [] and all(c["slot"] > 0 for c in delta["changes"])
+    assert [a["place"] for a in session.activities][:2] == ["Pure Saiva", "Batu Caves"]
+
+
+def test_shifting_the_start_moves_windows_and_replaces_closed_places():
+    session = ItinerarySession(DAY, "08:00")
+    delta = session.apply({"op": "shift_start", "start_time": "12:00"})
+
+    assert [a["time"] for a in session.activities][0] == "12:00-13:00"
+    assert session.activities[2]["time"] == "16:00-17:00"
+    assert [r["slot"] for r in delta["repairs"]] == [2]  # Nam Heong shuts at 15:00
+    assert _record(session.activities[2]["place"]).is_open(16 * 60)
+    assert session.activities[4]["place"] == "Sri Nirwana Maju"
+
+
+def test_invalid_edit_leaves_state_untouched():
+    session = ItinerarySession(DAY, "08:00")
+    with pytest.raises(ValueError):
+        session.apply({"op": "replace_slot", "slot": 1, "place": "Imaginary Seafood Palace"})
+    with pytest.raises(ValueError):
+        session.apply({"op": "set_constraint", "dietary": "Vegan"})
+    assert session.version == 0 and session.constraints["dietary"] == "No preference"
+    assert [a["place"] for a in session.activities] == [a["place"] for a in DAY]
+
+
+@pytest.mark.parametrize("op", [
+    ["replace_slot"],
+    {"op": ["x"]},
+    {"op": "replace_slot", "slot": 1, "place": 5},
+    {"op": "replace_slot", "slot": [1]},
+    {"op": "shift_start", "start_time": 930},
+    {"op": "set_constraint", "dietary": ["Halal only"]},
+])
+def test_wrong_typed_edits_are_value_errors(op):
+    session = ItinerarySession(DAY, "08:00")
+    with pytest.raises(ValueError):
+        session.apply(op)
+    assert session.version == 0 and [a["place"] for a in session.activities] == [a["place"] for a in DAY]
+
+
+@pytest.mark.parametrize("itinerary", [[5], "Batu Caves", [{"place": 5, "time": "09:00-10:00"}]])
+def test_wrong_typed_itineraries_are_value_errors(itinerary):
+    with pytest.raises(ValueError):
+        ItinerarySession(itinerary, "08:00")
+
+
+def test_unexpected_failures_roll_back(monkeypatch):
+    session = ItinerarySession(DAY, "08:00")
+
+    def broken(self, op, records):
+        self.activities[0]["place"] = "Half-written"
+        raise KeyError("boom")
+
+    monkeypatch.setitem(ItinerarySession.OPERATIONS, "shift_start", broken)
+    with pytest.raises(KeyError):
+        session.apply({"op": "shift_start", "start_time": "09:00"})
+    assert session.activities[0]["place"] == "Pure Saiva" and session.start_time == "08:00"
+
+
+def test_websocket_session_pushes_deltas():
+    client = TestClient(app)
+    with client.websocket_connect("/api/itinerary/session") as ws:
+        ws.send_json({"type": "edit", "id": 1, "op": "shift_start", "start_time": "09:00"})
+        assert ws.receive_json() == {"type": "error", "id": 1, "detail": "Send a start message first"}
+
+        ws.send_json({"type": "start", "id": 2, "itinerary": DAY, "start_time": "08:00"})
+        state = ws.receive_json()
+        assert state["type"] == "state" and len(state["itinerary"]) == 5
+
+        ws.send_json({"type": "edit", "id": 3, "op": "replace_slot", "slot": 3, "place": "zoo negara"})
+        delta = ws.receive_json()
+        assert (delta["type"], delta["id"], delta["version"]) == ("delta", 3, 1)
+        assert any(c["slot"] == 3 and c["activity"]["place"] == "Zoo Negara" for c in delta["changes"])
+        assert delta["ms"] < 1000
+
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+
+        # Malformed messages get an error reply; the socket and the itinerary survive
+        for i, bad in enumerate([
+            {"type": "edit", "op": ["x"]},
+            {"type": "edit", "op": "replace_slot", "slot": 1, "place": 5},
+            {"type": "start", "itinerary": [5]},
+            ["edit"],
+        ]):
+            ws.send_json({**bad, "id": 10 + i} if isinstance(bad, dict) else bad)
+            reply = ws.receive_json()
+            assert reply["type"] == "error", bad
+
+        ws.send_json({"type": "edit", "id": 20, "op": "replace_slot", "slot": 3, "place": "KL Bird Park"})
+        delta = ws.receive_json()
+        assert (delta["type"], delta["version"]) == ("delta", 2)
+
+
+def test_ai_edits_are_admission_controlled(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    client = TestClient(app)
+    with client.websocket_connect("/api/itinerary/session", headers={"x-api-key": "session-test"}) as ws:
+        ws.send_json({"type": "start", "id": 1, "itinerary": DAY, "start_time": "08:00"})
+        assert ws.receive_json()["type"] == "state"
+
+        replies = []
+        for i in range(4):  # Burst of 3 per client
+            ws.send_json({"type": "edit", "id": 10 + i, "op": "replace_slot", "slot": "afternoon", "ai": True})
+            replies.append(ws.receive_json())
+        assert [r["type"] for r in replies] == ["delta", "delta", "delta", "error"]
+        assert replies[-1]["status"] == 429 and replies[-1]["retry_after"] >= 1
+
+        # Plain edits are local and never rate limited
+        ws.send_json({"type": "edit", "id": 20, "op": "shift_start", "start_time": "08:30"})
+        assert ws.receive_json()["type"] == "delta"
+
+    stats = client.get("/api/admin/admission", headers={"X-Admin-Token": "secret"}).json()["/api/itinerary"]
+    assert stats["active"] == 0 and stats["rate_limited"] >= 1
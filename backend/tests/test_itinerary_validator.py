@@ -0,0 +1,49 @@
+from backend.services.itinerary_validator import finalize_itinerary, validate_itinerary
+from backend.services.place_store import find_place
+
+
+def _record(name):
+    store, row_id = find_place(name)
+    return store.records[row_id]
+
+
+def test_invalid_picks_are_replaced_with_valid_same_type_places():
+    activities = [
+        # Not halal
+        {"time": "12:00 - 13:00", "place": "Kim Lian Kee", "type": "Lunch"},
+        # Closed at 08:00 (opens 16:00)
+        {"time": "08:00 - 09:00", "place": "Valentine Roti", "type": "Breakfast"},
+        # Hallucinated
+        {"time": "19:00 - 20:00", "place": "Imaginary Seafood Palace", "type": "Dinner"},
+    ]
+    repaired, repairs = validate_itinerary(activities, dietary="Halal only")
+
+    assert [r["original_place"] for r in repairs] == [a["place"] for a in activities]
+    for activity, repair in zip(repaired, repairs):
+        assert repair["replacement_place"] == activity["place"]
+        record = _record(activity["place"])
+        start = int(activity["time"][:2]) * 60
+        assert record.type == "Food" and record.is_halal and record.is_open(start)
+    assert len({a["place"] for a in repaired}) == 3
+
+
+def test_valid_itinerary_is_untouched_and_duplicates_are_replaced():
+    activities = [
+        {"time": "12:00 - 13:00", "place": "Canton Boy", "type": "Lunch"},
+        {"time": "19:00 - 20:00", "place": "canton boy", "type": "Dinner"},
+    ]
+    repaired, repairs = validate_itinerary(activities)
+    assert repaired[0] is activities[0]
+    assert len(repairs) == 1 and "already in the itinerary" in repairs[0]["reasons"][0]
+    assert repaired[1]["place"].lower() != "canton boy"
+
+    routed, _, repairs = finalize_itinerary(activities[:1], "No preference", "Public transport", "No preference")
+    assert repairs == [] and routed[0]["place"] == "Canton Boy"
+
+
+def test_allowed_names_restrict_substitutes():
+    allowed = ["Canton Boy", "Sri Nirwana Maju"]
+    activities = [{"time": "12:00 - 13:00", "place": "Yut Kee Restaurant", "type": "Lunch"}]
+    repaired, repairs = validate_itinerary(activities, allowed_names=allowed)
+    assert repaired[0]["place"] in allowed
+    assert "not among the allowed places" in repairs[0]["reasons"][0]
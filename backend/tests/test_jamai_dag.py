@@ -0,0 +1,83 @@
+import json
+import time
+
+from backend.services.jamai_client import JamAIClient, SLOT_TABLE_ID, FINAL_TABLE_ID
+from backend.services.place_store import get_place_stores
+
+
+def make_client(monkeypatch, picks, delay=0.1):
+    client = JamAIClient()
+    client.client = object()
+    calls = []
+
+    def fake_call(table_id, row):
+        calls.append((table_id, dict(row)))
+        time.sleep(delay)
+        if table_id == SLOT_TABLE_ID:
+            options = [p for p in picks[row["slot"]] if p not in row["exclude"].split(", ")]
+            return {"choice": json.dumps({"place": options[0], "reasoning": row["slot"]})}
+        if table_id == FINAL_TABLE_ID:
+            return {"validate": "ok", "final": "not json"}
+        return {"parse": "parsed"}
+
+    monkeypatch.setattr(client, "_call_table", fake_call)
+    return client, calls
+
+
+def test_slots_run_concurrently(monkeypatch):
+    picks = {
+        "breakfast": ["Restoran Kedai Kopi Sitiawan"],
+        "morning": ["Islamic Arts Museum Malaysia"],
+        "lunch": ["Nasi Kandar Pelita"],
+        "afternoon": ["Batu Caves"],
+        "dinner": ["Jalan Alor Night Food Street"],
+    }
+    client, calls = make_client(monkeypatch, picks)
+    get_place_stores()  # Compile the snapshot the conflict check reads outside the timed call
+
+    started = time.perf_counter()
+    result = client.generate_itinerary_dag("09:00", "No preference", "Own vehicle", "No preference")
+    elapsed = time.perf_counter() - started
+
+    # parse + one slot round + final, not eight sequential steps
+    assert elapsed < 0.6
+    assert [a["place"] for a in result["itinerary"]] == [picks[s][0] for s in picks]
+    assert result["reasoning_chain"]["step7_validate"] == "ok"
+
+
+def test_duplicate_picks_are_repicked(monkeypatch):
+    picks = {
+        "breakfast": ["Nasi Kandar Pelita"],
+        "morning": ["Batu Caves"],
+        "lunch": ["Nasi Kandar Pelita", "Restoran Kedai Kopi Sitiawan"],
+        "afternoon": ["Batu Caves", "Islamic Arts Museum Malaysia"],
+        "dinner": ["Jalan Alor Night Food Street"],
+    }
+    client, calls = make_client(monkeypatch, picks, delay=0)
+
+    result = client.generate_itinerary_dag("09:00", "No preference", "Own vehicle", "No preference")
+    places = [a["place"] for a in result["itinerary"]]
+
+    assert len(places) == len(set(places))
+    assert "Nasi Kandar Pelita" in calls[-1][1]["slots"]
+
+
+def test_generate_itinerary_uses_the_dag_when_configured(monkeypatch):
+    monkeypatch.setenv("ITINERARY_ORCHESTRATION", "dag")
+    picks = {
+        "breakfast": ["Nasi Kandar Pelita"],
+        "morning": ["Batu Caves"],
+        "lunch": ["Restoran Kedai Kopi Sitiawan"],
+        "afternoon": ["Islamic Arts Museum Malaysia"],
+        "dinner": ["Jalan Alor Night Food Street"],
+    }
+    client, calls = make_client(monkeypatch, picks, delay=0)
+
+    result = client.generate_itinerary(
+        "09:00", "No preference", "Own vehicle", "No preference",
+        stream=False, candidate_places=["Batu Caves", "Nasi Kandar Pelita"]
+    )
+    assert [a["place"] for a in result["itinerary"]] == [picks[s][0] for s in picks]
+    slot_rows = [row for table_id, row in calls if table_id == SLOT_TABLE_ID]
+    assert len(slot_rows) == 5
+    assert all(row["candidates"] == "Batu Caves, Nasi Kandar Pelita" for row in slot_rows)
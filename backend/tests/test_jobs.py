@@ -0,0 +1,67 @@
+import threading
+
+from backend.services import jobs
+from backend.services.jobs import JobStore, SUCCEEDED, FAILED
+
+PARAMS = {
+    "start_time": "09:00",
+    "dietary": "No preference",
+    "transport": "Own vehicle",
+    "accessibility": "No preference",
+}
+
+
+def fake_client(monkeypatch, gate, fail=False):
+    calls = []
+
+    def generate(on_chunk=None, **params):
+        calls.append(params)
+        on_chunk("step1_parse", "parsed")
+        gate.wait(5)
+        if fail:
+            raise ValueError("boom")
+        on_chunk("step8_final", "{}")
+        return {"itinerary": [], "transport_notes": "", "reasoning_chain": {}}
+
+    monkeypatch.setattr(jobs.jamai_client, "client", object())
+    monkeypatch.setattr(jobs.jamai_client, "generate_itinerary_streaming", generate, raising=False)
+    return calls
+
+
+def wait_done(job):
+    for _ in range(200):
+        if job.finished:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_duplicate_submission_attaches_to_running_job(monkeypatch):
+    gate = threading.Event()
+    calls = fake_client(monkeypatch, gate)
+    store = JobStore(workers=2)
+
+    job, attached = store.submit(PARAMS)
+    again, attached_again = store.submit(dict(PARAMS))
+    assert not attached and attached_again and again is job
+
+    gate.set()
+    done = wait_done(job)
+    assert done.status == SUCCEEDED
+    assert done.result["route_issues"] == []
+    assert done.progress()["steps_done"] == done.progress()["steps_total"]
+    assert len(calls) == 1
+
+
+def test_failed_jobs_are_retried_and_results_expire(monkeypatch):
+    gate = threading.Event()
+    gate.set()
+    fake_client(monkeypatch, gate, fail=True)
+    store = JobStore(workers=1, ttl=0)
+
+    job, _ = store.submit(PARAMS)
+    assert wait_done(job).status == FAILED
+    assert store.get(job.id) is None  # ttl=0: gone on the next access
+
+    retry, attached = store.submit(PARAMS)
+    assert not attached and retry.id != job.id
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from backend.scripts.generate_catalog import generate_region
+from backend.services.jamai_standin import StandInJamAI, types
+from backend.services.kb_sync import KnowledgeSync, Manifest, kb_row
+from backend.services.place_store import PlaceRecord, PlaceStore
+
+
+def _store(n=40, seed=7):
+    return PlaceStore.from_dataframe(generate_region("penang", n, random.Random(seed), images=[]), "penang")
+
+
+class FlakyTables:
+    """Delegates to the stand-in, failing the first `failures` add calls"""
+
+    def __init__(self, inner, failures):
+        self.inner = inner
+        self.failures = failures
+        self.add_calls = 0
+
+    def add_table_rows(self, table_type, request):
+        self.add_calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return self.inner.add_table_rows(table_type, request)
+
+    def delete_table_rows(self, table_type, request):
+        return self.inner.delete_table_rows(table_type, request)
+
+    def list_table_rows(self, table_type, table_id, offset=0, limit=100):
+        return self.inner.list_table_rows(table_type, table_id, offset, limit)
+
+
+def _sync(client, manifest_path, **kwargs):
+    return KnowledgeSync(client, types, manifest_path=str(manifest_path), batch_size=10, sleep=lambda s: None, **kwargs)
+
+
+def test_only_changed_rows_are_pushed(tmp_path):
+    client = StandInJamAI(step_seconds=0)
+    store = _store()
+    first = _sync(client, tmp_path / "m.json").run([store])
+    assert (first["added"], first["changed"], first["deleted"]) == (40, 0, 0)
+    assert len(client.table.knowledge["PlacesKB"]) == 40
+
+    # One opening time edited, one place removed, one added
+    records = list(store.records)
+    edited = records[0].to_dict()
+    edited["opening_hours"] = "Monday to Sunday: 6:00 AM - 9:00 AM"
+    records[0] = PlaceRecord(**edited)
+    del records[5]
+    extra = records[1].to_dict()
+    extra["name"] = "Brand New Kopitiam"
+    records.append(PlaceRecord(**extra))
+
+    client.table.requests = 0
+    second = _sync(client, tmp_path / "m.json").run([PlaceStore(records, "penang")])
+    assert (second["added"], second["changed"], second["deleted"]) == (1, 1, 1)
+    assert client.table.requests == 2  # One bulk delete, one bulk add
+
+    titles = sorted(row["Title"] for row in client.table.knowledge["PlacesKB"].values())
+    assert titles == sorted(r.name for r in records)
+    assert "6:00 AM" in next(
+        row["Text"] for row in client.table.knowledge["PlacesKB"].values() if row["Title"] == records[0].name
+    )
+    assert _sync(client, tmp_path / "m.json").run([PlaceStore(records, "penang")], dry_run=True)["changed"] == 0
+
+
+def test_failed_batches_retry_and_interrupted_syncs_resume(tmp_path):
+    standin = StandInJamAI(step_seconds=0)
+    flaky = StandInJamAI(step_seconds=0)
+    flaky.table = FlakyTables(standin.table, failures=2)
+    result = _sync(flaky, tmp_path / "m.json").run([_store()])
+    assert result["retries"] == 2 and len(standin.table.knowledge["PlacesKB"]) == 40
+
+    # Upstream down for good after the first batch: the run fails, the manifest keeps that batch
+    calls = []
+
+    def fail_after_first(table_type, request):
+        calls.append(request)
+        if len(calls) > 1:
+            raise ConnectionError("upstream down")
+        return standin.table.add_table_rows(table_type, request)
+
+    broken = StandInJamAI(step_seconds=0)
+    broken.table.add_table_rows = fail_after_first
+    bigger = _store(n=70, seed=8)
+    with pytest.raises(ConnectionError):
+        _sync(broken, tmp_path / "other.json", max_attempts=2).run([bigger])
+    assert len(Manifest(str(tmp_path / "other.json")).rows) == 10
+
+    resumed = _sync(StandInJamAI(step_seconds=0), tmp_path / "other.json").run([bigger])
+    assert resumed["added"] == 60
+
+
+def test_first_sync_adopts_a_hand_loaded_table(tmp_path):
+    client = StandInJamAI(step_seconds=0)
+    store = _store(n=25)
+    rows = [kb_row(r, "penang") for r in store.records]
+    hand_loaded = rows[2:20] + [
+        {"Title": rows[2]["Title"], "Text": rows[2]["Text"]},  # Loaded twice
+        {"Title": rows[0]["Title"].upper(), "Text": "Outdated description"},
+        {"Title": "Closed Long Ago Cafe", "Text": "Gone"},
+    ]
+    client.table.knowledge["PlacesKB"] = {f"hand-{i}": dict(row) for i, row in enumerate(hand_loaded)}
+
+    client.table.requests = 0
+    result = _sync(client, tmp_path / "m.json").run([store])
+    assert (result["adopted"], result["orphans"]) == (19, 2)
+    assert (result["added"], result["changed"], result["deleted"]) == (6, 1, 2)
+    titles = sorted(row["Title"] for row in client.table.knowledge["PlacesKB"].values())
+    assert titles == sorted(r.name for r in store.records)  # No duplicates, nothing stale
+    assert "hand-0" in client.table.knowledge["PlacesKB"]  # Unchanged rows are kept, not re-uploaded
+
+    again = _sync(client, tmp_path / "m.json").run([store], dry_run=True)
+    assert "adopted" not in again and (again["added"], again["changed"], again["deleted"]) == (0, 0, 0)
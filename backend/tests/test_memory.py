@@ -0,0 +1,77 @@
+import io
+import random
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.scripts.generate_catalog import generate_region
+from backend.services.facets import TextArena
+from backend.services.memory import SizeWalk, deep_sizeof
+from backend.services.place_store import PlaceStore
+from backend.services.utils import compact_frame
+
+
+def _csv_frame(n=300):
+    # Round-trip through CSV like a shard file on disk
+    buf = io.StringIO()
+    generate_region("penang", n, random.Random(3), images=[]).to_csv(buf, index=False)
+    buf.seek(0)
+    return pd.read_csv(buf)
+
+
+def test_repetitive_columns_become_shared_categoricals():
+    df = compact_frame(_csv_frame())
+    assert isinstance(df["Type"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Halal_Status"].dtype, pd.CategoricalDtype)
+    assert df["Name"].dtype == object  # Unique per row - left alone
+
+    store = PlaceStore.from_dataframe(df, "penang")
+    categories = {value: value for value in df["Type"].cat.categories}
+    assert all(r.type is categories[r.type] for r in store.records)  # One string per value
+    assert deep_sizeof(df) < deep_sizeof(_csv_frame())
+    assert compact_frame(df)["Type"].equals(df["Type"])
+
+
+def test_opening_hours_are_shared_within_one_build_only():
+    df = compact_frame(_csv_frame())
+    first, second = PlaceStore.from_dataframe(df, "penang"), PlaceStore.from_dataframe(df, "penang")
+    by_text = {}
+    for record in first.records:
+        assert by_text.setdefault(record.opening_hours, record.hours) is record.hours
+    # Nothing process-wide keeps the parsed hours of an old snapshot alive
+    assert second.records[0].hours == first.records[0].hours
+    assert second.records[0].hours is not first.records[0].hours or not first.records[0].hours
+
+
+def test_text_arena_matches_per_row_search():
+    texts = ["nasi lemak\x00malay", "", "char kway teow", "teh tarik\x01", "nasi kandar"]
+    arena = TextArena(texts)
+    assert [arena[i] for i in range(len(arena))] == [t.replace("\x01", " ") for t in texts]
+    for query in ("nasi", "a", "teow", "zzz", "k\x00m", "\x01"):
+        expected = np.array([query in arena[i] for i in range(len(arena))])
+        assert (arena.contains(query) == expected).all(), query
+
+    many = TextArena(["aaa"] * 200 + ["bbb"])  # Dense query takes the per-row path
+    assert many.contains("a").sum() == 200 and not many.contains("a")[-1]
+
+
+def test_shared_objects_are_counted_once():
+    text = "x" * 10_000
+    walk = SizeWalk()
+    first = walk.size([text])
+    second = walk.size({"again": text})
+    assert first > 10_000 and second < 1_000
+    assert deep_sizeof(np.zeros(1000, dtype=np.int64)) >= 8000
+
+
+def test_memory_endpoint_reports_loaded_structures(monkeypatch):
+    client = TestClient(app)
+    client.post("/api/places/lookup", json={"names": ["Batu Caves"]})  # Loads the snapshot
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    body = client.get("/api/admin/memory", headers={"X-Admin-Token": "secret"}).json()
+    region = body["regions"]["klang-valley"]
+    assert region["rows"] >= 33 and region["records"] > 0 and region["dataframe"] > 0
+    assert "itinerary_cache" in body["caches"]
+    assert body["total_bytes"] >= region["total"]
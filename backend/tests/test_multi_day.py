@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from backend.middleware.admission import AdmissionController
+from backend.services import multi_day
+from backend.services.multi_day import partition_candidates, generate_days
+
+
+def test_partitions_are_disjoint_and_balanced():
+    parts = partition_candidates(3, dietary="Halal only")
+    names = [n for part in parts for n in part]
+
+    assert len(names) == len(set(names))
+    assert max(map(len, parts)) - min(map(len, parts)) <= 2
+
+
+def test_days_run_concurrently_and_stream_as_they_finish(monkeypatch):
+    calls = []
+
+    def fake_generate(start_time, dietary, transport, accessibility, stream, candidate_places):
+        calls.append(candidate_places)
+        time.sleep(0.2)
+        return {
+            "itinerary": [{"time": "09:00 - 10:00", "place": candidate_places[0], "type": "Breakfast"}],
+            "transport_notes": "",
+            "reasoning_chain": {},
+        }
+
+    monkeypatch.setattr(multi_day.jamai_client, "client", object())
+    monkeypatch.setattr(multi_day.jamai_client, "generate_itinerary", fake_generate, raising=False)
+
+    async def collect():
+        return [item async for item in generate_days(3, "09:00", "No preference", "Own vehicle", "No preference")]
+
+    started = time.perf_counter()
+    results = asyncio.run(collect())
+    elapsed = time.perf_counter() - started
+
+    assert sorted(day for day, _, _ in results) == [1, 2, 3]
+    assert all(error is None for _, _, error in results)
+    assert elapsed < 0.5  # ~one day's latency, not three
+    first_places = [result["itinerary"][0]["place"] for _, result, _ in results]
+    assert len(set(first_places)) == 3
+
+
+def test_concurrent_days_take_admission_slots(monkeypatch):
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def fake_generate(start_time, dietary, transport, accessibility, stream, candidate_places):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return {"itinerary": [], "transport_notes": "", "reasoning_chain": {}}
+
+    monkeypatch.setattr(multi_day.jamai_client, "client", object())
+    monkeypatch.setattr(multi_day.jamai_client, "generate_itinerary", fake_generate, raising=False)
+
+    async def collect():
+        controller = AdmissionController("test", max_concurrent=2, max_queue=5, max_wait=2)
+        await controller.acquire()  # Held by the multi-day request itself, as the middleware does
+        days = generate_days(4, "09:00", "No preference", "Own vehicle", "No preference", admission=controller)
+        results = [item async for item in days]
+        return results, controller
+
+    results, controller = asyncio.run(collect())
+    assert sorted(day for day, _, _ in results) == [1, 2, 3, 4]
+    assert all(error is None for _, _, error in results)
+    assert peak[0] == 2  # The request's slot plus the one free slot, not ITINERARY_MAX_CONCURRENT_DAYS
+    assert controller.active == 1 and controller.stats["admitted"] >= 3
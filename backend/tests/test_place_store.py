@@ -0,0 +1,28 @@
+import pytest
+
+from backend.services.place_store import get_place_store
+
+
+def test_store_maps_real_csv_columns():
+    store = get_place_store()
+    place = store.to_response(store.find_by_name("Petronas Twin Towers"))
+
+    assert place["contact"] == "https://www.petronastwintowers.com.my"
+    assert place["how_to_get_there"]
+    assert place["is_wheelchair_accessible"] is True
+
+
+def test_filter_returns_row_ids():
+    store = get_place_store()
+    ids = store.filter(place_type="Food", halal_status="Halal only")
+
+    assert ids == sorted(ids)
+    assert all(store.records[i].type == "Food" and store.records[i].is_halal for i in ids)
+    # Qualified statuses such as "Muslim-Friendly (Pork-Free)" count as halal-friendly
+    assert store.find_by_name("Village Park Restaurant") in ids
+
+
+def test_records_are_immutable():
+    record = get_place_store().records[0]
+    with pytest.raises(AttributeError):
+        record.name = "changed"
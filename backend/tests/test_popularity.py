@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.place_store import get_place_store
+from backend.services.popularity import PopularityTracker
+from backend.services.recommendations import get_recommendations
+# The app imports services.* (not backend.services.*) - patch the instance it uses
+from services import popularity as app_popularity
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_counts_decay_and_memory_stays_bounded():
+    clock = FakeClock()
+    tracker = PopularityTracker(half_life=60, top_k=8, refresh_seconds=0, clock=clock)
+    for _ in range(4):
+        tracker.record("klang-valley", "old favourite", "itinerary")
+    clock.now += 120  # Two half-lives
+    tracker.record("klang-valley", "new spot", "click")
+    for i in range(50):
+        tracker.record("klang-valley", f"one-off {i}", "view")
+
+    ranked = dict(tracker.decayed())
+    assert len(ranked) == 8 and tracker.sketch.table.shape == (4, 2048)
+    assert abs(ranked["klang-valley:old favourite"] - 3.0) < 0.05  # 4 x 3 / 2^2
+    assert ranked["klang-valley:new spot"] >= 2.0
+    assert tracker.snapshot()["klang-valley:old favourite"] == 1.0
+
+    # Far past the landmark the stored weights are rescaled, ratios survive
+    clock.now += 60 * 1000
+    tracker.record("klang-valley", "new spot", "click")
+    assert tracker.landmark == clock.now
+    snapshot = tracker.snapshot()
+    assert snapshot["klang-valley:new spot"] == 1.0
+    assert snapshot.get("klang-valley:old favourite", 0.0) < 1e-6
+
+
+def test_trending_places_rise_in_recommendations():
+    store = get_place_store()
+    baseline = get_recommendations({}, current_time="03:00", top_n=len(store), trending={})
+    last = baseline[-1]["name"]
+
+    boosted = get_recommendations(
+        {}, current_time="03:00", top_n=3,
+        trending={f"{store.region}:{last.lower()}": 1.0}
+    )
+    assert boosted[0]["name"] == last
+    assert "Trending now" in boosted[0]["reasoning"]
+
+
+def test_place_events_endpoint_feeds_the_tracker(monkeypatch):
+    tracker = PopularityTracker(refresh_seconds=0)
+    monkeypatch.setattr(app_popularity, "popularity", tracker)
+    monkeypatch.setattr("routers.places.popularity", tracker)
+
+    name = get_place_store().records[0].name
+    resp = client.post("/api/places/events", json={"events": [
+        {"name": name, "kind": "click"}, {"name": "No Such Place Anywhere"},
+    ]})
+    assert resp.json() == {"recorded": 1}
+    assert tracker.events["click"] == 1
+    assert list(tracker.snapshot()) == [f"klang-valley:{name.lower()}"]
@@ -0,0 +1,54 @@
+import marshal
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.services.profiler import ProfileSession, profile_store, MODE_SAMPLE
+from backend.services.search_feature import search_places
+
+client = TestClient(app)
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+def test_profile_header_requires_admin_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    resp = client.get("/api/search", params={"place_type": "Food"}, headers={"X-Profile": "1"})
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+
+
+def test_cprofile_request_is_downloadable_as_pstats(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    resp = client.get(
+        "/api/search", params={"place_type": "Food"}, headers={"X-Profile": "cprofile", **ADMIN}
+    )
+    profile_id = resp.headers["x-profile-id"]
+
+    listed = client.get("/api/admin/profiles", headers=ADMIN).json()
+    assert listed[0]["id"] == profile_id and listed[0]["path"] == "/api/search"
+    assert listed[0]["status_code"] == 200
+
+    stats = marshal.loads(client.get(f"/api/admin/profiles/{profile_id}?format=pstats", headers=ADMIN).content)
+    assert any(func == "search_places" for _, _, func in stats)  # Ran on an executor thread
+
+    wrong = client.get(f"/api/admin/profiles/{profile_id}?format=collapsed", headers=ADMIN)
+    assert wrong.status_code == 400
+
+
+def test_sampler_records_collapsed_app_stacks():
+    session = ProfileSession(MODE_SAMPLE, "GET", "/api/search")
+    session.attach()
+    deadline = time.time() + 0.2
+    while time.time() < deadline:
+        search_places(place_type="Food", filter_open_now=True, current_time="12:00")
+    session.finish(200)
+
+    assert session.samples > 0
+    lines = session.collapsed().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("services/") and "services/search_feature.py:search_places" in stack
+    assert int(count) > 0
+    assert "tests/" not in session.collapsed()
+    profile_store.add(session)
+    assert profile_store.get(session.id) is session
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from middleware.capture import CaptureMiddleware, anonymize
+from scripts.replay import Replayer, Synthesizer, summarize
+import services.jamai_client as jamai_module
+from services.jamai_standin import StandInJamAI, types as standin_types
+
+
+def test_anonymize_keeps_shape_and_drops_free_text():
+    captured = anonymize({"search_query": "my hotel near KLCC", "place_type": "Food", "names": ["Batu Caves"], "limit": 5})
+    assert captured == {"search_query": {"$text": 4}, "place_type": "Food", "names": [{"$text": 2}], "limit": 5}
+
+
+def test_capture_then_replay_reports_per_route(tmp_path, monkeypatch):
+    log_path = tmp_path / "traffic.jsonl"
+    capturing = CaptureMiddleware(app, enabled=True, path=str(log_path))
+    client = TestClient(capturing)
+    client.get("/api/search", params={"search_query": "nasi lemak", "place_type": "Food"})
+    client.post("/api/places/lookup", json={"names": ["Batu Caves"]})
+    client.get("/api/images/no-such-place/md")
+    capturing.log.close()
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [r["r"] for r in records] == ["/api/search", "/api/places/lookup", "/api/images/{place}/{size}"]
+    assert records[0]["q"]["search_query"] == {"$text": 2} and records[0]["s"] == 200
+    assert "nasi" not in log_path.read_text()
+
+    # Itinerary through the local JamAI stand-in
+    monkeypatch.setattr(jamai_module.jamai_client, "client", StandInJamAI(step_seconds=0))
+    monkeypatch.setattr(jamai_module, "t", standin_types, raising=False)
+    records.append({
+        "ts": records[-1]["ts"], "m": "POST", "r": "/api/itinerary", "c": "x",
+        "b": {"start_time": "09:00", "dietary": "Halal only", "transport": "Own vehicle",
+              "accessibility": "No preference"},
+    })
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as http:
+            replayer = Replayer(http, Synthesizer(), speed=100)
+            elapsed = await replayer.run(records)
+        return summarize(replayer.results, elapsed)
+
+    rows = {row["route"]: row for row in asyncio.run(run())}
+    assert rows["GET /api/search"]["ok"] == 1
+    assert rows["GET /api/images/{place}/{size}"]["client_errors"] == 1
+    assert rows["POST /api/itinerary"]["ok"] == 1
+    assert rows["ALL"]["requests"] == 4 and rows["ALL"]["errors"] == 0
+
+
+def test_capture_is_flushed_on_shutdown(tmp_path):
+    log_path = tmp_path / "traffic.jsonl"
+    capturing = CaptureMiddleware(app, enabled=True, path=str(log_path))
+    with TestClient(capturing) as client:  # Runs the app's lifespan
+        for _ in range(3):
+            client.get("/api/search", params={"place_type": "Food"})
+    # Far fewer than FLUSH_EVERY lines, all on disk once the app has shut down
+    assert len(log_path.read_text().splitlines()) == 3
+    assert capturing.log._file.closed
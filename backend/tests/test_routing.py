@@ -0,0 +1,41 @@
+from backend.services.routing import load_travel_matrix, optimize_itinerary
+from backend.services.utils import parse_opening_hours
+
+
+def test_parse_opening_hours_formats():
+    assert parse_opening_hours("Daily: 6:30 AM - 5:30 PM") == [(390, 1050)]
+    assert parse_opening_hours("Daily: 3:30 PM - 2:30 AM") == [(930, 150)]
+    assert parse_opening_hours("Visits: Sat-Thu 9am-12:30pm; 2pm-4pm") == [(540, 750), (840, 960)]
+    assert parse_opening_hours("24/7") == [(0, 1440)]
+    assert parse_opening_hours("2-4pm") == [(840, 960)]
+    assert parse_opening_hours("10-11am") == [(600, 660)]
+    assert parse_opening_hours("11-1pm") == [(660, 780)]
+    assert parse_opening_hours("Jalan 3-5") == []
+
+
+def test_travel_matrix_covers_dataset():
+    matrix = load_travel_matrix()
+    assert matrix.get("KL Bird Park", "KL Bird Park", "Taxi/Grab") == 0
+    # Public transport is never faster than a Grab for the same leg
+    assert matrix.get("Batu Caves", "Canton Boy", "Public transport") >= \
+        matrix.get("Batu Caves", "Canton Boy", "Taxi/Grab")
+
+
+def test_optimizer_moves_closed_place_to_open_slot():
+    activities = [
+        {"time": "09:00-10:00", "place": "Kim Lian Kee", "type": "Food",
+         "opening_hours": "Daily: 11:00 AM - 11:00 PM"},
+        {"time": "10:30-12:00", "place": "Islamic Arts Museum Malaysia", "type": "Attraction",
+         "opening_hours": "Daily: 9:30 AM - 6:00 PM"},
+        {"time": "12:30-13:30", "place": "Nasi Lemak Wanjo Kg Baru", "type": "Food",
+         "opening_hours": "Daily: 6:00 AM - 12:00 AM"},
+    ]
+
+    routed, issues = optimize_itinerary(activities, "Taxi/Grab")
+
+    assert [a["place"] for a in routed] == [
+        "Nasi Lemak Wanjo Kg Baru", "Islamic Arts Museum Malaysia", "Kim Lian Kee"
+    ]
+    assert [a["time"] for a in routed] == ["09:00-10:00", "10:30-12:00", "12:30-13:30"]
+    assert routed[0]["travel_minutes"] is None
+    assert not any("closed" in issue for issue in issues)
@@ -0,0 +1,38 @@
+import pytest
+
+from backend.services import semantic_index
+from backend.services.search_feature import search_places
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(semantic_index, "INDEX_DIR", str(tmp_path))
+
+
+def test_semantic_search_matches_intent():
+    names = [p["name"] for p in search_places(search_query="family museum", mode="semantic", limit=3)]
+    assert "National Museum (Muzium Negara)" in names
+
+
+def test_hybrid_ranks_keyword_hit_first_and_respects_filters():
+    results = search_places(search_query="dim sum", mode="hybrid", halal_status="Halal only")
+
+    assert results[0]["name"] == "Canton Boy"
+    assert results[0]["relevance"] > results[-1]["relevance"] or len(results) == 1
+    assert all(r["halal_status"] for r in results)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        search_places(search_query="nasi", mode="fuzzy")
+
+
+def test_saved_index_loads_without_pickle(tmp_path):
+    documents = ["nasi lemak sambal", "dim sum har gow", "roti canai teh tarik", "nasi kandar curry"]
+    built = semantic_index.SemanticIndex.build(documents)
+    built.save(str(tmp_path / "shard"))
+
+    loaded = semantic_index.SemanticIndex.load(str(tmp_path / "shard"))  # allow_pickle=False
+    assert loaded.vocab == built.vocab
+    assert {t: rows.tolist() for t, rows in loaded.postings.items()} == {t: rows.tolist() for t, rows in built.postings.items()}
+    assert loaded.search("nasi curry", 2) == built.search("nasi curry", 2)
@@ -0,0 +1,53 @@
+import random
+
+from backend.scripts.generate_catalog import generate_region
+from backend.services import utils, place_store
+from backend.services.search_feature import search_places
+
+
+def test_generated_places_follow_schema():
+    df = generate_region("penang", 200, random.Random(1), images=[])
+
+    assert set(df["Type"]) == {"Food", "Attraction"}
+    assert df["Name"].is_unique
+    assert df["Address"].str.contains("Pulau Pinang").all()
+    # Every generated opening-hours string is understood by the parser
+    assert all(utils.parse_opening_hours(h) for h in df["Opening_Hours"])
+
+
+def test_search_fans_out_only_to_requested_region(tmp_path, monkeypatch):
+    generate_region("penang", 50, random.Random(2), images=[]).to_csv(tmp_path / "penang.csv", index=False)
+    generate_region("johor", 50, random.Random(3), images=[]).to_csv(tmp_path / "johor.csv", index=False)
+    monkeypatch.setattr(utils, "SHARD_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_SHARD_CACHE", {})
+    monkeypatch.setattr(place_store, "_STORE_CACHE", {})
+    monkeypatch.setenv("DATA_REGIONS", "klang-valley,penang")
+
+    assert utils.list_regions() == ["klang-valley", "penang"]
+
+    penang = search_places(region="penang")
+    assert len(penang) == 50 and {p["region"] for p in penang} == {"penang"}
+    assert "johor" not in utils._SHARD_CACHE
+    assert len(search_places()) == 33 + 50
+
+
+def test_region_list_is_resolved_once_until_invalidated(tmp_path, monkeypatch):
+    generate_region("penang", 20, random.Random(4), images=[]).to_csv(tmp_path / "penang.csv", index=False)
+    monkeypatch.setattr(utils, "SHARD_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "_SHARD_CACHE", {})
+    monkeypatch.setattr(place_store, "_STORE_CACHE", {})
+    monkeypatch.delenv("DATA_REGIONS", raising=False)
+    listings = []
+    real_listdir = utils.os.listdir
+    monkeypatch.setattr(utils.os, "listdir", lambda path: listings.append(path) or real_listdir(path))
+
+    assert utils.list_regions() == ["klang-valley", "penang"]
+    for _ in range(5):
+        utils.list_regions()
+        place_store.get_place_stores()
+    assert len(listings) <= 1  # Resolved at most once (may already be cached for this directory)
+
+    generate_region("johor", 20, random.Random(5), images=[]).to_csv(tmp_path / "johor.csv", index=False)
+    assert "johor" not in utils.list_regions()
+    utils.invalidate_regions()
+    assert utils.list_regions() == ["klang-valley", "johor", "penang"]
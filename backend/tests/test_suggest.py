@@ -0,0 +1,33 @@
+from backend.services.suggest import SuggestIndex, suggest
+
+
+def test_completes_mid_name_words_and_ranks_popular_first():
+    index = SuggestIndex([
+        ("Nasi Lemak Wanjo", "name", 1),
+        ("Nasi Lemak", "dish", 12),
+        ("Nasi Kandar", "dish", 30),
+        ("Laksa", "dish", 5),
+    ])
+
+    assert [text for text, *_ in index.suggest("nasi", 3)] == ["Nasi Kandar", "Nasi Lemak", "Nasi Lemak Wanjo"]
+    assert [text for text, *_ in index.suggest("lemak", 5)] == ["Nasi Lemak", "Nasi Lemak Wanjo"]
+    assert [text for text, *_ in index.suggest("n", 5, kinds=["name"])] == ["Nasi Lemak Wanjo"]
+
+
+def test_suggest_over_dataset_filters_by_type():
+    results = suggest("chi", limit=3, kinds=["cuisine"])
+
+    assert results[0] == {"text": "Chinese (Hokkien)", "type": "cuisine", "count": 4}
+    assert all(r["type"] == "cuisine" for r in results)
+
+
+def test_popular_entries_past_a_large_block_still_rank_first():
+    entries = [(f"Kopi Stall {i:04d}", "name", 1) for i in range(700)] + [("Kopi Zamrud", "name", 90)]
+    index = SuggestIndex(entries)
+
+    for prefix in ("kopi", "kopi s", "kopi stall 00", "kopi z"):
+        expected = sorted(
+            (e for e in entries if e[0].lower().startswith(prefix)), key=lambda e: (-e[2], len(e[0]), e[0])
+        )[:5]
+        assert [text for text, *_ in index.suggest(prefix, 5)] == [text for text, *_ in expected], prefix
+    assert index.suggest("kopi", 1)[0][0] == "Kopi Zamrud"
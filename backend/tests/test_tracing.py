@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from backend.main import app
+# The app imports services.* (not backend.services.*) - patch the instance it uses
+from services.tracing import MemoryExporter, exporter, span, to_otlp
+
+client = TestClient(app)
+
+
+def _spans_for(trace_id, monkeypatch_backend):
+    exporter.flush()
+    return [s for s in monkeypatch_backend.spans if s["trace_id"] == trace_id]
+
+
+def test_search_request_produces_nested_spans(monkeypatch):
+    backend = MemoryExporter()
+    monkeypatch.setattr(exporter, "backend", backend)
+
+    resp = client.get("/api/search", params={"place_type": "Food", "halal_status": "Halal only"})
+    trace_id = resp.headers["x-trace-id"]
+    spans = {s["name"]: s for s in _spans_for(trace_id, backend)}
+
+    root = spans["GET /api/search"]
+    assert root["parent_id"] is None and root["attributes"]["http.status_code"] == 200
+    # Work on the executor thread stays in the request's trace
+    search = spans["search_feature.search_places"]
+    assert spans["search.match"]["parent_id"] == search["span_id"]
+    assert spans["place_store.filter"]["attributes"]["filters"] == "place_type,halal_status"
+    assert spans["search.match"]["attributes"]["rows"] == len(resp.json()["results"])
+
+
+def test_incoming_traceparent_is_continued(monkeypatch):
+    backend = MemoryExporter()
+    monkeypatch.setattr(exporter, "backend", backend)
+    trace_id, parent = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    resp = client.get("/api/recommendations/quick", headers={"traceparent": f"00-{trace_id}-{parent}-01"})
+    assert resp.headers["x-trace-id"] == trace_id
+    assert resp.headers["traceparent"].startswith(f"00-{trace_id}-")
+    names = {s["name"]: s for s in _spans_for(trace_id, backend)}
+    assert names["GET /api/recommendations/quick"]["parent_id"] == parent
+    assert "recommendations.score" in names
+
+
+def test_spans_outside_a_request_are_noops_and_otlp_shape():
+    with span("orphan") as s:
+        s.set("ignored", True)
+    assert s.trace_id is None
+
+    body = to_otlp([{
+        "trace_id": "a" * 32, "span_id": "b" * 16, "parent_id": None, "name": "x",
+        "start_ns": 1, "end_ns": 2, "duration_ms": 0.0, "status": "ok", "attributes": {"rows": 3},
+    }])
+    otlp_span = body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["attributes"] == [{"key": "rows", "value": {"intValue": "3"}}]
+    assert otlp_span["parentSpanId"] == ""
@@ -21,6 +21,7 @@ interface ItineraryItem {
     type: string;
     reasoning: string;
     image_url: string;
+    thumbnail_urls?: Record<string, string> | null;
     address: string;
     opening_hours: string;
     price_range: string;
@@ -190,7 +191,13 @@ const TripPlannerPage = () => {
                     <CardContent className="space-y-3">
                     {item.image_url && (
                         <img
-                        src={item.image_url}
+                        src={item.thumbnail_urls ? `http://localhost:8000${item.thumbnail_urls.md}` : item.image_url}
+                        srcSet={item.thumbnail_urls ? ["sm 160w", "md 320w", "lg 640w"].map((s) => {
+                            const [size, w] = s.split(" ");
+                            return `http://localhost:8000${item.thumbnail_urls![size]} ${w}`;
+                        }).join(", ") : undefined}
+                        sizes="(max-width: 640px) 100vw, 320px"
+                        loading="lazy"
                         alt={item.place}
                         className="w-full h-48 object-cover rounded-lg"
                         />